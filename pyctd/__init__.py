@@ -1,13 +1,28 @@
-import pkg_resources
-import pycnv
-from .gui import pyctd_gui as pyctd_gui
+#
+# The package root only reads the version. Heavy modules (pycnv, Qt,
+# cartopy, matplotlib) are imported when they are used first, see
+# pyctd/test/benchmark_import.py
+#
+import os
 #from .tors.test import pymqds_rand as rand
 #from .gui.pyctd_gui import mainWidget
 
 # Get the version
-version_file = pkg_resources.resource_filename('pyctd','VERSION')
+version_file = os.path.join(os.path.dirname(__file__),'VERSION')
 
 with open(version_file) as version_f:
    version = version_f.read().strip()
 
 __version__ = version
+
+
+def __getattr__(name):
+   # The GUI (and with it Qt) is only imported when it is used
+   if(name == 'pyctd_gui'):
+      from .gui import pyctd_gui
+      return pyctd_gui
+   elif(name == 'pycnv'):
+      import pycnv
+      return pycnv
+
+   raise AttributeError("module 'pyctd' has no attribute '" + name + "'")
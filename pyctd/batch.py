@@ -0,0 +1,168 @@
+#
+# Command line tool to search folders for CTD casts and to write
+# summaries without the GUI, e.g. for nightly summaries on a server.
+# The module does not import Qt.
+#
+import os
+import sys
+import logging
+import argparse
+from pyctd import scan as pyctd_scan
+from pyctd import castdata
+from pyctd import summary as pyctd_summary
+from pyctd import session as pyctd_session
+
+logger = logging.getLogger('pyctd.batch')
+
+summary_formats = ['yaml','geojson','geojsonl','csv','parquet','session','profiles']
+
+
+def load_stations(stations_file):
+    """ Loads the stations of a station yaml file
+    Args:
+        stations_file: The station yaml file
+    Returns:
+        List of dictionaries with the keys 'name', 'lon' and 'lat'
+    """
+    with open(stations_file) as f_stations:
+        stations_yaml = pyctd_summary.load_yaml(f_stations)
+
+    stations = []
+    for station in stations_yaml['stations']:
+        # Station files use lon/lat or longitude/latitude
+        lon = station.get('lon',station.get('longitude'))
+        lat = station.get('lat',station.get('latitude'))
+        stations.append({'name':station['name'],'lon':lon,'lat':lat})
+
+    return stations
+
+
+def get_station(stations_file, name):
+    """ Searches a station in a station yaml file
+    Args:
+        stations_file: The station yaml file
+        name: The name of the station
+    Returns:
+        List with the longitude and latitude of the station, None if the station was not found
+    """
+    for station in load_stations(stations_file):
+        if(station['name'] == name):
+            return [station['lon'],station['lat']]
+
+    return None
+
+
+def main():
+    logging.basicConfig(stream=sys.stderr, level=logging.WARNING)
+    desc = 'Searches recursively in the data folder(s) for Seabird cnv and Sea & Sun mrd files and writes a summary of all valid casts. Example: pyctd-batch -d fahrten.2019/ -f summary_2019 --format yaml geojson csv --station TF0271 5000'
+    parser = argparse.ArgumentParser(description=desc)
+    parser.add_argument('--data_folder', '-d', nargs = '+', required=True, help='The data path(es) to be searched')
+    parser.add_argument('--filename', '-f', required=True, help='The filename of the summary, the file extension is added according to the format')
+    parser.add_argument('--format', nargs = '+', choices = summary_formats, default = ['yaml'], help='The format(s) of the summary, geojsonl is newline delimited geojson, parquet needs pyarrow, session is the binary session file of the GUI, profiles is a netCDF file with the profiles of all casts (needs netCDF4)')
+    parser.add_argument('--start', default = None, help='Casts need to be after start time, format: "YYYY-mm-dd HH:MM:SS"')
+    parser.add_argument('--stop', default = None, help='Casts need to be before stop time, format: "YYYY-mm-dd HH:MM:SS"')
+    parser.add_argument('--radius', nargs = 3, type = float, metavar = ('lon [dec deg]','lat [dec deg]','radius [m]'), help='Only casts within a radius around the position')
+    parser.add_argument('--station', nargs = 2, metavar = ('Station name','radius [m]'), help='Only casts within a radius around the station')
+    parser.add_argument('--station_file', default = os.path.join(os.path.dirname(__file__),'stations','iow_stations.yaml'), help='The station yaml file used for --station')
+    parser.add_argument('--rectangle', nargs = 4, type = float, metavar = ('lon min','lat min','lon max','lat max'), help='Only casts within the rectangle')
+    parser.add_argument('--no_cnv', action = 'store_true', help='Do not search for Seabird cnv files')
+    parser.add_argument('--no_mrd', action = 'store_true', help='Do not search for Sea & Sun mrd files')
+    parser.add_argument('--nproc', '-n', type = int, default = None, help='Number of processes used to parse the files, default all cores')
+    parser.add_argument('--index', action = 'store_true', help='Use the persistent scan index, only new or changed files are parsed')
+    parser.add_argument('--index_file', default = None, help='The filename of the scan index')
+    parser.add_argument('--precision', type = int, default = 6, help='Number of decimal places of the geojson coordinates')
+    parser.add_argument('--absolute_path', action = 'store_true', help='Write absolute filenames instead of filenames relative to the data folder (the common parent folder of several data folders)')
+    parser.add_argument('--verbose', '-v', action = 'count', help='Add -v to increase verbosity')
+    parser.add_argument('--version', action = 'version', version = '%(prog)s ' + str(pyctd_summary.version))
+    args = parser.parse_args()
+
+    if(args.verbose == None):
+        loglevel = logging.WARNING
+    elif(args.verbose == 1):
+        loglevel = logging.INFO
+    else:
+        loglevel = logging.DEBUG
+
+    logger.setLevel(loglevel)
+    pyctd_scan.logger.setLevel(loglevel)
+    if('parquet' in args.format): # Check before the search
+        try:
+            import pyarrow
+        except ImportError:
+            logger.critical('pyarrow is needed for the parquet format, install it with: pip install pyarrow')
+            sys.exit(1)
+    if('profiles' in args.format):
+        try:
+            import netCDF4
+        except ImportError:
+            logger.critical('netCDF4 is needed for the profiles format, install it with: pip install netCDF4')
+            sys.exit(1)
+
+    # Time criteria
+    start_time = None
+    stop_time  = None
+    if(args.start is not None):
+        [good_time,start_time] = pyctd_scan.str_to_time(args.start)
+        if(good_time == False):
+            logger.critical('Could not parse start time:' + args.start)
+            sys.exit(1)
+    if(args.stop is not None):
+        [good_time,stop_time] = pyctd_scan.str_to_time(args.stop)
+        if(good_time == False):
+            logger.critical('Could not parse stop time:' + args.stop)
+            sys.exit(1)
+
+    # Position criteria
+    station = None
+    if(args.radius is not None):
+        station = args.radius
+    elif(args.station is not None):
+        lonlat = get_station(args.station_file, args.station[0])
+        if(lonlat is None):
+            logger.critical('Could not find a station with name ' + args.station[0] +  ' in station file ' + args.station_file)
+            sys.exit(1)
+        station = [lonlat[0],lonlat[1],float(args.station[1])]
+    elif(args.rectangle is not None):
+        station = args.rectangle
+
+    # Absolute folders give absolute filenames, which are made relative to the common parent of the folders below
+    data_folders = [os.path.abspath(f) for f in args.data_folder]
+    logger.info('Searching in folder(s):' + str(data_folders))
+    data = pyctd_scan.get_all_valid_files(data_folders, search_seabird = not(args.no_cnv), search_mrd = not(args.no_mrd), start_time = start_time, stop_time = stop_time, station = station, nproc = args.nproc, loglevel = loglevel, use_index = args.index, index_file = args.index_file)
+    castdata.add_pyctd_fields(data)
+    logger.info('Found ' + str(len(data['info_dict'])) + ' valid casts')
+    if(args.absolute_path == False):
+        foldername = castdata.common_folder(data_folders)
+    else:
+        foldername = None
+
+    filename = os.path.splitext(args.filename)[0]
+    # The summaries are created lazily while writing, every format needs its own
+    if('yaml' in args.format):
+        summary = pyctd_summary.create_cast_summary(data, foldername = foldername, lazy = True)
+        pyctd_summary.create_yaml_summary(summary, filename + '.yaml')
+    if('geojson' in args.format):
+        summary = pyctd_summary.create_cast_summary(data, foldername = foldername, lazy = True)
+        pyctd_summary.create_geojson_summary(summary, filename + '.geojson', precision = args.precision)
+    if('geojsonl' in args.format):
+        summary = pyctd_summary.create_cast_summary(data, foldername = foldername, lazy = True)
+        pyctd_summary.create_geojson_summary(summary, filename + '.geojsonl', precision = args.precision, ndjson = True)
+    if('csv' in args.format):
+        pyctd_summary.create_csv_catalogue_summary(data, filename + '.csv', foldername = foldername)
+    if('parquet' in args.format):
+        pyctd_summary.create_parquet_summary(data, filename + '.parquet', foldername = foldername)
+    if('profiles' in args.format):
+        from pyctd import ragged as pyctd_ragged
+        pyctd_ragged.logger.setLevel(loglevel)
+        pyctd_ragged.create_profile_store(data, filename + '_profiles.nc', nproc = args.nproc)
+    if('session' in args.format):
+        if(foldername is not None):
+            data = castdata.castCatalogue(data)
+            data.replace_in_files(foldername)
+        # The folder of the relative filenames, used by pyctd-gridded
+        meta = {'foldername':foldername,'data_folders':data_folders}
+        pyctd_session.save_session(filename + '.npz', data, meta = meta)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,891 @@
+#
+# Functions to handle the cast data dictionary used by pyctd. The data
+# dictionary consists of the list 'info_dict' with the information of
+# all casts (as returned by pycnv/pysst) and the pyctd specific lists
+# 'pyctd_plot_map', 'pyctd_station', 'pyctd_campaign' and
+# 'pyctd_comment' with one entry per cast.
+#
+# castCatalogue stores the same information columnar (numpy arrays for
+# date, lon and lat, categorical codes for strings) and can be used like
+# the data dictionary.
+#
+import os
+import logging
+import datetime
+import copy
+import json
+import collections.abc
+import numpy as np
+import pytz
+from pyctd import spatial_index
+
+logger = logging.getLogger('pyctd.castdata')
+
+# Dates are stored as microseconds since 1970-01-01 UTC, NaT for invalid dates
+date_epoch = datetime.datetime(1970,1,1,tzinfo=pytz.utc)
+date_invalid = np.iinfo(np.int64).min
+
+
+def add_pyctd_fields(data):
+    """ Adds the pyctd specific fields to the data dictionary, if they not already exist
+    """
+    if(isinstance(data, castCatalogue)): # Has all fields
+        return data
+
+    ncasts = len(data['info_dict'])
+    if('pyctd_plot_map' not in data):
+        data['pyctd_plot_map'] = [[] for i in range(ncasts)] # Plotting information
+    if('pyctd_station' not in data):
+        data['pyctd_station']  = [None] * ncasts # station information
+    if('pyctd_campaign' not in data):
+        data['pyctd_campaign'] = [None] * ncasts # campaign information
+    if('pyctd_comment' not in data):
+        data['pyctd_comment']  = [None] * ncasts # comments
+
+    return data
+
+
+def _ncasts(data):
+    if(isinstance(data, castCatalogue)):
+        return data.ncasts
+
+    return len(data['info_dict'])
+
+
+class sha1Index(dict):
+    """ Dictionary with the sha1 of the casts as keys and the first row in data with the sha1 as value, casts without a sha1 are not indexed
+    Args:
+        data: The data dictionary or a castCatalogue
+    """
+    def __init__(self, data = None):
+        dict.__init__(self)
+        self.nrows = 0 # The rows 0 to nrows of data are indexed
+        if(data is not None):
+            self.add_rows(data)
+
+    def add_rows(self, data):
+        """ Indexes the rows of data after nrows, e.g. casts appended to data
+        """
+        if(isinstance(data, castCatalogue)):
+            sha1s = data.get_sha1(self.nrows)
+        else:
+            sha1s = [c.get('sha1') for c in data['info_dict'][self.nrows:]]
+
+        for i,sha1 in enumerate(sha1s, self.nrows):
+            if(sha1 is not None):
+                self.setdefault(sha1, i)
+
+        self.nrows += len(sha1s)
+
+
+def create_sha1_index(data):
+    """ Creates the sha1 index (sha1Index) of the casts in data
+    """
+    return sha1Index(data)
+
+
+def common_folder(foldername):
+    """ Returns the normalised absolute folder, for a list of folders their common parent folder
+    """
+    if(isinstance(foldername, str)):
+        foldername = [foldername]
+
+    return os.path.commonpath([os.path.normpath(os.path.abspath(f)) for f in foldername])
+
+
+def relative_filenames(filenames, foldername):
+    """ Makes filenames relative to a folder, i.e. './<path in folder>'
+    Args:
+        filenames: List of filenames (or directories), None entries are kept
+        foldername: A folder or a list of folders, e.g. the searched data folders. The filenames are relative to the common parent of the folders (see common_folder()), i.e. files of different folders can be told apart and are found again with one folder
+    Returns:
+        List of the filenames, filenames outside of the folder and filenames that are already relative ('./...') are unchanged
+    """
+    folder = common_folder(foldername)
+    prefix = os.path.join(folder,'')
+    curdir = os.path.join(os.curdir,'')
+    relative = []
+    for f in filenames:
+        if((f is None) or (f == os.curdir) or f.startswith(curdir)):
+            relative.append(f)
+            continue
+
+        fabs = os.path.normpath(os.path.abspath(f))
+        if((fabs == folder) or fabs.startswith(prefix)):
+            rel = os.path.relpath(fabs, folder)
+            f = os.curdir if(rel == os.curdir) else os.path.join(os.curdir, rel)
+
+        relative.append(f)
+
+    return relative
+
+
+def relative_filename(filename, foldername):
+    """ Makes one filename relative to a folder, see relative_filenames()
+    """
+    return relative_filenames([filename], foldername)[0]
+
+
+def compare_and_merge_data(data, data_new, sha1_index = None, new_station = True, new_comment = True, new_campaign = True, new_plot_map = True):
+    """ Checks in data if the casts of data_new are already there, if not
+    they are added, otherwise the pyctd specific fields of the existing
+    cast are updated with the not empty fields of the new one
+    Args:
+        data: The data dictionary the new casts are merged into
+        data_new: The data dictionary with the new casts
+        sha1_index: The sha1 index of data (see create_sha1_index()), it is updated in place. Casts appended to data since are added to it, if None or data has less rows than indexed a new one is created
+        new_station: Update pyctd_station of existing casts
+        new_comment: Update pyctd_comment of existing casts
+        new_campaign: Update pyctd_campaign of existing casts
+        new_plot_map: Update pyctd_plot_map of existing casts
+    Returns:
+        List with first entry the merged data and second entry the sha1 index of the merged data
+    """
+    add_pyctd_fields(data_new)
+    # Check if we have data at all
+    if('info_dict' not in data):
+        return [data_new,create_sha1_index(data_new)]
+
+    add_pyctd_fields(data)
+    ncasts = _ncasts(data)
+    if(not(isinstance(sha1_index, sha1Index)) or (sha1_index.nrows > ncasts)):
+        logger.debug('Creating a new sha1 index')
+        sha1_index = create_sha1_index(data)
+    elif(sha1_index.nrows < ncasts):
+        sha1_index.add_rows(data)
+
+    FLAG_CATALOGUE = isinstance(data, castCatalogue)
+    rows_new = [] # New casts for the catalogue, added at once
+    for i_new,c_new in enumerate(data_new['info_dict']):
+        sha1 = c_new.get('sha1')
+        i = sha1_index.get(sha1)
+        if(i is None): # New file, casts without a sha1 are always added
+            if(FLAG_CATALOGUE):
+                if(sha1 is not None):
+                    sha1_index[sha1] = data.ncasts + len(rows_new)
+                rows_new.append(i_new)
+            else:
+                if(sha1 is not None):
+                    sha1_index[sha1] = len(data['info_dict'])
+                data['info_dict'].append(c_new)
+                data['pyctd_plot_map'].append(data_new['pyctd_plot_map'][i_new])
+                data['pyctd_station'].append(data_new['pyctd_station'][i_new])
+                data['pyctd_campaign'].append(data_new['pyctd_campaign'][i_new])
+                data['pyctd_comment'].append(data_new['pyctd_comment'][i_new])
+            continue
+
+        # Same file
+        target = data
+        if(FLAG_CATALOGUE and (i >= data.ncasts)):
+            # The same file twice in data_new, the first one is not yet added, update it in data_new
+            target = data_new
+            i = rows_new[i - data.ncasts]
+
+        if(new_station):
+            if(data_new['pyctd_station'][i_new] is not None):
+                target['pyctd_station'][i] = data_new['pyctd_station'][i_new]
+
+        if(new_comment):
+            if(data_new['pyctd_comment'][i_new] is not None):
+                target['pyctd_comment'][i] = data_new['pyctd_comment'][i_new]
+
+        if(new_campaign):
+            if(data_new['pyctd_campaign'][i_new] is not None):
+                target['pyctd_campaign'][i] = data_new['pyctd_campaign'][i_new]
+
+        if(new_plot_map):
+            if(len(data_new['pyctd_plot_map'][i_new]) > 0):
+                target['pyctd_plot_map'][i] = data_new['pyctd_plot_map'][i_new]
+
+    if(FLAG_CATALOGUE):
+        data.extend(data_new, rows = rows_new)
+
+    sha1_index.nrows = _ncasts(data)
+    return [data,sha1_index]
+
+
+def to_datenum(date):
+    """ Converts a datetime into microseconds since 1970-01-01 UTC, naive datetimes are treated as UTC
+    """
+    if(date is None):
+        return date_invalid
+    if(date.tzinfo is None):
+        date = date.replace(tzinfo=pytz.utc)
+
+    return (date - date_epoch) // datetime.timedelta(microseconds=1)
+
+
+def from_datenum(datenum):
+    """ Converts microseconds since 1970-01-01 UTC into a datetime
+    """
+    if(datenum == date_invalid):
+        return None
+
+    return date_epoch + datetime.timedelta(microseconds=int(datenum))
+
+
+def _to_datenum_any(date):
+    """ Converts None, a datetime or a numpy.datetime64 into microseconds since 1970-01-01 UTC, None is returned as None
+    """
+    if(date is None):
+        return None
+    if(isinstance(date, np.datetime64)):
+        return int(date.astype('datetime64[us]').astype('int64'))
+
+    return to_datenum(date)
+
+
+class timeIndex(object):
+    """ Sorted index of the cast dates for fast time range queries, casts without a date are not indexed
+    Args:
+        datenum: Array of the dates as microseconds since 1970-01-01 UTC (see castCatalogue.datenum)
+    """
+    def __init__(self, datenum):
+        datenum = np.asarray(datenum, dtype = 'int64')
+        valid = np.where(datenum != date_invalid)[0]
+        isort = np.argsort(datenum[valid], kind = 'stable')
+        self._order = valid[isort]
+        self._datenum = datenum[self._order]
+
+    def __len__(self):
+        return len(self._order)
+
+    def _bounds(self, start_time, stop_time):
+        start = _to_datenum_any(start_time)
+        stop  = _to_datenum_any(stop_time)
+        i0 = 0 if start is None else np.searchsorted(self._datenum, start, side = 'right')
+        i1 = len(self._datenum) if stop is None else np.searchsorted(self._datenum, stop, side = 'left')
+        return [i0,max(i0,i1)]
+
+    def query(self, start_time = None, stop_time = None):
+        """ Returns the sorted indices of the casts with start_time < date < stop_time, as scan.check_info_dict()
+        Args:
+            start_time: datetime or numpy.datetime64, None for no lower limit, naive datetimes are treated as UTC
+            stop_time: datetime or numpy.datetime64, None for no upper limit
+        """
+        return np.sort(self.query_by_date(start_time, stop_time))
+
+    def query_by_date(self, start_time = None, stop_time = None):
+        """ As query() but the indices are sorted by date
+        """
+        i0,i1 = self._bounds(start_time, stop_time)
+        return self._order[i0:i1]
+
+    def count(self, start_time = None, stop_time = None):
+        """ Returns the number of casts with start_time < date < stop_time
+        """
+        i0,i1 = self._bounds(start_time, stop_time)
+        return i1 - i0
+
+    def range(self):
+        """ Returns the first and last date as datetimes, None if there are no dates
+        """
+        if(len(self._datenum) == 0):
+            return [None,None]
+
+        return [from_datenum(self._datenum[0]),from_datenum(self._datenum[-1])]
+
+
+class categorical(object):
+    """ Stores every distinct string once, the casts hold integer codes
+    into categories. The code -1 is used for None
+    """
+    def __init__(self):
+        self.categories = []
+        self._codes = {}
+
+    def code(self, value):
+        if(value is None):
+            return -1
+        try:
+            return self._codes[value]
+        except KeyError:
+            self._codes[value] = len(self.categories)
+            self.categories.append(value)
+            return self._codes[value]
+
+    def value(self, code):
+        if(code < 0):
+            return None
+        return self.categories[code]
+
+    def rename(self, categories):
+        """ Replaces the categories by new names (in the same order), e.g. relative directories
+        """
+        self.categories = list(categories)
+        self._codes = {}
+        for i,c in enumerate(self.categories):
+            self._codes.setdefault(c,i)
+
+
+class castRecord(collections.abc.MutableMapping):
+    """ The info_dict of one cast of a castCatalogue, reads and writes directly into the columns
+    """
+    __slots__ = ('catalogue','row')
+    def __init__(self, catalogue, row):
+        self.catalogue = catalogue
+        self.row = row
+
+    def __getitem__(self, key):
+        return self.catalogue.get_info(self.row, key)
+
+    def __setitem__(self, key, value):
+        self.catalogue.set_info(self.row, key, value)
+
+    def __delitem__(self, key):
+        self.catalogue.del_info(self.row, key)
+
+    def __iter__(self):
+        return iter(self.catalogue.info_keys(self.row))
+
+    def __len__(self):
+        return len(self.catalogue.info_keys(self.row))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class columnView(collections.abc.Sequence):
+    """ A list like view of one column of a castCatalogue
+    """
+    def __init__(self, catalogue, get_function, set_function):
+        self.catalogue = catalogue
+        self._get = get_function
+        self._set = set_function
+
+    def __len__(self):
+        return self.catalogue.ncasts
+
+    def _row(self, i):
+        n = self.catalogue.ncasts
+        if(i < 0):
+            i += n
+        if((i < 0) or (i >= n)):
+            raise IndexError('cast index out of range')
+        return i
+
+    def __getitem__(self, i):
+        if(isinstance(i, slice)):
+            return [self._get(j) for j in range(*i.indices(self.catalogue.ncasts))]
+        return self._get(self._row(i))
+
+    def __setitem__(self, i, value):
+        self._set(self._row(i), value)
+
+    def append(self, value):
+        raise TypeError('Casts have to be added with castCatalogue.append()')
+
+
+class castCatalogue(object):
+    """ Columnar storage of casts. Dates (as microseconds since 1970 UTC),
+    longitudes and latitudes are numpy arrays, the stations, campaigns,
+    file types and file directories are stored as categorical codes.
+    The catalogue can be used like the data dictionary, i.e.
+    catalogue['info_dict'][i]['lon'] or catalogue['pyctd_station'][i] = 'TF0271'
+    Args:
+        data: A data dictionary whose casts are added
+    """
+    fields = ['info_dict','pyctd_plot_map','pyctd_station','pyctd_campaign','pyctd_comment']
+    _info_keys = ('lon','lat','date','station','file','sha1','type')
+    # The columns stored in numpy arrays and their dtypes
+    _dtypes = {'lon':'float64','lat':'float64','date':'int64','sha1':'S40','type':'int16',
+               'station':'int32','file_dir':'int32','pyctd_station':'int32','pyctd_campaign':'int32'}
+    def __init__(self, data = None):
+        self._n = 0
+        self._arrays = {}
+        for k in self._dtypes.keys():
+            self._arrays[k] = np.zeros(0,dtype=self._dtypes[k])
+
+        self._categoricals = {'type':categorical(),'station':categorical(),'file_dir':categorical(),
+                              'pyctd_station':categorical(),'pyctd_campaign':categorical()}
+        self._file_names = [] # The basenames of the files
+        self._comments   = {} # Sparse, most casts have no comment
+        self._plot_map   = {}
+        self._extra      = {} # Additional keys of the info_dicts
+        self._spatial_index = None # Created when needed, see spatial_index()
+        self._time_index = None    # Created when needed, see time_index()
+        if(data is not None):
+            self.extend(data)
+
+    @property
+    def ncasts(self):
+        """ The number of casts
+        """
+        return self._n
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __contains__(self, key):
+        return key in self.fields
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def keys(self):
+        return list(self.fields)
+
+    def get(self, key, default = None):
+        if(key in self.fields):
+            return self[key]
+        return default
+
+    def __getitem__(self, key):
+        if(key == 'info_dict'):
+            return columnView(self, lambda i: castRecord(self,i), self._set_record)
+        elif(key in ('pyctd_station','pyctd_campaign')):
+            return columnView(self, lambda i: self._get_categorical(key,i), lambda i,v: self._set_categorical(key,i,v))
+        elif(key == 'pyctd_comment'):
+            return columnView(self, lambda i: self._comments.get(i), self._set_comment)
+        elif(key == 'pyctd_plot_map'):
+            return columnView(self, lambda i: self._plot_map.setdefault(i,[]), self._set_plot_map)
+
+        raise KeyError(key)
+
+    def __setitem__(self, key, values):
+        """ Replaces a whole pyctd column
+        """
+        if((key not in self.fields) or (key == 'info_dict')):
+            raise KeyError(key)
+        if(len(values) != self._n):
+            raise ValueError('Length of ' + key + ' does not match the number of casts')
+
+        view = self[key]
+        for i,v in enumerate(values):
+            view[i] = v
+
+    def reserve(self, n):
+        """ Enlarges the arrays to hold at least n casts
+        """
+        size = len(self._arrays['lon'])
+        if(n <= size):
+            return
+
+        size = max(n,2*size,1024)
+        for k,a in self._arrays.items():
+            anew = np.zeros(size,dtype=a.dtype)
+            anew[:self._n] = a[:self._n]
+            self._arrays[k] = anew
+
+    def append(self, info_dict, plot_map = None, station = None, campaign = None, comment = None):
+        """ Appends a cast
+        Args:
+            info_dict: The info_dict of the cast
+            plot_map, station, campaign, comment: The pyctd specific fields of the cast
+        """
+        self.reserve(self._n + 1)
+        i = self._n
+        self._n += 1
+        self._file_names.append('')
+        self._set_record(i, info_dict)
+        self._set_categorical('pyctd_station', i, station)
+        self._set_categorical('pyctd_campaign', i, campaign)
+        self._set_comment(i, comment)
+        self._set_plot_map(i, plot_map)
+
+    def extend(self, data, rows = None):
+        """ Appends the casts of a data dictionary
+        Args:
+            data: The data dictionary
+            rows: The indices of the casts in data to be added, if None all casts are added
+        """
+        data = add_pyctd_fields(data)
+        if(rows is None):
+            rows = range(len(data['info_dict']))
+
+        info_dicts = [data['info_dict'][i] for i in rows]
+        n = len(info_dicts)
+        if(n == 0):
+            return
+
+        i0 = self._n
+        i1 = i0 + n
+        self.reserve(i1)
+        self._n = i1
+        self._spatial_index = None
+        self._time_index = None
+        a = self._arrays
+        a['lon'][i0:i1]  = [np.nan if c.get('lon') is None else c['lon'] for c in info_dicts]
+        a['lat'][i0:i1]  = [np.nan if c.get('lat') is None else c['lat'] for c in info_dicts]
+        a['date'][i0:i1] = [to_datenum(c.get('date')) for c in info_dicts]
+        a['sha1'][i0:i1] = [b'' if c.get('sha1') is None else c['sha1'].encode() for c in info_dicts]
+        code = self._categoricals['type'].code
+        a['type'][i0:i1] = [code(c.get('type')) for c in info_dicts]
+        code = self._categoricals['station'].code
+        a['station'][i0:i1] = [code(c['station']) if 'station' in c else -2 for c in info_dicts]
+        code = self._categoricals['file_dir'].code
+        files = [os.path.split(c['file']) if c.get('file') is not None else (None,'') for c in info_dicts]
+        a['file_dir'][i0:i1] = [code(f[0]) for f in files]
+        self._file_names.extend([f[1] for f in files])
+        for column in ('pyctd_station','pyctd_campaign'):
+            code = self._categoricals[column].code
+            a[column][i0:i1] = [code(data[column][i]) for i in rows]
+
+        for inew,i in enumerate(rows):
+            self._set_comment(i0 + inew, data['pyctd_comment'][i])
+            self._set_plot_map(i0 + inew, data['pyctd_plot_map'][i])
+
+        # Additional keys of the info_dicts
+        for inew,c in enumerate(info_dicts):
+            for key in c.keys():
+                if(key not in self._info_keys):
+                    self._extra.setdefault(i0 + inew,{})[key] = c[key]
+
+    def iter_info_dicts(self, chunksize = 10000):
+        """ Generator of the info_dicts of all casts as new dictionaries. This is much faster than dict(catalogue['info_dict'][i]), the columns are converted in chunks of chunksize casts
+        """
+        a = self._arrays
+        for i0 in range(0,self._n,chunksize):
+            i1 = min(i0 + chunksize,self._n)
+            lon  = a['lon'][i0:i1].tolist()
+            lat  = a['lat'][i0:i1].tolist()
+            date = a['date'][i0:i1].tolist()
+            sha1 = a['sha1'][i0:i1].tolist()
+            ftype   = self.values('type', i0, i1)
+            station = a['station'][i0:i1].tolist()
+            files   = self.values('file', i0, i1)
+            for j,i in enumerate(range(i0,i1)):
+                info_dict = {}
+                info_dict['lon']  = lon[j]
+                info_dict['lat']  = lat[j]
+                info_dict['date'] = from_datenum(date[j])
+                code = station[j]
+                if(code != -2):
+                    info_dict['station'] = self._categoricals['station'].categories[code] if code >= 0 else None
+                info_dict['file'] = files[j]
+                info_dict['sha1'] = sha1[j].decode() if len(sha1[j]) > 0 else None
+                info_dict['type'] = ftype[j]
+                if(i in self._extra):
+                    info_dict.update(self._extra[i])
+
+                yield info_dict
+
+    def values(self, column, i0 = 0, i1 = None):
+        """ Returns the values of the casts i0 to i1 of a column as a list, column is a pyctd column ('pyctd_station', 'pyctd_campaign', 'pyctd_comment', 'pyctd_plot_map') or 'lon', 'lat', 'sha1', 'station', 'type', 'file', 'file_dir'
+        """
+        if(i1 is None):
+            i1 = self._n
+
+        if(column in ('lon','lat')):
+            return self._arrays[column][i0:i1].tolist()
+        elif(column == 'sha1'):
+            return [s.decode() if len(s) > 0 else None for s in self._arrays['sha1'][i0:i1].tolist()]
+        elif(column in self._categoricals):
+            categories = self._categoricals[column].categories + [None,None] # -1 and -2 are None
+            return [categories[c] for c in self._arrays[column][i0:i1].tolist()]
+        elif(column == 'file'):
+            return self._files(self._categoricals['file_dir'].categories, i0, i1)
+        elif(column == 'pyctd_comment'):
+            return [self._comments.get(i) for i in range(i0,i1)]
+        elif(column == 'pyctd_plot_map'):
+            return [self._plot_map.get(i,[]) for i in range(i0,i1)]
+
+        raise KeyError(column)
+
+    def _files(self, dirs, i0, i1):
+        # Join the directories with the separator once, the same as os.path.join(dirname,basename)
+        prefixes = [os.path.join(d,'') for d in dirs] + [None]
+        prefixes = [prefixes[c] for c in self._arrays['file_dir'][i0:i1].tolist()]
+        return [None if p is None else p + f for p,f in zip(prefixes,self._file_names[i0:i1])]
+
+    def relative_files(self, foldername, i0 = 0, i1 = None):
+        """ Returns the filenames of the casts i0 to i1 relative to the folder(s) foldername (see relative_filenames()), the catalogue is not changed
+        """
+        if(i1 is None):
+            i1 = self._n
+
+        return self._files(relative_filenames(self._categoricals['file_dir'].categories, foldername), i0, i1)
+
+    def take(self, rows):
+        """ Returns a new catalogue with the casts in rows (list of indices or boolean mask)
+        """
+        mask = np.asarray(rows)
+        if(mask.dtype == bool):
+            if(len(mask) != self._n):
+                raise IndexError('Boolean mask of length ' + str(len(mask)) + ' for ' + str(self._n) + ' casts')
+            rows = np.flatnonzero(mask)
+        else: # Indices, also an empty list, negative indices count from the end
+            rows = np.arange(self._n)[np.asarray(rows, dtype = int)]
+        cat = castCatalogue()
+        cat._n = len(rows)
+        for k,a in self._arrays.items():
+            cat._arrays[k] = a[:self._n][rows]
+
+        cat._categoricals = copy.deepcopy(self._categoricals)
+        cat._file_names = [self._file_names[i] for i in rows]
+        for inew,i in enumerate(rows):
+            if(i in self._comments):
+                cat._comments[inew] = self._comments[i]
+            if(i in self._plot_map):
+                cat._plot_map[inew] = self._plot_map[i]
+            if(i in self._extra):
+                cat._extra[inew] = dict(self._extra[i])
+
+        return cat
+
+    def to_arrays(self):
+        """ Returns the catalogue as a dictionary of numpy arrays, e.g. to be saved with numpy.savez. All strings and the sparse fields are stored in the JSON string 'catalogue_json'
+        """
+        arrays = {}
+        for k,a in self._arrays.items():
+            arrays[k] = a[:self._n]
+
+        cat_dict = {}
+        cat_dict['ncasts']       = self._n
+        cat_dict['categoricals'] = {k:c.categories for k,c in self._categoricals.items()}
+        cat_dict['file_names']   = self._file_names
+        cat_dict['comments']     = self._comments
+        cat_dict['plot_map']     = self._plot_map
+        cat_dict['extra']        = self._extra
+        # Values that are not JSON compatible (e.g. datetimes in additional keys) are stored as str
+        arrays['catalogue_json'] = np.array(json.dumps(cat_dict, default = str))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """ Creates a catalogue from the dictionary returned by to_arrays()
+        """
+        cat_dict = json.loads(str(arrays['catalogue_json']))
+        cat = cls()
+        cat._n = cat_dict['ncasts']
+        for k in cls._dtypes.keys():
+            cat._arrays[k] = np.array(arrays[k],dtype=cls._dtypes[k])
+            if(len(cat._arrays[k]) != cat._n):
+                raise ValueError('Length of column ' + k + ' does not match the number of casts')
+
+        for k,categories in cat_dict['categoricals'].items():
+            c = cat._categoricals[k]
+            c.categories = categories
+            c._codes = {}
+            for i,value in enumerate(categories):
+                c._codes.setdefault(value,i)
+
+        cat._file_names = cat_dict['file_names']
+        # JSON keys are strings
+        cat._comments = {int(i):v for i,v in cat_dict['comments'].items()}
+        cat._plot_map = {int(i):v for i,v in cat_dict['plot_map'].items()}
+        cat._extra    = {int(i):v for i,v in cat_dict['extra'].items()}
+        return cat
+
+    # Vectorized access to the columns
+    @property
+    def lon(self):
+        return self._arrays['lon'][:self._n]
+
+    @property
+    def lat(self):
+        return self._arrays['lat'][:self._n]
+
+    @property
+    def datenum(self):
+        """ Dates as microseconds since 1970-01-01 UTC (int64), invalid dates are numpy.iinfo(int64).min
+        """
+        return self._arrays['date'][:self._n]
+
+    @property
+    def dates(self):
+        """ Dates as numpy datetime64[us] array, invalid dates are NaT
+        """
+        return self.datenum.view('datetime64[us]')
+
+    def codes(self, column):
+        """ Returns the categorical codes of 'station', 'pyctd_station', 'pyctd_campaign', 'type' or 'file_dir', -1 is None
+        """
+        return self._arrays[column][:self._n]
+
+    def spatial_index(self):
+        """ Returns the spatial_index.spatialIndex of the cast positions for fast radius and rectangle queries, the index is created when needed and kept until positions change
+        """
+        if(self._spatial_index is None):
+            self._spatial_index = spatial_index.spatialIndex(self.lon.copy(), self.lat.copy())
+
+        return self._spatial_index
+
+    def time_index(self):
+        """ Returns the timeIndex of the cast dates for fast time range queries, the index is created when needed and kept until dates change
+        """
+        if(self._time_index is None):
+            self._time_index = timeIndex(self.datenum)
+
+        return self._time_index
+
+    def categories(self, column):
+        """ Returns the categories of 'station', 'pyctd_station', 'pyctd_campaign', 'type' or 'file_dir', the codes() are indices into this list
+        """
+        return self._categoricals[column].categories
+
+    def mask(self, column, value):
+        """ Returns a boolean mask of the casts with column (see codes()) equal value
+        """
+        try:
+            code = self._categoricals[column]._codes[value]
+        except KeyError:
+            code = -1 if value is None else -3
+
+        return self.codes(column) == code
+
+    def argsort(self, column):
+        """ Returns the indices sorting the casts by column ('date', 'lon', 'lat' or a categorical column)
+        """
+        if(column in ('date','lon','lat')):
+            return np.argsort(self._arrays[column][:self._n], kind = 'stable')
+
+        # Sort the categories and use their rank
+        cat = self._categoricals[column]
+        rank = np.zeros(len(cat.categories) + 3,dtype='int64')
+        order = sorted(range(len(cat.categories)), key = lambda c: cat.categories[c])
+        rank[np.asarray(order,dtype=int)] = np.arange(len(order))
+        return np.argsort(rank[self.codes(column)], kind = 'stable')
+
+    def set_values(self, column, rows, values):
+        """ Sets the categorical column 'pyctd_station' or 'pyctd_campaign' of many casts at once
+        Args:
+            column: The column
+            rows: Indices or boolean mask of the casts
+            values: One value for all casts or a sequence with one value per cast, None removes the value
+        """
+        if(column not in ('pyctd_station','pyctd_campaign')):
+            raise KeyError(column)
+
+        cat = self._categoricals[column]
+        if((values is None) or isinstance(values, str)):
+            codes = cat.code(values)
+        else:
+            codes = np.asarray([cat.code(v) for v in values],dtype=self._dtypes[column])
+
+        self._arrays[column][:self._n][rows] = codes
+
+    def assign_nearest_station(self, names, lons, lats, radius, rows = None, overwrite = True):
+        """ Assigns the casts to the nearest station (pyctd_station) within radius, the distances are computed with the spatial index
+        Args:
+            names: The names of the stations
+            lons, lats: The positions of the stations [decdeg]
+            radius: The maximum distance [m] between cast and station, one for all stations or one per station
+            rows: Indices or boolean mask of the casts to assign, None for all casts
+            overwrite: If False, casts already assigned to a station are not changed
+        Returns:
+            Array with the index of the assigned station for every cast, -1 if no station was assigned
+        """
+        inearest,dnearest = self.spatial_index().nearest(np.asarray(lons, dtype = float), np.asarray(lats, dtype = float), radius)
+        if(rows is not None):
+            use = np.zeros(self._n,dtype=bool)
+            use[rows] = True
+            inearest[~use] = -1
+        if not(overwrite):
+            inearest[self.codes('pyctd_station') >= 0] = -1
+
+        assign = inearest >= 0
+        if(assign.any()):
+            self.set_values('pyctd_station', assign, np.asarray(names, dtype = object)[inearest[assign]])
+
+        logger.info('Assigned ' + str(assign.sum()) + ' of ' + str(self._n) + ' casts to stations')
+        return inearest
+
+    def get_sha1(self, i0 = 0, i1 = None):
+        """ Returns a list of the sha1 of the casts i0 to i1 (default all casts), None for casts without a sha1
+        """
+        if(i1 is None):
+            i1 = self._n
+
+        return [s.decode() if len(s) > 0 else None for s in self._arrays['sha1'][i0:min(i1,self._n)]]
+
+    def replace_in_files(self, foldername):
+        """ Makes the filenames of all casts relative to the folder(s) foldername, see relative_filenames()
+        """
+        file_dir = self._categoricals['file_dir']
+        file_dir.rename(relative_filenames(file_dir.categories, foldername))
+
+    # Access to single values
+    def _get_categorical(self, column, i):
+        return self._categoricals[column].value(self._arrays[column][i])
+
+    def _set_categorical(self, column, i, value):
+        self._arrays[column][i] = self._categoricals[column].code(value)
+
+    def _set_comment(self, i, value):
+        if(value is None):
+            self._comments.pop(i,None)
+        else:
+            self._comments[i] = value
+
+    def _set_plot_map(self, i, value):
+        if((value is None) or (len(value) == 0)):
+            self._plot_map.pop(i,None)
+        else:
+            self._plot_map[i] = value
+
+    def _set_record(self, i, info_dict):
+        self._extra.pop(i,None)
+        self._spatial_index = None
+        self._time_index = None
+        self._arrays['lon'][i]      = np.nan
+        self._arrays['lat'][i]      = np.nan
+        self._arrays['date'][i]     = date_invalid
+        self._arrays['sha1'][i]     = b''
+        self._arrays['type'][i]     = -1
+        self._arrays['file_dir'][i] = -1
+        self._file_names[i]         = ''
+        self._arrays['station'][i]  = -2 # No station information
+        for key,value in info_dict.items():
+            self.set_info(i, key, value)
+
+    def get_info(self, i, key):
+        """ Returns the value of the info_dict key of cast i
+        """
+        if(key in ('lon','lat')):
+            return float(self._arrays[key][i])
+        elif(key == 'date'):
+            return from_datenum(self._arrays['date'][i])
+        elif(key == 'sha1'):
+            sha1 = self._arrays['sha1'][i]
+            return sha1.decode() if len(sha1) > 0 else None
+        elif(key in ('type','station')):
+            code = self._arrays[key][i]
+            if(code == -2):
+                raise KeyError(key)
+            return self._categoricals[key].value(code)
+        elif(key == 'file'):
+            dirname = self._categoricals['file_dir'].value(self._arrays['file_dir'][i])
+            if(dirname is None):
+                return None
+            return os.path.join(dirname,self._file_names[i])
+
+        return self._extra[i][key]
+
+    def set_info(self, i, key, value):
+        """ Sets the value of the info_dict key of cast i
+        """
+        if(key in ('lon','lat')):
+            self._arrays[key][i] = np.nan if value is None else value
+            self._spatial_index = None
+        elif(key == 'date'):
+            self._arrays['date'][i] = to_datenum(value)
+            self._time_index = None
+        elif(key == 'sha1'):
+            self._arrays['sha1'][i] = b'' if value is None else value.encode()
+        elif(key in ('type','station')):
+            self._arrays[key][i] = self._categoricals[key].code(value)
+        elif(key == 'file'):
+            if(value is None):
+                self._arrays['file_dir'][i] = -1
+                self._file_names[i] = ''
+                return
+            dirname,basename = os.path.split(value)
+            self._arrays['file_dir'][i] = self._categoricals['file_dir'].code(dirname)
+            self._file_names[i] = basename
+        else:
+            self._extra.setdefault(i,{})[key] = value
+
+    def del_info(self, i, key):
+        if(key == 'station'):
+            self._arrays['station'][i] = -2
+        else:
+            del self._extra[i][key]
+
+    def info_keys(self, i):
+        keys = ['lon','lat','date']
+        if(self._arrays['station'][i] != -2):
+            keys.append('station')
+        keys.extend(['file','sha1','type'])
+        keys.extend(self._extra.get(i,{}).keys())
+        return keys
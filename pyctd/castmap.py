@@ -0,0 +1,122 @@
+#
+# Map of cast and station positions for the GUI. Rendering the
+# coastlines with cartopy is slow (seconds for the 10m coastlines), the
+# rendered background (coastlines, gridlines, axes) is therefore cached
+# per coastline resolution, map extent and canvas size. The positions
+# of the casts and stations are animated marker layers drawn on top of
+# the cached background (blitting), i.e. adding or removing casts only
+# redraws the markers. cartopy is imported when a map is created.
+#
+import collections
+import logging
+import numpy as np
+
+logger = logging.getLogger('pyctd.castmap')
+
+# Number of cached backgrounds, e.g. for switching the resolution and zooming back
+background_cache_size = 8
+# The marker layers, drawn in this order
+marker_styles = collections.OrderedDict()
+marker_styles['casts']    = {'marker':'o','color':'C0','markersize':4,'linestyle':''}
+marker_styles['stations'] = {'marker':'^','color':'C3','markersize':7,'linestyle':''}
+
+
+def get_extent(lon, lat, margin = 0.5):
+    """ Returns the extent [lon0,lon1,lat0,lat1] of the positions with a margin [decdeg], None if there is no valid position
+    """
+    lon = np.asarray(lon, dtype = float)
+    lat = np.asarray(lat, dtype = float)
+    good = np.isfinite(lon) & np.isfinite(lat)
+    if not(good.any()):
+        return None
+
+    lon = lon[good]
+    lat = lat[good]
+    return [max(-180.0,lon.min() - margin),min(180.0,lon.max() + margin),max(-90.0,lat.min() - margin),min(90.0,lat.max() + margin)]
+
+
+class castMap(object):
+    """ A map with a cached background and blitted marker layers
+    Args:
+        figure: A matplotlib figure on a canvas supporting blitting, e.g. FigureCanvasQTAgg
+        res: The resolution of the coastlines, '110m', '50m' or '10m'
+        extent: [lon0,lon1,lat0,lat1] of the map, None for a global map
+    """
+    def __init__(self, figure, res = '110m', extent = None):
+        import cartopy.crs as ccrs
+        self.figure = figure
+        self.canvas = figure.canvas
+        self.res = res
+        self.crs = ccrs.PlateCarree()
+        self.axes = figure.add_subplot(111, projection = self.crs)
+        self._coastlines = self.axes.coastlines(resolution = res)
+        self.axes.gridlines(draw_labels = True)
+        if(extent is None):
+            self.axes.set_global()
+        else:
+            self.axes.set_extent(extent, crs = self.crs)
+
+        self.layers = collections.OrderedDict()
+        for name,style in marker_styles.items():
+            self.layers[name] = self.axes.plot([], [], transform = self.crs, animated = True, **style)[0]
+
+        self.nrender = 0 # Number of full renderings, e.g. to check the cache
+        self._backgrounds = collections.OrderedDict() # key: background
+        self._cid = self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _key(self):
+        limits = tuple(np.round(self.axes.get_xlim() + self.axes.get_ylim(), 9))
+        return (self.res,limits,self.canvas.get_width_height())
+
+    def _on_draw(self, event):
+        """ Caches the background after every full rendering (e.g. zoom, pan, resize) and draws the markers on top
+        """
+        self.nrender += 1
+        key = self._key()
+        self._backgrounds[key] = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._backgrounds.move_to_end(key)
+        while(len(self._backgrounds) > background_cache_size):
+            self._backgrounds.popitem(last = False)
+
+        self._draw_markers()
+
+    def _draw_markers(self):
+        for line in self.layers.values():
+            self.axes.draw_artist(line)
+
+    def update(self):
+        """ Redraws the markers on the cached background, the map is only rendered if no background is cached for the resolution, extent and size
+        """
+        background = self._backgrounds.get(self._key())
+        if(background is None):
+            self.canvas.draw()
+            return
+
+        self._backgrounds.move_to_end(self._key())
+        self.canvas.restore_region(background)
+        self._draw_markers()
+        self.canvas.blit(self.figure.bbox)
+        self.canvas.flush_events()
+
+    def set_markers(self, layer, lon, lat, update = True):
+        """ Sets the positions of a marker layer ('casts' or 'stations')
+        """
+        self.layers[layer].set_data(np.asarray(lon, dtype = float), np.asarray(lat, dtype = float))
+        if update:
+            self.update()
+
+    def set_resolution(self, res):
+        """ Changes the resolution of the coastlines, a cached background of the resolution is used if available
+        """
+        if(res == self.res):
+            return
+
+        self._coastlines.remove()
+        self._coastlines = self.axes.coastlines(resolution = res)
+        self.res = res
+        self.update()
+
+    def clear_cache(self):
+        """ Removes all cached backgrounds, e.g. after changing the background artists
+        """
+        self._backgrounds.clear()
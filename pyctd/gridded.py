@@ -0,0 +1,535 @@
+#
+# Gridded netCDF products of CTD casts. The casts around a station are
+# interpolated onto a common pressure axis in a pool of processes and
+# appended in chunks to a netCDF file with an unlimited time dimension,
+# i.e. the memory needed does not grow with the number of casts. This
+# generalizes the example script test/make_netcdf.py, it can be used as
+# a module or with the command line tool pyctd-gridded. netCDF4 is
+# imported when needed first.
+#
+import os
+import sys
+import logging
+import argparse
+import datetime
+import concurrent.futures
+import multiprocessing
+import numpy as np
+from pyctd import scan as pyctd_scan
+from pyctd import castdata
+from pyctd import profiles as pyctd_profiles
+from pyctd import session as pyctd_session
+from pyctd import batch as pyctd_batch
+from pyctd.summary import version
+
+logger = logging.getLogger('pyctd.gridded')
+
+# Defaults of make_netcdf.py
+p_int_default     = np.arange(0,245,0.25)
+variables_default = ['SA00','CT00','SA11','CT11']
+time_unit         = 'seconds since 1970-01-01 00:00:00'
+
+
+def _import_netcdf4():
+    try:
+        import netCDF4
+    except ImportError:
+        raise ImportError('netCDF4 is needed for gridded products, install it with: pip install netCDF4')
+
+    return netCDF4
+
+
+def _get_variable(cnv, name):
+    """ Returns the data and unit of the variable name of a parsed cast, the computed data (cdata) is preferred, None if not found
+    """
+    # The units of the raw data are keyed by the standard names (units_std, e.g. 'T0') or by the original column names (units, e.g. 't090C')
+    for data,unitdicts in ((getattr(cnv,'cdata',None),[getattr(cnv,'cunits',None)]),(getattr(cnv,'data',None),[getattr(cnv,'units_std',None),getattr(cnv,'units',None)])):
+        if((data is not None) and (name in data)):
+            unit = None
+            for units in unitdicts:
+                if((units is not None) and (units.get(name) is not None)):
+                    unit = units[name]
+                    break
+
+            return [np.asarray(data[name], dtype = float),unit]
+
+    return [None,None]
+
+
+def _interpolate_ragged_variable(p, v, ids, p_int, data_int, blocksize):
+    """ Interpolates one variable of all profiles into data_int (shape (nprofiles,len(p_int))), see interpolate_ragged()
+    """
+    nprof = len(data_int)
+    data_int[:] = np.nan
+    good = np.isfinite(p) & np.isfinite(v)
+    p = p[good]
+    v = v[good]
+    ids = ids[good]
+    if(len(p) == 0):
+        return
+
+    counts = np.bincount(ids, minlength = nprof)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    nonempty = counts > 0
+    pfirst = np.full(nprof,np.nan)
+    plast = np.full(nprof,np.nan)
+    pfirst[nonempty] = np.minimum.reduceat(p, starts[nonempty])
+    plast[nonempty] = np.maximum.reduceat(p, starts[nonempty])
+    # The profiles of a block are shifted apart by span, one np.interp call
+    # interpolates all of them, the grid points outside of the profiles are
+    # set to NaN afterwards
+    pmin = min(p.min(),p_int.min())
+    span = max(p.max(),p_int.max()) - pmin + 1.0
+    nblock = max(1,min(nprof,blocksize // max(1,len(p_int))))
+    key_int = (np.arange(nblock)[:,np.newaxis] * span + (p_int - pmin)[np.newaxis,:]).ravel()
+    for k0 in range(0,nprof,nblock):
+        k1 = min(nprof,k0 + nblock)
+        s0 = starts[k0]
+        s1 = ends[k1 - 1]
+        if(s1 - s0 < 2):
+            continue
+
+        key = (ids[s0:s1] - k0) * span + (p[s0:s1] - pmin)
+        vblock = v[s0:s1]
+        if not(np.all(np.diff(key) >= 0)):
+            isort = np.argsort(key, kind = 'stable')
+            key = key[isort]
+            vblock = vblock[isort]
+
+        block_int = data_int[k0:k1]
+        block_int[:] = np.interp(key_int[:(k1 - k0) * len(p_int)], key, vblock).reshape(k1 - k0,len(p_int))
+        outside = (counts[k0:k1,np.newaxis] < 2) | (p_int[np.newaxis,:] < pfirst[k0:k1,np.newaxis]) | (p_int[np.newaxis,:] > plast[k0:k1,np.newaxis])
+        np.copyto(block_int, np.nan, where = outside)
+
+
+def interpolate_ragged(p, values, offsets, p_int, blocksize = 1000000):
+    """ Interpolates many profiles onto a common pressure (or depth) axis at once. The profiles are given as ragged arrays, i.e. the samples of all profiles concatenated and the offsets of the profiles
+    Args:
+        p: The concatenated pressures of all profiles
+        values: The concatenated values, shape (nsamples,) or (nvariables,nsamples)
+        offsets: The start of every profile in p and values and the end of the last profile, i.e. nprofiles + 1 entries, e.g. np.concatenate(([0],np.cumsum(rowsizes)))
+        p_int: The target axis
+        blocksize: The number of grid points interpolated at once, limits the memory of the temporary arrays
+    Returns:
+        Masked array of shape (nprofiles,len(p_int)) or (nvariables,nprofiles,len(p_int)), NaN and masked outside of the profiles. Samples with NaN are ignored and the samples of a profile are sorted by pressure, profiles with less than two samples are masked completely. Equals np.interp(p_int, p, v, left=np.nan, right=np.nan) for every profile
+    """
+    p = np.asarray(p, dtype = float)
+    values = np.asarray(values, dtype = float)
+    offsets = np.asarray(offsets, dtype = int)
+    p_int = np.asarray(p_int, dtype = float)
+    single = (values.ndim == 1)
+    values = np.atleast_2d(values)
+    nprof = len(offsets) - 1
+    ids = np.repeat(np.arange(nprof), np.diff(offsets))
+    data_int = np.empty((len(values),nprof,len(p_int)))
+    for i,v in enumerate(values):
+        _interpolate_ragged_variable(p, v, ids, p_int, data_int[i], blocksize)
+
+    data_int = np.ma.MaskedArray(data_int, mask = np.isnan(data_int), copy = False)
+    if(single):
+        return data_int[0]
+    return data_int
+
+
+def read_profile(filename, ftype, variables, loglevel = logging.CRITICAL):
+    """ Parses a cast and returns the pressure and the variables
+    Args:
+        filename: The filename
+        ftype: 'CNV' or 'MRD'
+        variables: List of the variable names, e.g. ['SA00','CT00']
+    Returns:
+        List with the pressure, the values (array of shape (len(variables),len(p)), NaN for missing variables) and a list of the units, None if the cast has no pressure
+    """
+    cnv = pyctd_profiles.parse_profile(filename, ftype, loglevel = loglevel)
+    if(cnv is None):
+        return None
+
+    p,punit = _get_variable(cnv, 'p')
+    if(p is None):
+        return None
+
+    values = np.full((len(variables),len(p)),np.nan)
+    units = [None] * len(variables)
+    for i,name in enumerate(variables):
+        x,units[i] = _get_variable(cnv, name)
+        if(x is not None):
+            values[i] = x
+
+    return [p,values,units]
+
+
+def read_profiles(casts, variables, loglevel = logging.CRITICAL):
+    """ Parses a list of casts with read_profile(), this is the function called in the worker processes
+    Args:
+        casts: List of [filename,ftype]
+    Returns:
+        List with the result of read_profile() for every cast, None for invalid casts
+    """
+    profiles = []
+    for filename,ftype in casts:
+        try:
+            profile = read_profile(filename, ftype, variables, loglevel = loglevel)
+        except Exception as e:
+            logger.warning('Could not read file:' + filename + ' (' + str(e) + ')')
+            profile = None
+
+        profiles.append(profile)
+
+    return profiles
+
+
+def interpolate_casts(casts, p_int, variables, loglevel = logging.CRITICAL):
+    """ Parses a list of casts and interpolates the variables onto the pressure axis p_int, this is the function called in the worker processes
+    Args:
+        casts: List of [filename,ftype]
+        p_int: The pressure axis [dbar]
+        variables: List of the variable names, e.g. ['SA00','CT00']
+    Returns:
+        See interpolate_profiles()
+    """
+    return interpolate_profiles(read_profiles(casts, variables, loglevel = loglevel), p_int, variables)
+
+
+def interpolate_profiles(profiles, p_int, variables):
+    """ Interpolates profiles onto the pressure axis p_int with interpolate_ragged()
+    Args:
+        profiles: List of the results of read_profile() (or profileStore.read_profile()), None for invalid casts
+        p_int: The pressure axis [dbar]
+        variables: List of the variable names of the profiles
+    Returns:
+        List with the interpolated data (array of shape (len(variables),len(p_int))) and a list of the units for every cast, None if the cast has no pressure or none of the variables
+    """
+    valid = [profile for profile in profiles if profile is not None]
+    if(len(valid) == 0):
+        return [None] * len(profiles)
+
+    p = np.concatenate([profile[0] for profile in valid])
+    values = np.concatenate([profile[1] for profile in valid], axis = 1)
+    offsets = np.concatenate(([0],np.cumsum([len(profile[0]) for profile in valid])))
+    data_int = interpolate_ragged(p, values, offsets, p_int).filled(np.nan)
+    # Casts need at least one variable with two samples
+    good = np.isfinite(values) & np.isfinite(p)
+    ids = np.repeat(np.arange(len(valid)), np.diff(offsets))
+    ngood = np.asarray([np.bincount(ids, weights = g, minlength = len(valid)) for g in good]).reshape(len(variables),len(valid))
+    results = []
+    iprof = 0
+    for profile in profiles:
+        if(profile is None):
+            results.append(None)
+            continue
+
+        if(np.any(ngood[:,iprof] >= 2)):
+            results.append([data_int[:,iprof,:],profile[2]])
+        else:
+            results.append(None)
+        iprof += 1
+
+    return results
+
+
+def interpolate_cast(filename, ftype, p_int, variables, loglevel = logging.CRITICAL):
+    """ Parses a cast and interpolates the variables onto the pressure axis p_int, see interpolate_casts()
+    """
+    return interpolate_casts([[filename,ftype]], p_int, variables, loglevel = loglevel)[0]
+
+
+def select_casts(data, station = None, start_time = None, stop_time = None):
+    """ Returns the indices of the casts within the position and time criteria, sorted by date
+    Args:
+        data: castCatalogue
+        station: Position criterion as in scan.check_info_dict(), [lon,lat,radius] or [lon0,lat0,lon1,lat1]
+        start_time, stop_time: Time criteria as in scan.check_info_dict()
+    """
+    rows = data.time_index().query_by_date(start_time, stop_time)
+    if(station is not None):
+        rows = rows[np.isin(rows, data.spatial_index().query(station))]
+
+    return rows
+
+
+def _create_netcdf(netCDF4, filename, p_int, variables, attributes):
+    nc = netCDF4.Dataset(filename,'w')
+    nc.history = 'Created with pyctd (' + version + ') on ' + str(datetime.datetime.now(datetime.timezone.utc))
+    for key,value in attributes.items():
+        setattr(nc, key, value)
+
+    nc.createDimension('time',None)
+    nc.createDimension('p',len(p_int))
+    ncvar = nc.createVariable('time','f8',('time',))
+    ncvar.units = time_unit
+    ncvar = nc.createVariable('p','f8',('p',))
+    ncvar.units = 'dbar'
+    ncvar[:] = p_int
+    nc.createVariable('lon','f8',('time',))
+    nc.createVariable('lat','f8',('time',))
+    nc.createVariable('file',str,('time',))
+    for name in variables:
+        nc.createVariable(name,'f8',('time','p'))
+
+    return nc
+
+
+def _append_netcdf(nc, variables, block):
+    """ Appends a block of interpolated casts to the netCDF file
+    """
+    n0 = len(nc.dimensions['time'])
+    n1 = n0 + len(block['time'])
+    nc.variables['time'][n0:n1] = block['time']
+    nc.variables['lon'][n0:n1]  = block['lon']
+    nc.variables['lat'][n0:n1]  = block['lat']
+    nc.variables['file'][n0:n1] = np.asarray(block['file'], dtype = object)
+
+    data_int = np.ma.masked_invalid(np.asarray(block['data']))
+    for i,name in enumerate(variables):
+        ncvar = nc.variables[name]
+        ncvar[n0:n1,:] = data_int[:,i,:]
+        for units in block['units']:
+            if((units[i] is not None) and not('units' in ncvar.ncattrs())):
+                ncvar.units = units[i]
+
+
+def create_gridded_netcdf(data, filename, rows = None, p_int = p_int_default, variables = variables_default, nproc = None, chunksize = 100, foldername = None, attributes = None, executor = None, store = None, loglevel = logging.CRITICAL):
+    """ Interpolates casts onto a common pressure axis and writes them into a netCDF file
+    Args:
+        data: The data dictionary or a castCatalogue
+        filename: The filename of the netCDF file
+        rows: The indices of the casts, e.g. from select_casts(), None for all casts with a date
+        p_int: The pressure axis [dbar]
+        variables: The names of the variables (as in pycnv), casts without any of them are skipped
+        nproc: Number of worker processes, None uses all cores, 1 interpolates in the calling process
+        chunksize: Number of casts appended to the netCDF file at once
+        foldername: Folder of relative filenames, e.g. of summaries or sessions written with relative paths
+        attributes: Dictionary with global attributes of the netCDF file
+        executor: An existing concurrent.futures executor, e.g. to create the products of many stations
+        store: A ragged.profileStore, casts in the store are read from it instead of being parsed
+    Returns:
+        The number of casts written
+    """
+    netCDF4 = _import_netcdf4()
+    if not(isinstance(data, castdata.castCatalogue)):
+        data = castdata.castCatalogue(data)
+    if(rows is None): # All casts with a date
+        rows = select_casts(data)
+    if(nproc is None):
+        nproc = os.cpu_count()
+    if(attributes is None):
+        attributes = {}
+
+    p_int = np.asarray(p_int, dtype = float)
+    variables = list(variables)
+    nc = _create_netcdf(netCDF4, filename, p_int, variables, attributes)
+    ncasts = 0
+    own_executor = (executor is None) and (nproc > 1) and (len(rows) > chunksize)
+    if(own_executor):
+        # Spawn fresh interpreters, forking a process with a running GUI is not safe
+        mp_context = multiprocessing.get_context('spawn')
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers = nproc, mp_context = mp_context)
+
+    try:
+        # Every block of chunksize casts is distributed over the workers and written before the next block starts
+        for i0 in range(0,len(rows),chunksize):
+            rows_block = rows[i0:i0 + chunksize]
+            casts = []
+            for row in rows_block:
+                fname = data.get_info(row,'file')
+                if((foldername is not None) and not(os.path.isabs(fname))):
+                    fname = os.path.normpath(os.path.join(foldername,fname))
+                casts.append([fname,data.get_info(row,'type')])
+
+            results = [None] * len(casts)
+            iparse = list(range(len(casts)))
+            if(store is not None):
+                sha1s = [data.get_info(row,'sha1') for row in rows_block]
+                istore = [i for i,sha1 in enumerate(sha1s) if sha1 in store]
+                profiles = [store.read_profile(sha1s[i], variables) for i in istore]
+                for i,result in zip(istore,interpolate_profiles(profiles, p_int, variables)):
+                    results[i] = result
+                iparse = [i for i,sha1 in enumerate(sha1s) if sha1 not in store]
+
+            casts_parse = [casts[i] for i in iparse]
+            if(len(casts_parse) == 0):
+                results_parse = []
+            elif(executor is None):
+                results_parse = interpolate_casts(casts_parse, p_int, variables, loglevel)
+            else:
+                nsub = max(1,len(casts_parse) // (nproc * 2))
+                subchunks = [casts_parse[i:i + nsub] for i in range(0,len(casts_parse),nsub)]
+                results_parse = []
+                for r in executor.map(interpolate_casts, subchunks, [p_int] * len(subchunks), [variables] * len(subchunks), [loglevel] * len(subchunks)):
+                    results_parse.extend(r)
+
+            for i,result in zip(iparse,results_parse):
+                results[i] = result
+
+            block = {'time':[],'lon':[],'lat':[],'file':[],'data':[],'units':[]}
+            for row,cast,result in zip(rows_block,casts,results):
+                if(result is None):
+                    continue
+                block['time'].append(data.datenum[row] / 1e6)
+                block['lon'].append(data.lon[row])
+                block['lat'].append(data.lat[row])
+                block['file'].append(cast[0])
+                block['data'].append(result[0])
+                block['units'].append(result[1])
+
+            if(len(block['time']) > 0):
+                _append_netcdf(nc, variables, block)
+                ncasts += len(block['time'])
+
+            logger.info('Interpolated ' + str(min(i0 + chunksize,len(rows))) + ' of ' + str(len(rows)) + ' casts')
+    finally:
+        nc.close()
+        if(own_executor):
+            executor.shutdown()
+
+    logger.info('Wrote ' + str(ncasts) + ' casts to file:' + filename)
+    return ncasts
+
+
+def create_station_netcdfs(data, stations, radius, output_folder = '.', start_time = None, stop_time = None, nproc = None, **kwargs):
+    """ Creates a gridded netCDF file for every station, named after the station
+    Args:
+        data: The data dictionary or a castCatalogue
+        stations: List of dictionaries with the keys 'name', 'lon' and 'lat', e.g. from batch.load_stations()
+        radius: The radius [m] around the stations
+        output_folder: The folder of the netCDF files
+        start_time, stop_time: Time criteria as in scan.check_info_dict()
+        nproc: Number of worker processes, None uses all cores
+        kwargs: Further arguments of create_gridded_netcdf()
+    Returns:
+        Dictionary with the station names as keys and [filename,number of casts] as values, stations without valid casts are skipped (no file is written)
+    """
+    if not(isinstance(data, castdata.castCatalogue)):
+        data = castdata.castCatalogue(data)
+    if(nproc is None):
+        nproc = os.cpu_count()
+
+    products = {}
+    executor = None
+    if(nproc > 1):
+        mp_context = multiprocessing.get_context('spawn')
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers = nproc, mp_context = mp_context)
+
+    try:
+        for station in stations:
+            rows = select_casts(data, station = [station['lon'],station['lat'],radius], start_time = start_time, stop_time = stop_time)
+            if(len(rows) == 0):
+                logger.info('No casts found for station ' + station['name'])
+                continue
+
+            filename = os.path.join(output_folder, station['name'] + '.nc')
+            attributes = {'station':station['name'],'station_lon':station['lon'],'station_lat':station['lat'],'station_radius':radius}
+            ncasts = create_gridded_netcdf(data, filename, rows = rows, nproc = nproc, attributes = attributes, executor = executor, **kwargs)
+            if(ncasts == 0): # No valid cast, e.g. all files are missing
+                logger.warning('No valid casts found for station ' + station['name'] + ', removing file:' + filename)
+                os.remove(filename)
+                continue
+
+            products[station['name']] = [filename,ncasts]
+    finally:
+        if(executor is not None):
+            executor.shutdown()
+
+    return products
+
+
+def main():
+    logging.basicConfig(stream=sys.stderr, level=logging.WARNING)
+    desc = 'Creates gridded netCDF files of the CTD casts around stations, the casts are interpolated onto a common pressure axis. Example: pyctd-gridded -d fahrten.2019/ --station TF0271 --radius 5000 --variables SA00 CT00 oxy0'
+    parser = argparse.ArgumentParser(description=desc)
+    source = parser.add_mutually_exclusive_group(required = True)
+    source.add_argument('--data_folder', '-d', nargs = '+', help='The data path(es) to be searched')
+    source.add_argument('--session', '-s', help='A session file (pyctd-batch --format session or the GUI) with the casts')
+    parser.add_argument('--session_folder', default = None, help='The folder of the relative filenames in the session file, default the data folder stored in the session (pyctd-batch) or else the folder of the session file')
+    stations = parser.add_mutually_exclusive_group(required = True)
+    stations.add_argument('--station', nargs = '+', help='The name(s) of the station(s)')
+    stations.add_argument('--all_stations', action = 'store_true', help='Create a netCDF file for every station of the station file')
+    parser.add_argument('--station_file', default = os.path.join(os.path.dirname(__file__),'stations','iow_stations.yaml'), help='The station yaml file')
+    parser.add_argument('--radius', type = float, default = 5000, help='Radius [m] around the stations')
+    parser.add_argument('--start', default = None, help='Casts need to be after start time, format: "YYYY-mm-dd HH:MM:SS"')
+    parser.add_argument('--stop', default = None, help='Casts need to be before stop time, format: "YYYY-mm-dd HH:MM:SS"')
+    parser.add_argument('--pressure', nargs = 3, type = float, default = [0,245,0.25], metavar = ('p min','p max','dp'), help='The pressure axis [dbar], default 0 245 0.25')
+    parser.add_argument('--variables', nargs = '+', default = variables_default, help='The variables (as named in pycnv), default ' + ' '.join(variables_default))
+    parser.add_argument('--output_folder', '-o', default = '.', help='The folder of the netCDF files, the files are named after the stations')
+    parser.add_argument('--nproc', '-n', type = int, default = None, help='Number of processes, default all cores')
+    parser.add_argument('--chunksize', type = int, default = 100, help='Number of casts appended to the netCDF file at once')
+    parser.add_argument('--index', action = 'store_true', help='Use the persistent scan index, only new or changed files are parsed')
+    parser.add_argument('--index_file', default = None, help='The filename of the scan index')
+    parser.add_argument('--store', default = None, help='A profile store (pyctd-batch --format profiles), casts in the store are read from it instead of being parsed')
+    parser.add_argument('--verbose', '-v', action = 'count', help='Add -v to increase verbosity')
+    parser.add_argument('--version', action = 'version', version = '%(prog)s ' + str(version))
+    args = parser.parse_args()
+
+    if(args.verbose == None):
+        loglevel = logging.WARNING
+    elif(args.verbose == 1):
+        loglevel = logging.INFO
+    else:
+        loglevel = logging.DEBUG
+
+    logger.setLevel(loglevel)
+    pyctd_scan.logger.setLevel(loglevel)
+    try:
+        _import_netcdf4()
+    except ImportError as e:
+        logger.critical(str(e))
+        sys.exit(1)
+
+    start_time = None
+    stop_time  = None
+    if(args.start is not None):
+        [good_time,start_time] = pyctd_scan.str_to_time(args.start)
+        if(good_time == False):
+            logger.critical('Could not parse start time:' + args.start)
+            sys.exit(1)
+    if(args.stop is not None):
+        [good_time,stop_time] = pyctd_scan.str_to_time(args.stop)
+        if(good_time == False):
+            logger.critical('Could not parse stop time:' + args.stop)
+            sys.exit(1)
+
+    stations_all = pyctd_batch.load_stations(args.station_file)
+    if(args.all_stations):
+        stations = stations_all
+    else:
+        stations = [s for s in stations_all if s['name'] in args.station]
+        missing = set(args.station) - set(s['name'] for s in stations)
+        if(len(missing) > 0):
+            logger.critical('Could not find the station(s) ' + ', '.join(sorted(missing)) + ' in station file ' + args.station_file)
+            sys.exit(1)
+
+    foldername = None
+    if(args.session is not None):
+        [data,meta] = pyctd_session.load_session(args.session)
+        foldername = args.session_folder
+        if(foldername is None):
+            foldername = meta.get('foldername')
+        if(foldername is None):
+            foldername = os.path.dirname(os.path.abspath(args.session))
+        logger.info('Relative filenames are in folder:' + foldername)
+    else:
+        logger.info('Searching in folder(s):' + str(args.data_folder))
+        data = pyctd_scan.get_all_valid_files(args.data_folder, start_time = start_time, stop_time = stop_time, nproc = args.nproc, loglevel = loglevel, use_index = args.index, index_file = args.index_file)
+        data = castdata.castCatalogue(data)
+
+    store = None
+    if(args.store is not None):
+        from pyctd import ragged as pyctd_ragged
+        store = pyctd_ragged.profileStore(args.store)
+        logger.info('Using ' + str(len(store)) + ' casts of profile store:' + args.store)
+
+    p_int = np.arange(args.pressure[0],args.pressure[1],args.pressure[2])
+    os.makedirs(args.output_folder, exist_ok = True)
+    try:
+        products = create_station_netcdfs(data, stations, args.radius, output_folder = args.output_folder, start_time = start_time, stop_time = stop_time, nproc = args.nproc, p_int = p_int, variables = args.variables, chunksize = args.chunksize, foldername = foldername, store = store)
+    finally:
+        if(store is not None):
+            store.close()
+
+    for name,(filename,ncasts) in products.items():
+        logger.info(name + ': ' + str(ncasts) + ' casts written to ' + filename)
+
+
+if __name__ == '__main__':
+    main()
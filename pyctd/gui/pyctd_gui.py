@@ -1,208 +1,37 @@
-from pycnv import pycnv, pycnv_sum_folder
-from pysst import pymrd as pymrd
-from pysst import pymrd_sum_folder as pymrd_sum_folder
+from pyctd import scan as pyctd_scan
+from pyctd import castdata
+from pyctd import summary as pyctd_summary
+from pyctd import session as pyctd_session
+from pyctd import profiles as pyctd_profiles
+from pyctd import watch as pyctd_watch
+from pyctd.scan import str_to_time
+from pyctd.summary import create_geojson_summary, create_yaml_summary, create_csv_catalogue_summary
+from pyctd.summary import version
 import sys
 import os
 import logging
-import argparse
-import time
+import threading
 import locale
-import yaml
-import pkg_resources
 import datetime
 import pytz
-import copy
-import pkg_resources
-import re
 import numpy as np
-import geojson
-from pytz import timezone
 
-# Get the version
-version_file = pkg_resources.resource_filename('pyctd','VERSION')
+logger = logging.getLogger('pyctd.gui')
+
 # Get the ships
-ship_file = pkg_resources.resource_filename('pyctd', 'ships/ships.yaml')
+ship_file = os.path.join(os.path.dirname(os.path.dirname(__file__)),'ships','ships.yaml')
 sfile = open(ship_file, 'r')
-ships = yaml.safe_load(sfile)
+ships = pyctd_summary.load_yaml(sfile)
 sfile.close()
 
-with open(version_file) as version_f:
-   version = version_f.read().strip()
-
 try:
     from PyQt5 import QtCore, QtGui, QtWidgets
 except:
     from qtpy import QtCore, QtGui, QtWidgets
 
-# For the map plotting
-import pylab as pl
-import cartopy
-import cartopy.crs as ccrs
-from cartopy.io import shapereader
-from cartopy.mpl.gridliner import LONGITUDE_FORMATTER, LATITUDE_FORMATTER    
-import matplotlib
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
-from matplotlib.figure import Figure
-
-
-def str_to_time(timestr):
-    """ Converts a timestr to a datetime object
-    Args:
-        timestr: The timestr
-    Returns:
-        List with first entry a boolean if the conversion was sucessfull and a second entry the datetime object
-    """
-    good_time = False
-    try:
-        d = datetime.datetime.strptime(timestr,'%Y-%m-%d %H:%M:%S')
-        d = d.replace(tzinfo=timezone('UTC'))
-        good_time = True
-    except Exception as e:
-        print(e)
-        d = None
-
-    print('d',d)
-    return [good_time,d]
-        
-
-def create_geojson_summary(summary,filename,name='CTD',properties='all'):
-    """ Creates a geojson summary
-    """
-    print('Create geojson summary in file:' + filename)
-    crs = { "type": "name", "properties": { "name": "urn:ogc:def:crs:OGC:1.3:CRS84" } } # Reference coordinate system
-
-    #['date','lon','lat','station','campaign','file','comment']
-    if(properties == 'all'):
-        try:
-            properties = summary['casts'][0].keys()
-        except:
-            properties = []
-
-        try:
-            properties_stations = summary['stations'][0].keys()
-        except:
-            properties_stations = []
+# The plotting modules (matplotlib, cartopy) and the file readers
+# (pycnv, pysst) are imported when they are used first
 
-        try:
-            properties_transects = summary['transects'].keys()
-        except:
-            properties_transects = []                        
-
-    
-    filename_ctd       = filename.replace('.geojson','') + '_CTD_casts.geojson'
-    filename_stations  = filename.replace('.geojson','') + '_stations.geojson'
-    filename_transects = filename.replace('.geojson','') + '_transects.geojson'    
-    
-    if(len(properties) > 0):
-        features = []
-        print(properties)
-        for i,d in enumerate(summary['casts']):
-            print(d)
-            csv_line = ''
-            lon = d['lon']
-            lat = d['lat']
-            p = geojson.Point((lon, lat))
-            prop = {}
-            for o in properties:
-                if(o in d):
-                    prop[o] = d[o]
-                else: # Property not there, e.g. station not existing in MRD files.
-                    pass
-
-            feature = geojson.Feature(geometry=p, properties=prop)
-            features.append(feature)
-
-        featurecol = geojson.FeatureCollection(features,name=name,crs=crs)
-        with open(filename_ctd, 'w') as outfile:
-            geojson.dump(featurecol, outfile)
-
-        outfile.close()
-
-    if(len(properties_stations) > 0):
-        features_stations = []
-        for i,d in enumerate(summary['stations']):
-            csv_line = ''
-            lon = d['lon']
-            lat = d['lat']
-            p = geojson.Point((lon, lat))
-            prop = {}
-            for o in properties_stations:
-                prop[o] = d[o]
-
-            feature = geojson.Feature(geometry=p, properties=prop)
-            features_stations.append(feature)
-            
-        featurecol_stations = geojson.FeatureCollection(features_stations,name='stations',crs=crs)
-        with open(filename_stations, 'w') as outfile:
-            geojson.dump(featurecol_stations, outfile)
-            
-        outfile.close()
-
-    if(len(properties_transects) > 0):
-        features_transects = []
-        #self.tran['name']          
-        #self.tran['numbers']       
-        #self.tran['station_names'] 
-        #self.tran['station_lon']   
-        #self.tran['station_lat']   
-        for i,d in enumerate(summary['transects']['name']):
-            lon   = summary['transects']['station_lon'][i]
-            lat   = summary['transects']['station_lat'][i]
-            ps = []            
-            for k in range(len(lon)):
-                ps.append((lon[k], lat[k]))
-
-            gl = geojson.LineString(ps)                          
-            prop = {'name':summary['transects']['name'][i]}
-
-            feature = geojson.Feature(geometry=gl, properties=prop)
-            features_transects.append(feature)
-            
-        featurecol_transects = geojson.FeatureCollection(features_transects,name='transects',crs=crs)
-        with open(filename_transects, 'w') as outfile:
-            geojson.dump(featurecol_transects, outfile)
-            
-        outfile.close()        
-
-
-def create_yaml_summary(summary,filename):
-    """ Creates a yaml summary
-    """
-    if ('.yaml' not in filename):
-        filename += '.yaml'
-        
-    print('Create yaml summary in file:' + filename)
-    with open(filename, 'w') as outfile:
-        yaml.dump(summary, outfile, default_flow_style=False)
-
-
-def create_csv_summary(summary,filename,order=['date','lon','lat','station','file','comment']):
-    """ Creates a csv summary
-    """
-    print('Create csv summary in file:' + filename)
-    print(summary)
-    try:
-        outfile = open(filename, 'w')
-    except Exception as e:
-        return
-    
-    csv_line = ''
-    for o in order:
-        csv_line += str(o) +','
-
-    csv_line = csv_line[:-2]
-    outfile.write(csv_line)
-    for i,d in enumerate(summary['casts']):
-        csv_line = ''
-        for o in order:
-            csv_line += str(d[o]) +','
-
-        csv_line = csv_line[:-2] + '\n'
-        outfile.write(csv_line)        
-        #print(csv_line)
-
-    outfile.close()
 
 class get_valid_files(QtCore.QThread):
     """ A thread to search a directory for valid files
@@ -213,9 +42,12 @@ class get_valid_files(QtCore.QThread):
        start_time: type datetime
        stop_time: type datetime
        station: 
+       nproc: Number of processes used to parse the files, None uses all cores
+       use_index: Use the persistent scan index, only new or changed files are parsed
+       skip_files: Files that are not parsed (already scanned by a stopped search)
     """
     search_status = QtCore.pyqtSignal(object,int,int,str) # Create a custom signal
-    def __init__(self, foldername, search_seabird = True, search_mrd = True, start_time = None, stop_time = None, station = None):
+    def __init__(self, foldername, search_seabird = True, search_mrd = True, start_time = None, stop_time = None, station = None, nproc = None, use_index = True, skip_files = None):
         QtCore.QThread.__init__(self)
         self.foldername = foldername
         self.search_seabird = search_seabird
@@ -223,6 +55,10 @@ class get_valid_files(QtCore.QThread):
         self.start_time = start_time
         self.stop_time  = stop_time
         self.station    = station
+        self.nproc      = nproc
+        self.use_index  = use_index
+        self.skip_files = skip_files
+        self.stop_event = threading.Event()
         #print('Search seabird',self.search_seabird)        
         #print('Search MRD',self.search_mrd)
         
@@ -230,8 +66,6 @@ class get_valid_files(QtCore.QThread):
         self.wait()
 
     def run(self):
-        # your logic here
-        #pycnv_sum_folder.get_all_valid_files(foldername,status_function=self.status_function)
         #https://stackoverflow.com/questions/39658719/conflict-between-pyqt5-and-datetime-datetime-strptime
         locale.setlocale(locale.LC_TIME, "C")
         
@@ -245,21 +79,225 @@ class get_valid_files(QtCore.QThread):
         else:
             stop_time = None            
             
-        data_tmp = pycnv_sum_folder.get_all_valid_files(self.foldername,loglevel = logging.WARNING,status_function=self.status_function, station = self.station,start_time = start_time,stop_time=stop_time)
-        self.data = data_tmp
-        if(self.search_mrd):
-            #print('Search for SST files')
-            data_tmp = pymrd_sum_folder.get_all_valid_files(self.foldername,loglevel = logging.WARNING,status_function=self.status_function)
-            if True:
-                for key in self.data.keys():
-                    self.data[key].extend(data_tmp[key])
-        
+        self.data = pyctd_scan.get_all_valid_files(self.foldername, search_seabird = self.search_seabird, search_mrd = self.search_mrd, start_time = start_time, stop_time = stop_time, station = self.station, nproc = self.nproc, status_function = self.status_function, loglevel = logging.WARNING, use_index = self.use_index, stop_event = self.stop_event, skip_files = self.skip_files)
         
     def status_function(self,i,nf,f):
         self.search_status.emit(self,i,nf,f)
 
+    def stop(self):
+        """ Stops the search after the current file
+        """
+        self.stop_event.set()
+
 
-class casttableWidget(QtWidgets.QTableWidget,):
+class watch_folder(QtCore.QThread):
+    """ A thread polling a folder watcher once and parsing the new files
+    Arguments:
+       watcher: A watch.folderWatcher
+       search_args: Dictionary with the criteria of scan.scan_files(), i.e. start_time, stop_time, station, nproc and use_index
+    """
+    def __init__(self, watcher, search_args):
+        QtCore.QThread.__init__(self)
+        self.watcher = watcher
+        self.search_args = dict(search_args)
+        self.data = None
+
+    def __del__(self):
+        self.wait()
+
+    def run(self):
+        locale.setlocale(locale.LC_TIME, "C")
+        for key in ['start_time','stop_time']:
+            if(type(self.search_args.get(key)) != datetime.datetime):
+                self.search_args[key] = None
+
+        files = self.watcher.poll()
+        self.data = pyctd_scan.scan_files(files, loglevel = logging.WARNING, **self.search_args)
+
+
+class castTableModel(QtCore.QAbstractTableModel):
+    """ A table model for the casts, the cells are read on demand from
+    the data dictionary, i.e. only the visible rows are created by the view.
+    The model can show a subset of the casts (set_rows()), the rows of
+    the view are then mapped to the rows of the data dictionary
+    Arguments:
+       columns: Dictionary with the column names as keys and the column index as values
+       data: The data dictionary with the casts
+       comment_column: The name of the editable comment column
+    """
+    def __init__(self, columns, data = None, comment_column = 'comment'):
+        QtCore.QAbstractTableModel.__init__(self)
+        self.columns = columns
+        self.column_names = sorted(self.columns.keys(), key = lambda k: self.columns[k])
+        self.comment_column = comment_column
+        if(data is None):
+            data = {}
+        self.castdata = data
+        self.rows = None # The shown rows of the data dictionary, None for all
+        self._nrows = self._get_nrows()
+
+    def _get_nrows(self):
+        if(self.rows is not None):
+            return len(self.rows)
+        try:
+            return len(self.castdata['info_dict'])
+        except:
+            return 0
+
+    def set_castdata(self, data):
+        """ Sets a new data dictionary and resets the model, all casts are shown
+        """
+        self.beginResetModel()
+        self.castdata = data
+        self.rows = None
+        self._nrows = self._get_nrows()
+        self.endResetModel()
+
+    def set_rows(self, rows):
+        """ Shows only the casts with the (sorted) indices rows of the data dictionary, None shows all casts
+        """
+        self.beginResetModel()
+        self.rows = None if rows is None else np.asarray(rows, dtype = int)
+        self._nrows = self._get_nrows()
+        self.endResetModel()
+
+    def data_row(self, row):
+        """ Returns the row in the data dictionary of the row in the view
+        """
+        if(self.rows is None):
+            return row
+        return int(self.rows[row])
+
+    def view_rows(self, rows):
+        """ Returns the sorted rows of the view of the rows in the data dictionary, rows not shown are dropped
+        """
+        rows = np.unique(np.asarray(rows, dtype = int))
+        if(self.rows is None):
+            return rows
+        ind = np.searchsorted(self.rows, rows)
+        shown = ind < len(self.rows)
+        ind = ind[shown]
+        return ind[self.rows[ind] == rows[shown]]
+
+    def update_nrows(self):
+        """ Informs the view about casts that were appended to the data dictionary
+        """
+        if(self.rows is not None): # The shown casts are set with set_rows()
+            return
+
+        nrows = self._get_nrows()
+        if(nrows > self._nrows):
+            self.beginInsertRows(QtCore.QModelIndex(), self._nrows, nrows - 1)
+            self._nrows = nrows
+            self.endInsertRows()
+        elif(nrows < self._nrows):
+            self.set_castdata(self.castdata)
+
+    def rows_changed(self, rows, columns = None):
+        """ Emits dataChanged for the given rows, consecutive rows are combined into one block
+        Arguments:
+           rows: List of the changed rows
+           columns: List of the names of the changed columns, if None all columns are updated
+        """
+        if(columns is None):
+            col0 = 0
+            col1 = len(self.column_names) - 1
+        else:
+            icols = [self.columns[c] for c in columns]
+            col0 = min(icols)
+            col1 = max(icols)
+
+        rows = [int(r) for r in self.view_rows(rows)]
+        if(len(rows) == 0):
+            return
+
+        row0 = rows[0]
+        for i in range(1,len(rows) + 1):
+            if((i == len(rows)) or (rows[i] != rows[i-1] + 1)):
+                self.dataChanged.emit(self.index(row0,col0),self.index(rows[i-1],col1))
+                if(i < len(rows)):
+                    row0 = rows[i]
+
+    def rowCount(self, parent = QtCore.QModelIndex()):
+        if(parent.isValid()):
+            return 0
+        return self._nrows
+
+    def columnCount(self, parent = QtCore.QModelIndex()):
+        if(parent.isValid()):
+            return 0
+        return len(self.column_names)
+
+    def headerData(self, section, orientation, role = QtCore.Qt.DisplayRole):
+        if(orientation == QtCore.Qt.Horizontal):
+            if(role == QtCore.Qt.DisplayRole):
+                key = self.column_names[section]
+                return key[0].upper() + key[1:]
+            elif(role == QtCore.Qt.TextAlignmentRole):
+                return QtCore.Qt.AlignHCenter
+        elif(role == QtCore.Qt.DisplayRole):
+            return str(self.data_row(section) + 1)
+
+        return None
+
+    def flags(self, index):
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if(self.column_names[index.column()] == self.comment_column):
+            flags |= QtCore.Qt.ItemIsEditable
+
+        return flags
+
+    def data(self, index, role = QtCore.Qt.DisplayRole):
+        if(not(index.isValid()) or (role not in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole))):
+            return None
+
+        return self.cell_text(self.data_row(index.row()),self.column_names[index.column()])
+
+    def setData(self, index, value, role = QtCore.Qt.EditRole):
+        """ Only the comment is editable
+        """
+        if(not(index.isValid()) or (role != QtCore.Qt.EditRole)):
+            return False
+        if(self.column_names[index.column()] != self.comment_column):
+            return False
+
+        self.castdata['pyctd_comment'][self.data_row(index.row())] = str(value)
+        self.dataChanged.emit(index,index)
+        return True
+
+    def cell_text(self, row, column):
+        """ Returns the text of the cell in row (of the data dictionary) and the column with the name column
+        """
+        info_dict = self.castdata['info_dict'][row]
+        if(column == 'date'):
+            date = info_dict['date']
+            if(date is None):
+                return ''
+            return date.strftime('%Y-%m-%d %H:%M:%S')
+        elif(column == 'lon'):
+            return "{:6.3f}".format(info_dict['lon'])
+        elif(column == 'lat'):
+            return "{:6.3f}".format(info_dict['lat'])
+        elif(column == 'station (File)'): # Station as in the file
+            return info_dict.get('station','')
+        elif(column == 'station (Custom)'): # Custom station as defined in pyctd
+            field = 'pyctd_station'
+        elif(column == 'campaign'):
+            field = 'pyctd_campaign'
+        elif(column == 'comment'):
+            field = 'pyctd_comment'
+        elif(column == 'file'):
+            return info_dict['file']
+        else:
+            return ''
+
+        value = self.castdata[field][row]
+        if(value is None):
+            return ''
+        return str(value)
+
+
+class casttableWidget(QtWidgets.QTableView,):
     plot_signal = QtCore.pyqtSignal(object,str) # Create a custom signal for plotting
     station_signal = QtCore.pyqtSignal(object) # Create a custom signal for adding the cast to station
     remstation_signal = QtCore.pyqtSignal(object) # Create a custom signal for removing the cast to station
@@ -271,7 +309,7 @@ class casttableWidget(QtWidgets.QTableWidget,):
         """ Changing the contextmenu if pyctd is used within qgis
         """
         self.within_qgis = within_qgis
-        QtWidgets.QTableWidget.__init__(self)
+        QtWidgets.QTableView.__init__(self)
         if self.within_qgis:
             self.addlayerAction = QtWidgets.QAction('Add to layer', self)        
 
@@ -297,22 +335,24 @@ class casttableWidget(QtWidgets.QTableWidget,):
         self.menu.addAction(stationRemAction)
         self.menu.addAction(campaignAction)
         self.menu.addAction(campaignRemAction)                
-        #self.menu.addAction(plotAction)
-        #self.menu.addAction(remplotAction)
-        #self.menu.addAction(plotcastAction)
+        self.menu.addAction(plotAction)
+        self.menu.addAction(remplotAction)
+        self.menu.addAction(plotcastAction)
         if self.within_qgis:
             self.menu.addAction(self.addlayerAction)            
             
         self.menu.popup(QtGui.QCursor.pos())
         self.menu.show()
         # Get selected rows (as information for plotting etc.)
-        self.rows = set() # Needed for "unique" list
-        for idx in self.selectedIndexes():
-            self.rows.add(idx.row())
-
-        self.rows = list(self.rows)
+        self.rows = self.selected_rows()
         #action = self.menu.exec_(QtGui.QCursor.pos())#self.mapToGlobal(event))
 
+    def selected_rows(self, reverse = False):
+        """ Returns the sorted rows of the data dictionary of the selected casts
+        """
+        rows = set(self.model().data_row(index.row()) for index in self.selectedIndexes())
+        return sorted(rows,reverse=reverse)
+
     def station(self):
         """ Signal for station
         """
@@ -346,7 +386,7 @@ class casttableWidget(QtWidgets.QTableWidget,):
         self.plot_signal.emit(row_list,'rem from map') # Emit the signal with the row list and the command
 
     def plot_cast(self):
-        self.plot_signal.emit(self.currentRow(),'plot cast') # Emit the signal with the row list and the command
+        self.plot_signal.emit(self.model().data_row(self.currentIndex().row()),'plot cast') # Emit the signal with the row list and the command
 
 
 
@@ -364,8 +404,41 @@ class mainWidget(QtWidgets.QWidget):
         self.folder_button.clicked.connect(self.folder_clicked)
         self.search_button = QtWidgets.QPushButton('Search for CTD files')
         self.search_button.clicked.connect(self.search_clicked)
+        self.resume_button = QtWidgets.QPushButton('Resume search')
+        self.resume_button.clicked.connect(self.search_resume_clicked)
+        self.resume_button.setEnabled(False)
+        self._search_resume = None # Information about a stopped search
+        # Watching the datafolder for new files
+        self.watch_button = QtWidgets.QPushButton('Watch datafolder')
+        self.watch_button.setCheckable(True)
+        self.watch_button.toggled.connect(self.watch_toggled)
+        self._watch_label = QtWidgets.QLabel('')
+        self._watch_interval = 30 # Seconds between two polls of the datafolder
+        self._watch_timer = QtCore.QTimer(self)
+        self._watch_timer.timeout.connect(self.watch_poll)
+        self._watcher = None
+        self._watch_thread = None
         self.clear_table_button = QtWidgets.QPushButton('Clear table')
         self.clear_table_button.clicked.connect(self.clear_table_clicked)
+        # Filter of the loaded casts by time
+        self._time_filter = None # [start_time,stop_time] of the filter, None shows all casts
+        self.time_filter_widget = QtWidgets.QWidget()
+        time_filter_layout = QtWidgets.QHBoxLayout(self.time_filter_widget)
+        time_filter_layout.setContentsMargins(0,0,0,0)
+        self._time_filter_start = QtWidgets.QLineEdit('0001-01-01 00:00:00')
+        self._time_filter_stop  = QtWidgets.QLineEdit('3001-01-01 00:00:00')
+        self._time_filter_button = QtWidgets.QPushButton('Filter by time')
+        self._time_filter_button.clicked.connect(self.time_filter_clicked)
+        self._time_filter_clear_button = QtWidgets.QPushButton('Show all')
+        self._time_filter_clear_button.clicked.connect(self.time_filter_clear_clicked)
+        self._time_filter_label = QtWidgets.QLabel('')
+        time_filter_layout.addWidget(QtWidgets.QLabel('Start'))
+        time_filter_layout.addWidget(self._time_filter_start)
+        time_filter_layout.addWidget(QtWidgets.QLabel('Stop'))
+        time_filter_layout.addWidget(self._time_filter_stop)
+        time_filter_layout.addWidget(self._time_filter_button)
+        time_filter_layout.addWidget(self._time_filter_clear_button)
+        time_filter_layout.addWidget(self._time_filter_label)
 
         # The table with the casts
         self.file_table_widget = QtWidgets.QWidget() # The widget housing the file table and the clear button
@@ -376,7 +449,6 @@ class mainWidget(QtWidgets.QWidget):
         self.file_table.remstation_signal.connect(self.remstation_signal) # Custom signal for adding casts to station
         self.file_table.campaign_signal.connect(self.campaign_signal) # Custom signal for adding casts to campaign
         self.file_table.remcampaign_signal.connect(self.remcampaign_signal) # Custom signal for adding casts to campaign       
-        self.file_table.cellChanged.connect(self.table_changed)
         
         self.columns                     = {}
         self.columns['date']             = 0
@@ -389,21 +461,13 @@ class mainWidget(QtWidgets.QWidget):
         self.columns['file']             = 7
         #self.columns['map']              = 8
         self._ncolumns = len(self.columns.keys())      
-        # TODO, create column names according to the data structures
-        self.file_table.setColumnCount(self._ncolumns)
-
-        header_labels = [None]*self._ncolumns
-        for key in self.columns.keys():
-            ind = self.columns[key]
-            header_labels[ind] = key[0].upper() + key[1:]
-
-        self.file_table.setHorizontalHeaderLabels(header_labels)            
-        for i in range(self._ncolumns):
-            self.file_table.horizontalHeaderItem(i).setTextAlignment(QtCore.Qt.AlignHCenter)
-            
+        # The model reads the cells directly from self.data
+        self.file_model = castTableModel(self.columns)
+        self.file_table.setModel(self.file_model)
         #self.file_table.horizontalHeader().setStretchLastSection(True)
         self.file_table.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAsNeeded)
         self.file_table.resizeColumnsToContents()        
+        self.file_table_widget_layout.addWidget(self.time_filter_widget)
         self.file_table_widget_layout.addWidget(self.file_table)
         self.file_table_widget_layout.addWidget(self.clear_table_button)
 
@@ -427,12 +491,16 @@ class mainWidget(QtWidgets.QWidget):
         self.layout.addWidget(self.folder_dialog,0,0)
         self.layout.addWidget(self.folder_button,0,1)
         self.layout.addWidget(self.search_button,1,0)
-        self.layout.addWidget(self.tabs,2,0,1,2)
+        self.layout.addWidget(self.resume_button,1,1)
+        self.layout.addWidget(self._watch_label,2,0)
+        self.layout.addWidget(self.watch_button,2,1)
+        self.layout.addWidget(self.tabs,3,0,1,2)
         #self.layout.addWidget(,3,0)
 
 
         self.FLAG_REL_PATH = True
         self.dpi       = 100
+        self._prefetch_nstation = 10 # The number of casts of the same station parsed in advance when plotting
         # Create data fields
         self._init_data_fields()
 
@@ -474,6 +542,16 @@ class mainWidget(QtWidgets.QWidget):
         self._search_opt_pos.addItem('None')        
         self._search_opt_pos.addItem('Station with radius')
         self._search_opt_pos.addItem('Rectangle')                
+        # Number of processes used for parsing the files
+        self._search_opt_nproc = QtWidgets.QSpinBox(self.search_opts_widget)
+        self._search_opt_nproc.setMinimum(1)
+        self._search_opt_nproc.setMaximum(max(1,os.cpu_count()))
+        self._search_opt_nproc.setValue(max(1,os.cpu_count()))
+        self._search_opt_index = QtWidgets.QCheckBox('Use scan index (parse only new or changed files)')
+        self._search_opt_index.toggle() # put in on
+        self._search_opt_select = QtWidgets.QPushButton('Select loaded casts at position')
+        self._search_opt_select.clicked.connect(self.select_loaded_clicked)
+        self._search_opt_select_label = QtWidgets.QLabel('') # Result of the selection
         layout.addWidget(self._search_opt_cnv,0,0,1,2)
         layout.addWidget(self._search_opt_mrd,1,0,1,2)
         layout.addWidget( QtWidgets.QLabel('Start time'),2,0)      
@@ -498,6 +576,11 @@ class mainWidget(QtWidgets.QWidget):
         layout.addWidget(self._search_opt_lonc1,10,1)        
         layout.addWidget(self._search_opt_latc0,10,2)
         layout.addWidget(self._search_opt_latc1,10,3)                
+        layout.addWidget( QtWidgets.QLabel('Number of processes'),11,0)
+        layout.addWidget(self._search_opt_nproc,11,1)
+        layout.addWidget(self._search_opt_index,12,0,1,4)
+        layout.addWidget(self._search_opt_select,13,0,1,2)
+        layout.addWidget(self._search_opt_select_label,13,2,1,2)
         
         self.search_opts_widget.hide()
 
@@ -527,7 +610,12 @@ class mainWidget(QtWidgets.QWidget):
     def _init_data_fields(self):
         """ Create a fresh init of all necessary data fields
         """
-        self.data = {}
+        self.data = castdata.castCatalogue()
+        self._sha1_index = None # sha1 -> row in self.data, see compare_and_merge_data
+        self._map_rows = np.zeros(0,dtype=int) # The casts shown on the map
+        self._scanned_files = set() # All files looked at by the searches, not parsed again by the folder watcher
+        if(self._map_is_open()):
+            self.castmap.set_markers('casts',[],[])
         self._cruise_fields = {}        
 
     def _check_search_input(self):
@@ -571,15 +659,24 @@ class mainWidget(QtWidgets.QWidget):
         self.save['save_geojson'].clicked.connect(self.save_geojson)        
         self.save['save_csv'] = QtWidgets.QPushButton('Export casts to csv')
         self.save['save_csv'].clicked.connect(self.save_csv)
+        self.save['save_parquet'] = QtWidgets.QPushButton('Export casts to parquet')
+        self.save['save_parquet'].clicked.connect(self.save_parquet)
 
         self.save['save'].setMaximumWidth(width)
         self.save['load'] = QtWidgets.QPushButton('Load')
         self.save['load'].clicked.connect(self.load_file)
+        self.save['save_session'] = QtWidgets.QPushButton('Save session')
+        self.save['save_session'].clicked.connect(self.save_session)
+        self.save['load_session'] = QtWidgets.QPushButton('Load session')
+        self.save['load_session'].clicked.connect(self.load_session)
         self.save['layout'] = QtWidgets.QGridLayout(self.save['widget'])
         self.save['layout'].addWidget(self.save['save'],0,0)
         self.save['layout'].addWidget(self.save['save_geojson'],1,0)                
         self.save['layout'].addWidget(self.save['save_csv'],2,0)        
         self.save['layout'].addWidget(self.save['load'],3,0)
+        self.save['layout'].addWidget(self.save['save_session'],4,0)
+        self.save['layout'].addWidget(self.save['load_session'],5,0)
+        self.save['layout'].addWidget(self.save['save_parquet'],6,0)
         
     def setup_campaign_widget(self):
         self.camp = {}
@@ -681,6 +778,12 @@ class mainWidget(QtWidgets.QWidget):
         self.stations['tran_rem_button'].clicked.connect(self.rem_transect)        
         # Connect the table to functions
         self.stations['station_table'].cellChanged.connect(self.station_table_cellchanged)
+        self.stations['assign_button'] = QtWidgets.QPushButton('Assign casts to nearest station')
+        self.stations['assign_button'].clicked.connect(self.assign_nearest_station_clicked)
+        self.stations['assign_radius'] = QtWidgets.QLineEdit('1000')
+        self.stations['assign_radius'].setToolTip('Maximum distance [m] between cast and station')
+        self.stations['assign_overwrite'] = QtWidgets.QCheckBox('Overwrite assigned')
+        self.stations['assign_label'] = QtWidgets.QLabel('') # Result of the assignment
         self.stations['station_widget'] = QtWidgets.QWidget()
         self.stations['station_layout'] = QtWidgets.QGridLayout(self.stations['station_widget'])
         layout = self.stations['station_layout']
@@ -692,6 +795,11 @@ class mainWidget(QtWidgets.QWidget):
         layout.addWidget(self.stations['tran_add_button'],2,0)
         layout.addWidget(self.stations['tran_name_le'],2,1)
         layout.addWidget(self.stations['tran_rem_button'],2,2)
+        layout.addWidget(self.stations['assign_button'],3,0)
+        layout.addWidget(QtWidgets.QLabel('Radius [m]'),3,1)
+        layout.addWidget(self.stations['assign_radius'],3,2)
+        layout.addWidget(self.stations['assign_overwrite'],3,3)
+        layout.addWidget(self.stations['assign_label'],4,0,1,4)
 
     def _populate_ship_combo(self):
         """ Populates the ship combo with known ships found in yaml file
@@ -808,15 +916,6 @@ class mainWidget(QtWidgets.QWidget):
         table.setHorizontalHeaderItem(ncolumns-1,headeritem)
         table.resizeColumnsToContents()
         
-    def table_changed(self,row,column):
-        """ If a comment was added, add it to the comment list and update the data dictionary
-        """
-        if column == self.columns['comment']:
-            comstr = self.file_table.item(row,column).text()
-            self.data['pyctd_comment'][row] = comstr
-            # Resize the columns
-            self.file_table.resizeColumnsToContents()
-
     def _campaign_rem(self):
         rows = sorted(set(index.row() for index in
                           self.camp['table'].selectedIndexes()),reverse=True)
@@ -845,6 +944,50 @@ class mainWidget(QtWidgets.QWidget):
             #data_str = str(table.data(index).toString())
             self.station_combo.addItem(station_name)
 
+        if(self._map_is_open()):
+            self.map_update_stations()
+
+    def _station_positions(self):
+        """ Returns lists of the names, longitudes and latitudes of the stations in the station table, stations without a valid position are skipped
+        """
+        table = self.stations['station_table']
+        names = []
+        lons  = []
+        lats  = []
+        for row in range(table.rowCount()):
+            try:
+                lon = float(table.item(row,1).text())
+                lat = float(table.item(row,2).text())
+            except (AttributeError, ValueError): # Stations without a position
+                continue
+
+            names.append(table.item(row,0).text())
+            lons.append(lon)
+            lats.append(lat)
+
+        return [names,lons,lats]
+
+    def assign_nearest_station_clicked(self):
+        """ Assigns all casts to the nearest station of the station table within the radius
+        """
+        try:
+            radius = float(self.stations['assign_radius'].text())
+        except ValueError:
+            self.stations['assign_label'].setText('Enter a valid radius')
+            return
+
+        [names,lons,lats] = self._station_positions()
+        if(len(names) == 0):
+            self.stations['assign_label'].setText('No stations with a position')
+            return
+
+        overwrite = self.stations['assign_overwrite'].isChecked()
+        istation = self.data.assign_nearest_station(names, lons, lats, radius, overwrite = overwrite)
+        result = 'Assigned ' + str((istation >= 0).sum()) + ' of ' + str(self.data.ncasts) + ' casts to stations'
+        logger.info(result)
+        self.stations['assign_label'].setText(result)
+        self.update_table_cells(np.where(istation >= 0)[0], ['station (Custom)'])
+
     def _station_add(self,name,lon,lat,comment='',update_table=True):
         itemname = QtWidgets.QTableWidgetItem(name)
         itemlon = QtWidgets.QTableWidgetItem(str(lon))
@@ -956,7 +1099,7 @@ class mainWidget(QtWidgets.QWidget):
                     self.data['pyctd_station'][i] = tran
 
 
-        self.update_table()        
+        self.update_table_cells(self._station_rows, ['station (Custom)'])
         self._station_widget.hide()
 
     def _station_cancel(self):
@@ -987,33 +1130,84 @@ class mainWidget(QtWidgets.QWidget):
         self._map_options_widget.show()
 
     def plot_change_settings(self):
-        print('Changing settings')
         self._map_settings['res'] = self._map_options_res_combo.currentText()
-        print(self._map_settings['res'])
-        #self._map_settings =
-        self._map_zoom_x = self.axes.get_xlim()
-        self._map_zoom_y = self.axes.get_ylim()
-        # Plotting the map
-        try:
-            self.figwidget.close()
-        except:
-            pass
-        
-        self.plot_map()
+        logger.info('Changing the coastline resolution to ' + self._map_settings['res'])
+        # Only the coastlines of the open map are exchanged, the zoom and the markers are kept
+        if(self._map_is_open()):
+            self.castmap.set_resolution(self._map_settings['res'])
+
+    def _map_is_open(self):
+        return (getattr(self,'castmap',None) is not None) and self.map_figwidget.isVisible()
+
+    def plot_map(self, extent = None):
+        """ Opens the map window with the casts added to the map and the stations of the station table, an open map is reused
+        Arguments:
+           extent: [lon0,lon1,lat0,lat1] of a new map, None for a global map
+        """
+        if(self._map_is_open()):
+            self.map_figwidget.raise_()
+            return
+
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+        from matplotlib.figure import Figure
+        from pyctd import castmap as pyctd_castmap
+        self.map_fig       = Figure(dpi=self.dpi)
+        self.map_figwidget = QtWidgets.QWidget()
+        self.map_figwidget.setWindowTitle('pyctd map')
+        self.map_canvas    = FigureCanvas(self.map_fig)
+        self.map_canvas.setParent(self.map_figwidget)
+        plotLayout = QtWidgets.QVBoxLayout()
+        plotLayout.addWidget(self.map_canvas)
+        self.map_figwidget.setLayout(plotLayout)
+        self.map_mpl_toolbar = NavigationToolbar(self.map_canvas, self.map_figwidget)
+        plotLayout.addWidget(self.map_mpl_toolbar)
+        map_opts_button = QtWidgets.QPushButton('Map options')
+        map_opts_button.clicked.connect(self.plot_map_opts)
+        plotLayout.addWidget(map_opts_button)
+        self.castmap = pyctd_castmap.castMap(self.map_fig, res = self._map_settings['res'], extent = extent)
+        self.axes = self.castmap.axes
+        self.castmap.set_markers('casts', self.data.lon[self._map_rows], self.data.lat[self._map_rows], update = False)
+        self.map_update_stations(update = False)
+        self.map_figwidget.show()
+
+    def map_update_stations(self, update = True):
+        """ Shows the stations of the station table on the map
+        """
+        [names,lons,lats] = self._station_positions()
+        self.castmap.set_markers('stations', lons, lats, update = update)
+
+    def add_positions_to_map(self, rows):
+        """ Adds the casts in rows to the map, only the markers are redrawn
+        """
+        self._map_rows = np.union1d(self._map_rows, np.asarray(rows, dtype = int))
+        if not(self._map_is_open()):
+            # The map is opened around the casts
+            from pyctd import castmap as pyctd_castmap
+            self.plot_map(extent = pyctd_castmap.get_extent(self.data.lon[self._map_rows], self.data.lat[self._map_rows]))
+        else:
+            self.castmap.set_markers('casts', self.data.lon[self._map_rows], self.data.lat[self._map_rows])
+
+    def rem_positions_from_map(self, rows):
+        """ Removes the casts in rows from the map, only the markers are redrawn
+        """
+        self._map_rows = np.setdiff1d(self._map_rows, np.asarray(rows, dtype = int))
+        if(self._map_is_open()):
+            self.castmap.set_markers('casts', self.data.lon[self._map_rows], self.data.lat[self._map_rows])
         
     def remstation_signal(self,rows):
         #print('Removing stations')
         for row in rows:        
             self.data['pyctd_station'][row] = None
 
-        self.update_table()
+        self.update_table_cells(rows, ['station (Custom)'])
 
     def remcampaign_signal(self,rows):
         #print('Removing stations')
         for row in rows:        
             self.data['pyctd_campaign'][row] = None
 
-        self.update_table()        
+        self.update_table_cells(rows, ['campaign'])
         
     def station_signal(self,rows):
         """ Adding a station to the casts
@@ -1053,8 +1247,7 @@ class mainWidget(QtWidgets.QWidget):
             stations += station_name + ' ; '
 
         stations = stations[:-3] # remove last ;
-        rows = sorted(set(index.row() for index in
-                          self.file_table.selectedIndexes()),reverse=True)
+        rows = self.file_table.selected_rows(reverse=True)
 
 
         for row in rows:
@@ -1064,7 +1257,7 @@ class mainWidget(QtWidgets.QWidget):
             #self.file_table.setItem(row,self.columns['station (Custom)'], item)                        
 
 
-        self.update_table()
+        self.update_table_cells(rows, ['station (Custom)'])
 
 
     def campaign_signal(self,rows):
@@ -1103,8 +1296,7 @@ class mainWidget(QtWidgets.QWidget):
             campaigns += campaign_name + ' ; '
 
         campaigns = campaigns[:-3] # remove last ;
-        rows = sorted(set(index.row() for index in
-                          self.file_table.selectedIndexes()),reverse=True)
+        rows = self.file_table.selected_rows(reverse=True)
 
 
         for row in rows:
@@ -1114,7 +1306,7 @@ class mainWidget(QtWidgets.QWidget):
             #self.file_table.setItem(row,self.columns['station (Custom)'], item)                        
 
 
-        self.update_table()        
+        self.update_table_cells(rows, ['campaign'])
 
         
     def plot_signal(self,rows,command):
@@ -1125,33 +1317,148 @@ class mainWidget(QtWidgets.QWidget):
         elif(command == 'plot cast'):
             self.plot_cast(rows)            
 
+    def cast_filename(self,row):
+        """ Returns the filename of the cast in row, relative filenames (see FLAG_REL_PATH) are relative to self.foldername
+        """
+        filename = self.data['info_dict'][row]['file']
+        if not(os.path.isabs(filename)):
+            filename = os.path.normpath(os.path.join(self.foldername,filename))
+
+        return filename
+
     def plot_cast(self,row):
-        """ Plots a single CTD cast
+        """ Plots a single CTD cast, the parsed casts are cached (pyctd.profiles)
         """
-        filename = self.data['files'][row]
-        cnv = pycnv(filename)
-        self.cast_fig       = Figure(dpi=self.dpi)
-        self.cast_figwidget = QtWidgets.QWidget()
-        self.cast_figwidget.setWindowTitle('pyctd cast')
-        self.cast_canvas    = FigureCanvas(self.cast_fig)
-        self.cast_canvas.setParent(self.cast_figwidget)
-        plotLayout = QtWidgets.QVBoxLayout()
-        plotLayout.addWidget(self.cast_canvas)
-        self.cast_figwidget.setLayout(plotLayout)
-        self.cast_canvas.setMinimumSize(self.cast_canvas.size()) # Prevent to make it smaller than the original size
-        self.cast_mpl_toolbar = NavigationToolbar(self.cast_canvas, self.cast_figwidget)
-        plotLayout.addWidget(self.cast_mpl_toolbar)
-        
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+        from matplotlib.figure import Figure
+        info_dict = self.data['info_dict'][row]
+        filename = self.cast_filename(row)
+        error = None
+        try:
+            cnv = pyctd_profiles.get_profile(filename, ftype = info_dict['type'], sha1 = info_dict['sha1'])
+        except Exception as e:
+            error = 'Could not read file:' + filename + ' (' + str(e) + ')'
+        else:
+            if(cnv is None):
+                error = 'Could not read file:' + filename
+            elif not(hasattr(cnv,'plot')):
+                error = 'Plotting of ' + str(info_dict['type']) + ' files is not supported'
+
+        if(error is not None):
+            logger.warning(error)
+            msg = QtWidgets.QMessageBox()
+            msg.setIcon(QtWidgets.QMessageBox.Warning)
+            msg.setInformativeText(error)
+            retval = msg.exec_()
+            return
+
+        # Reuse an open cast window, e.g. when stepping through the casts
+        if((getattr(self,'cast_figwidget',None) is None) or not(self.cast_figwidget.isVisible())):
+            self.cast_fig       = Figure(dpi=self.dpi)
+            self.cast_figwidget = QtWidgets.QWidget()
+            self.cast_canvas    = FigureCanvas(self.cast_fig)
+            self.cast_canvas.setParent(self.cast_figwidget)
+            plotLayout = QtWidgets.QVBoxLayout()
+            plotLayout.addWidget(self.cast_canvas)
+            self.cast_figwidget.setLayout(plotLayout)
+            self.cast_canvas.setMinimumSize(self.cast_canvas.size()) # Prevent to make it smaller than the original size
+            self.cast_mpl_toolbar = NavigationToolbar(self.cast_canvas, self.cast_figwidget)
+            plotLayout.addWidget(self.cast_mpl_toolbar)
+            self.cast_prev_button = QtWidgets.QPushButton('Previous cast')
+            self.cast_prev_button.clicked.connect(lambda: self.plot_cast_step(-1))
+            self.cast_next_button = QtWidgets.QPushButton('Next cast')
+            self.cast_next_button.clicked.connect(lambda: self.plot_cast_step(1))
+            buttonLayout = QtWidgets.QHBoxLayout()
+            buttonLayout.addWidget(self.cast_prev_button)
+            buttonLayout.addWidget(self.cast_next_button)
+            plotLayout.addLayout(buttonLayout)
+        else:
+            self.cast_fig.clear()
+
+        self.cast_figwidget.setWindowTitle('pyctd cast ' + os.path.basename(filename))
+        self.cast_plot_row = row
         cnv.plot(figure=self.cast_fig)
         self.cast_canvas.draw()        
         #for ax in cnv.axes[0]['axes']:
         #    ax.draw()
         self.cast_figwidget.show()
+        self.prefetch_casts(row)
+
+    def plot_cast_step(self,step):
+        """ Plots the cast step rows after (or before) the plotted cast in the cast table
+        """
+        rows = self.file_model.view_rows([self.cast_plot_row])
+        if(len(rows) == 0): # The plotted cast is not in the table anymore
+            return
+
+        view_row = rows[0] + step
+        if((view_row >= 0) and (view_row < self.file_model.rowCount())):
+            self.plot_cast(self.file_model.data_row(view_row))
+
+    def prefetch_casts(self,row):
+        """ Parses the casts in the background which are likely plotted after the cast in row, i.e. the neighbours in the cast table and the casts of the same station
+        """
+        nrows = self.file_model.rowCount()
+        rows = []
+        view_rows = self.file_model.view_rows([row])
+        if(len(view_rows) > 0):
+            for step in (1,-1,2,-2):
+                view_row = view_rows[0] + step
+                if((view_row >= 0) and (view_row < nrows)):
+                    rows.append(self.file_model.data_row(view_row))
+
+        # The casts of the same station (custom station if given), the closest in time first
+        for column in ('pyctd_station','station'):
+            code = self.data.codes(column)[row]
+            if(code >= 0):
+                same = np.where(self.data.codes(column) == code)[0]
+                dt = np.abs(self.data.datenum[same] - self.data.datenum[row])
+                rows.extend(same[np.argsort(dt, kind = 'stable')][:self._prefetch_nstation + 1])
+                break
+
+        casts = []
+        for r in rows:
+            if(r == row):
+                continue
+            info_dict = self.data['info_dict'][r]
+            casts.append([self.cast_filename(r),info_dict['type'],info_dict['sha1']])
+
+        pyctd_profiles.prefetch(casts)
 
     def clear_table_clicked(self):
         # Remove all data fields and start fresh
         self._init_data_fields()
-        self.file_table.setRowCount(0)
+        self._time_filter = None
+        self.file_model.set_castdata(self.data)
+        self._time_filter_label.setText('')
+
+    def time_filter_clicked(self):
+        """ Shows only the loaded casts between the start and stop time in the cast table
+        """
+        good_start,start_time = str_to_time(self._time_filter_start.text())
+        good_stop,stop_time = str_to_time(self._time_filter_stop.text())
+        if not(good_start and good_stop):
+            self._time_filter_label.setText('Enter valid times (YYYY-mm-dd HH:MM:SS)')
+            return
+
+        self._time_filter = [start_time,stop_time]
+        self.apply_time_filter()
+
+    def time_filter_clear_clicked(self):
+        self._time_filter = None
+        self.apply_time_filter()
+
+    def apply_time_filter(self):
+        """ Applies the time filter to the cast table with the time index of the casts, the table is not rebuilt
+        """
+        if(self._time_filter is None):
+            self.file_model.set_rows(None)
+            self._time_filter_label.setText('')
+        else:
+            rows = self.data.time_index().query(self._time_filter[0],self._time_filter[1])
+            self.file_model.set_rows(rows)
+            self._time_filter_label.setText(str(len(rows)) + ' of ' + str(self.data.ncasts) + ' casts')
         
     def folder_clicked(self):
         foldername = str(QtWidgets.QFileDialog.getExistingDirectory(self, "Select Directory"))
@@ -1161,234 +1468,260 @@ class mainWidget(QtWidgets.QWidget):
     def search_opts_clicked(self):
         self.search_opts_widget.show()
 
+    def _search_opt_get_station(self):
+        """ Returns the position criterion of the search options, None, [lon,lat,radius] or [lon0,lat0,lon1,lat1]
+        """
+        if 'None' in self._search_opt_pos.currentText():
+            print('No position search')
+            station = None
+        elif 'Station' in self._search_opt_pos.currentText():
+            print('Station position search')                
+            # TODO, this has to be parsed with pylatlon
+            lon     = float(self._search_opt_lonc.text())
+            lat     = float(self._search_opt_latc.text())
+            radius  = float(self._search_opt_radius.text())                
+            station = [lon,lat,radius]
+        elif 'Rectangle' in self._search_opt_pos.currentText():
+            print('Rectangle position search')
+            # TODO, this has to be parsed with pylatlon                
+            lon0     = float(self._search_opt_lonc0.text())
+            lat0     = float(self._search_opt_latc0.text())
+            lon1     = float(self._search_opt_lonc1.text())
+            lat1     = float(self._search_opt_latc1.text())
+            station = [lon0,lat0,lon1,lat1]
+
+        return station
+
+    def select_loaded_clicked(self):
+        """ Selects the already loaded casts fulfilling the position criterion of the search options in the cast table, the spatial index of the casts is used instead of searching the folder again
+        """
+        try:
+            station = self._search_opt_get_station()
+        except ValueError:
+            self._search_opt_select_label.setText('Enter a valid position')
+            return
+
+        if(station is None):
+            rows = np.arange(self.data.ncasts)
+        else:
+            rows = self.data.spatial_index().query(station)
+
+        result = 'Selected ' + str(len(rows)) + ' casts'
+        logger.info(result)
+        self._search_opt_select_label.setText(result)
+        self.select_rows(rows)
+        self.tabs.setCurrentWidget(self.file_table_widget)
+
+    def select_rows(self, rows):
+        """ Selects the rows in the cast table, blocks of consecutive rows are selected at once
+        Arguments:
+           rows: Array of the rows in the data dictionary, rows not shown in the table are ignored
+        """
+        selection = QtCore.QItemSelection()
+        rows = self.file_model.view_rows(rows)
+        if(len(rows) > 0):
+            breaks = np.where(np.diff(rows) != 1)[0]
+            starts = np.concatenate(([0],breaks + 1))
+            ends = np.concatenate((breaks,[len(rows) - 1]))
+            for i0,i1 in zip(starts,ends):
+                selection.select(self.file_model.index(int(rows[i0]),0),self.file_model.index(int(rows[i1]),self._ncolumns - 1))
+
+        self.file_table.selectionModel().select(selection,QtCore.QItemSelectionModel.ClearAndSelect)
+        if(len(rows) > 0):
+            self.file_table.scrollTo(self.file_model.index(int(rows[0]),0))
+
+    def _get_search_args(self):
+        """ Returns a dictionary with the arguments of the search from the search options
+        """
+        # Check for the positional thresholds
+        station = self._search_opt_get_station()
+        print('Station',station)
+        # Check for the time thresholds
+        start_time = str_to_time(self._search_opt_start.text())[1]
+        stop_time = str_to_time(self._search_opt_end.text())[1]
+        search_args = {'search_seabird':self._search_opt_cnv.isChecked(),'search_mrd':self._search_opt_mrd.isChecked(),'start_time':start_time,'stop_time':stop_time,'station':station,'nproc':self._search_opt_nproc.value(),'use_index':self._search_opt_index.isChecked()}
+        return search_args
+
     def search_clicked(self):
         foldername = self.folder_dialog.text()
         self.foldername = self.folder_dialog.text()
         if(os.path.exists(foldername)):
-            self.status_widget       = QtWidgets.QWidget()
-            self.status_layout       = QtWidgets.QGridLayout(self.status_widget)
-            self._progress_bar       = QtWidgets.QProgressBar(self.status_widget)
-            #self._thread_stop_button = QtWidgets.QPushButton('Stop')
-            #self._thread_stop_button.clicked.connect(self.search_stop)
-            self._f_widget           = QtWidgets.QLabel('Filename')
-            self._f_widget.setWordWrap(True)
-            self.status_layout.addWidget(QtWidgets.QLabel('Loading files'),0,0)            
-            self.status_layout.addWidget(self._progress_bar,1,0)
-            self.status_layout.addWidget(self._f_widget,2,0)
-            #self.status_layout.addWidget(self._thread_stop_button,2,0)
-            self.status_widget.show()
-            # Check for the positional thresholds
-            print('Hallo!',self._search_opt_pos.currentText())
-            if 'None' in self._search_opt_pos.currentText():
-                print('No position search')
-                station = None
-            elif 'Station' in self._search_opt_pos.currentText():
-                print('Station position search')                
-                # TODO, this has to be parsed with pylatlon
-                lon     = float(self._search_opt_lonc.text())
-                lat     = float(self._search_opt_latc.text())
-                radius  = float(self._search_opt_radius.text())                
-                station = [lon,lat,radius]
-            elif 'Rectangle' in self._search_opt_pos.currentText():
-                print('Rectangle position search')
-                # TODO, this has to be parsed with pylatlon                
-                lon0     = float(self._search_opt_lonc0.text())
-                lat0     = float(self._search_opt_latc0.text())
-                lon1     = float(self._search_opt_lonc1.text())
-                lat1     = float(self._search_opt_latc1.text())
-                station = [lon0,lat0,lon1,lat1]
-
-            print('Station',station)
-            # Check for the time thresholds
-            start_time = str_to_time(self._search_opt_start.text())[1]
-            stop_time = str_to_time(self._search_opt_end.text())[1]
-            self.search_thread = get_valid_files(foldername,search_seabird=self._search_opt_cnv.isChecked(), search_mrd = self._search_opt_mrd.isChecked(),start_time=start_time,stop_time = stop_time,station=station)
-            self.search_thread.start()
-            self.search_thread.search_status.connect(self.status_function)
-            self.search_thread.finished.connect(self.search_finished)
-            #pycnv_sum_folder.get_all_valid_files(foldername,status_function=self.status_function)
+            search_args = self._get_search_args()
+            # A new search, forget a stopped one
+            self._search_resume = None
+            self.resume_button.setEnabled(False)
+            self.resume_button.setToolTip('')
+            self._start_search(foldername,search_args)
         else:
             print('Enter a valid folder')
 
+    def _start_search(self, foldername, search_args, skip_files = None):
+        """ Opens the status widget and starts the search thread
+        """
+        self.status_widget       = QtWidgets.QWidget()
+        self.status_layout       = QtWidgets.QGridLayout(self.status_widget)
+        self._progress_bar       = QtWidgets.QProgressBar(self.status_widget)
+        self._thread_stop_button = QtWidgets.QPushButton('Stop')
+        self._thread_stop_button.clicked.connect(self.search_stop)
+        self._f_widget           = QtWidgets.QLabel('Filename')
+        self._f_widget.setWordWrap(True)
+        self.status_layout.addWidget(QtWidgets.QLabel('Loading files'),0,0)            
+        self.status_layout.addWidget(self._progress_bar,1,0)
+        self.status_layout.addWidget(self._f_widget,2,0)
+        self.status_layout.addWidget(self._thread_stop_button,3,0)
+        self.status_widget.show()
+        self._search_args = search_args
+        self._search_foldername = foldername
+        self._search_skip_files = skip_files
+        self.search_button.setEnabled(False)
+        self.search_thread = get_valid_files(foldername,skip_files=skip_files,**search_args)
+        self.search_thread.search_status.connect(self.status_function)
+        self.search_thread.finished.connect(self.search_finished)
+        self.search_thread.start()
+
     def search_stop(self):
-        """This doesnt work, if a stop is needed it the search function needs
-        to have the functionality to be interrupted
+        """ Stops the search after the file currently parsed, the casts found
+        so far are added to the table and the search can be resumed
+        """
+        self._thread_stop_button.setEnabled(False)
+        self._f_widget.setText('Stopping search ...')
+        self.search_thread.stop()
 
+    def search_resume_clicked(self):
+        """ Resumes a stopped search, the already scanned files are skipped
         """
-        self.search_thread.terminate()
-        #self.status_widget.close()
+        if(self._search_resume is None):
+            return
+
+        self.resume_button.setEnabled(False)
+        self._start_search(self._search_resume['foldername'],self._search_resume['search_args'],skip_files=self._search_resume['scanned_files'])
         
     def search_finished(self):
         self.status_widget.close()
+        self.search_button.setEnabled(True)
         data = self.search_thread.data
+        if(data['stopped']):
+            scanned_files = set(data['scanned_files'])
+            if(self._search_skip_files is not None):
+                scanned_files.update(self._search_skip_files)
+
+            self._search_resume = {'foldername':self._search_foldername,'search_args':self._search_args,'scanned_files':scanned_files}
+            self.resume_button.setEnabled(True)
+            result = 'Search stopped after ' + str(len(scanned_files)) + ' files'
+            logger.info(result)
+            self.resume_button.setToolTip(result + ', resume parses only the remaining files')
+        else:
+            self._search_resume = None
+            self.resume_button.setEnabled(False)
+            self.resume_button.setToolTip('')
+
+        self._scanned_files.update(data['scanned_files'])
         self.data = self.compare_and_merge_data(self.data,data)
         print('Search finished')
         #print(data)
         if(self.FLAG_REL_PATH):
-            for i,c in enumerate(self.data['info_dict']):
-                fname = c['file']
-                fname = fname.replace(self.foldername,'.') # TODO, check if filesep is needed for windows
-                self.data['info_dict'][i]['file'] = fname
+            self.data.replace_in_files(self.foldername)
 
         self.create_table()
         self.update_table()
 
-    def compare_and_merge_data(self, data, data_new, new_station=True, new_comment=True):
-        """ Checks in data field if new data is already there, if not it adds it, otherwise it rejects it, it also add pyctd specific data fields, if they not already exist
+    def watch_toggled(self, checked):
+        """ Starts or stops watching the datafolder, the folder is polled every self._watch_interval seconds and only new files are parsed and appended to the cast table
         """
-        print('Compare and merge')
-        try:
-            data_new['pyctd_plot_map']
-        except:
-            data_new['pyctd_plot_map'] = [[] for i in range(len(data_new['info_dict'])) ] # Plotting information
-
-        try:
-            data_new['pyctd_station']
-        except:
-            data_new['pyctd_station'] = [None] * len(data_new['info_dict']) # station information
-
-        try:
-            data_new['pyctd_campaign']
-        except:
-            data_new['pyctd_campaign'] = [None] * len(data_new['info_dict']) # station information            
-            
-        try:
-            data_new['pyctd_comment']
-        except:
-            data_new['pyctd_comment'] = [None] * len(data_new['info_dict']) # station information
-            
-        # Check if we have data at all
-        try:
-            data['info_dict']
-        except:
-            return data_new
-        
-        for i_new,c_new in enumerate(data_new['info_dict']):
-            FLAG_SAME = False
-            for i,c in enumerate(data['info_dict']):
-                if c['sha1'] == c_new['sha1']: # Same file
-                    FLAG_SAME = True
-                    if(new_station):
-                        if(data_new['pyctd_station'][i_new] is not None):
-                            data['pyctd_station'][i] = data_new['pyctd_station'][i_new]
-                            
-                    if(new_comment):
-                        if(data_new['pyctd_comment'][i_new] is not None):
-                            data['pyctd_comment'][i] = data_new['pyctd_comment'][i_new]
-
-                    break
-                
-            if(FLAG_SAME == False):
-                data['info_dict'].append(data_new['info_dict'][i_new])
-                data['pyctd_plot_map'].append(data_new['pyctd_plot_map'][i_new])                
-                data['pyctd_station'].append(data_new['pyctd_station'][i_new])
-                data['pyctd_comment'].append(data_new['pyctd_comment'][i_new])
+        if(checked == False):
+            self._watch_timer.stop()
+            self._watcher = None
+            self._watch_label.setText('')
+            return
 
+        foldername = self.folder_dialog.text()
+        if not(os.path.exists(foldername)):
+            self.watch_button.setChecked(False)
+            self._watch_label.setText('Enter a valid folder')
+            return
 
-        return data
-        
-    def create_table(self):
-        # Add additional information (if its not there already)
+        self.foldername = foldername
+        search_args = self._get_search_args()
+        # The files of the loaded casts and the files already looked at by a search (invalid or not matching the criteria) are not parsed again
+        known_files = [self.cast_filename(row) for row in range(self.data.ncasts)]
+        known_files.extend(self._scanned_files)
+        self._watcher = pyctd_watch.folderWatcher(foldername, search_seabird = search_args.pop('search_seabird'), search_mrd = search_args.pop('search_mrd'), known_files = known_files)
+        self._watch_search_args = search_args
+        self._watch_label.setText('Watching ' + foldername)
+        self._watch_timer.start(int(self._watch_interval * 1000))
+        self.watch_poll()
+
+    def watch_poll(self):
+        """ Polls the watched datafolder in a thread, a poll is skipped if the previous one is still running
+        """
+        if(self._watcher is None):
+            return
+        if((self._watch_thread is not None) and self._watch_thread.isRunning()):
+            return
 
-            
-        try:
-            cnt = len(self.data['info_dict'])
-        except:
-            cnt = 0
+        self._watch_thread = watch_folder(self._watcher, self._watch_search_args)
+        self._watch_thread.finished.connect(self.watch_finished)
+        self._watch_thread.start()
 
-        nrows = self.file_table.rowCount()
-        n_new_rows = cnt - nrows
-        for i in range(n_new_rows):
-            self.file_table.insertRow(i)
-            
+    def watch_finished(self):
+        """ Merges the casts of the new files and appends them to the cast table, the existing rows are not updated
+        """
+        data = self._watch_thread.data
+        if((data is None) or (len(data['info_dict']) == 0)):
+            return
 
-    def update_table(self):
-        #print('Update table')
-        #print(len(self.data['pyctd_campaign']))
-        #print(len(self.data['info_dict']))
-        # Fill the table
-        try:
-            cnt = len(self.data['info_dict'])
-        except:
-            cnt = 0
-
-        if(cnt > 0):
-            self._status_widget_tmp    = QtWidgets.QWidget()
-            self._status_layout_tmp    = QtWidgets.QVBoxLayout(self._status_widget_tmp)            
-            self._progress_bar_tmp     = QtWidgets.QProgressBar()
-            self._status_layout_tmp.addWidget(QtWidgets.QLabel('Updating table'))
-            self._status_layout_tmp.addWidget(self._progress_bar_tmp)
-            self._status_widget_tmp.show()
-            self._progress_bar_tmp.setMaximum(cnt)            
-        for i in range(cnt):
-            # Create a progress bar
-            self._progress_bar_tmp.setValue(i)
-            # A poor mans solution to avoid blocking after reading a lot of data, better would be a thread
-            # https://stackoverflow.com/questions/24738333/pyqt-gui-freezes-while-in-loop
-            if(i%5 == 0):
-                QtCore.QCoreApplication.processEvents()
-            # Add date
-            date = self.data['info_dict'][i]['date']
-            item = QtWidgets.QTableWidgetItem( date.strftime('%Y-%m-%d %H:%M:%S' ))
-            item.setFlags(item.flags() ^ QtCore.Qt.ItemIsEditable) # Unset to not have it editable
-            self.file_table.setItem(i,self.columns['date'], item)
-            
-            lon = self.data['info_dict'][i]['lon']
-            item = QtWidgets.QTableWidgetItem( "{:6.3f}".format(lon))
-            item.setFlags(item.flags() ^ QtCore.Qt.ItemIsEditable) # Unset to not have it editable            
-            self.file_table.setItem(i,self.columns['lon'], item)
-            lat = self.data['info_dict'][i]['lat']
-            item = QtWidgets.QTableWidgetItem( "{:6.3f}".format(lat))
-            item.setFlags(item.flags() ^ QtCore.Qt.ItemIsEditable) # Unset to not have it editable
-            self.file_table.setItem(i,self.columns['lat'], item)
-            # Station as in the file
-            try:
-                stat = self.data['info_dict'][i]['station']
-            except:
-                stat = ''
-                
-            item = QtWidgets.QTableWidgetItem(stat)
-            item.setFlags(item.flags() ^ QtCore.Qt.ItemIsEditable) # Unset to not have it editable
-            self.file_table.setItem(i,self.columns['station (File)'], item)
-            # Custom station as defined in pyctd
-            stat = self.data['pyctd_station'][i]
-            if(stat is not None):
-                item = QtWidgets.QTableWidgetItem( str(stat) )
-            else:
-                item = QtWidgets.QTableWidgetItem( str('') )
+        ncasts = self.data.ncasts
+        self.data = self.compare_and_merge_data(self.data,data)
+        if(self.FLAG_REL_PATH):
+            self.data.replace_in_files(self.foldername)
 
-            item.setFlags(item.flags() ^ QtCore.Qt.ItemIsEditable) # Unset to not have it editable                
-            self.file_table.setItem(i,self.columns['station (Custom)'], item)
+        nnew = self.data.ncasts - ncasts
+        if(nnew > 0):
+            self.create_table()
+        tstr = datetime.datetime.now().strftime('%H:%M:%S')
+        if(self._watcher is not None):
+            self._watch_label.setText('Watching ' + self.foldername + ', ' + str(nnew) + ' new casts at ' + tstr)
 
-            # Campaign as defined in pyctd
-            stat = self.data['pyctd_campaign'][i]
-            if(stat is not None):
-                item = QtWidgets.QTableWidgetItem( str(stat) )
-            else:
-                item = QtWidgets.QTableWidgetItem( str('') )
+    def compare_and_merge_data(self, data, data_new, new_station=True, new_comment=True, new_campaign=True, new_plot_map=True):
+        """ Checks in data field if new data is already there, if not it adds it, otherwise it rejects it, it also add pyctd specific data fields, if they not already exist. The lookup is done with the sha1 index self._sha1_index of self.data
+        """
+        print('Compare and merge')
+        if(data is not self.data): # The index belongs to self.data only
+            self._sha1_index = None
 
-            item.setFlags(item.flags() ^ QtCore.Qt.ItemIsEditable) # Unset to not have it editable                
-            self.file_table.setItem(i,self.columns['campaign'], item)                            
+        [data,self._sha1_index] = castdata.compare_and_merge_data(data, data_new, sha1_index = self._sha1_index, new_station = new_station, new_comment = new_comment, new_campaign = new_campaign, new_plot_map = new_plot_map)
+        return data
+        
+    def create_table(self):
+        """ Connects self.data to the table model and adds new rows
+        """
+        if(self.file_model.castdata is not self.data):
+            self.file_model.set_castdata(self.data)
+            if(self._time_filter is not None):
+                self.apply_time_filter()
+        elif(self._time_filter is not None): # New casts are filtered as well
+            self.apply_time_filter()
+        else:
+            self.file_model.update_nrows()
 
-            # Comment
-            comstr  = self.data['pyctd_comment'][i]                   
-            if(comstr is None):
-                comstr = ''
+    def update_table_cells(self, rows, columns):
+        """ Refreshes only the given columns of the given rows of the cast table
+        Arguments:
+           rows: List of the changed rows
+           columns: List of the names of the changed columns
+        """
+        self.file_model.rows_changed(rows, columns = columns)
+        for c in columns:
+            self.file_table.resizeColumnToContents(self.columns[c])
 
-            comitem = QtWidgets.QTableWidgetItem( comstr )
-            comitem.setFlags(QtCore.Qt.ItemIsEditable | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable)
-            self.file_table.setItem(i,self.columns['comment'],comitem)
-                
-            fname = self.data['info_dict'][i]['file']
-            item = QtWidgets.QTableWidgetItem( fname )
-            item.setFlags(item.flags() ^ QtCore.Qt.ItemIsEditable) # Unset to not have it editable
-            self.file_table.setItem(i,self.columns['file'], item)
+    def update_table(self):
+        """ Refreshes all cells of the cast table, only the visible cells are redrawn by the view
+        """
+        self.create_table()
+        nrows = self.file_model.rowCount()
+        if(nrows > 0):
+            self.file_model.dataChanged.emit(self.file_model.index(0,0),self.file_model.index(nrows-1,self._ncolumns-1))
 
-        # If the widget is open
-        try:
-            self._status_widget_tmp.close()
-        except:
-            pass
         # Resize the columns
         self.file_table.resizeColumnsToContents()
         
@@ -1420,44 +1753,128 @@ class mainWidget(QtWidgets.QWidget):
 
     def save_geojson(self):
         # Do the actual saving
-        filename,extension  = QtWidgets.QFileDialog.getSaveFileName(self,"Choose file for summary","","All Files (*)")
+        filename,extension  = QtWidgets.QFileDialog.getSaveFileName(self,"Choose file for summary","","GeoJSON (*.geojson);;Newline delimited GeoJSON (*.geojsonl);;All Files (*)")
         
         if(len(filename) > 0):
-            self.save_data(filename,casts=True,stations=True,transects=True,stype='geojson')
+            if(('geojsonl' in extension) or filename.endswith('.geojsonl')):
+                stype = 'geojsonl'
+            else:
+                stype = 'geojson'
+
+            self.save_data(filename,casts=True,stations=True,transects=True,stype=stype)
         
     def save_data(self,filename, casts=False,stations=False,transects=False,campaigns=False,stype='yaml'):
-        """ This function saves everything (casts, stations, transects)
+        """ This function saves everything (casts, stations, transects), only the requested summaries are created
         """
-        cast_dict    = self.create_cast_summary()
-        station_dict = self.create_station_summary()
-        transect_dict = self.create_transect_summary()
-        campaign_dict = self.create_campaign_summary()
         yaml_dict = {}
 
-        if casts:
-            yaml_dict.update(cast_dict)
+        if casts: # The casts are created one by one while writing
+            yaml_dict.update(self.create_cast_summary(lazy=True))
         if stations:
-            yaml_dict.update(station_dict)
+            yaml_dict.update(self.create_station_summary())
         if transects:
-            yaml_dict.update(transect_dict)
+            yaml_dict.update(self.create_transect_summary())
         if campaigns:
-            yaml_dict.update(campaign_dict)
+            yaml_dict.update(self.create_campaign_summary())
         
 
         if(len(filename) > 0):
             # Save the files
-            if stype is 'yaml':
+            if stype == 'yaml':
                 create_yaml_summary(yaml_dict,filename)
-            if stype is 'geojson':
+            if stype == 'geojson':
                 create_geojson_summary(yaml_dict,filename)
+            if stype == 'geojsonl':
+                create_geojson_summary(yaml_dict,filename,ndjson=True)
 
     def save_csv(self):
         filename,extension  = QtWidgets.QFileDialog.getSaveFileName(self,"Choose file for summary","","CSV File (*.csv);;All Files (*)")
         if 'csv' in extension and ('.csv' not in filename):
             filename += '.csv'
 
-        yaml_dict    = self.create_cast_summary()
-        create_csv_summary(yaml_dict,filename)
+        if(len(filename) == 0):
+            return
+
+        if(self.FLAG_REL_PATH):
+            foldername = self.foldername
+        else:
+            foldername = None
+
+        create_csv_catalogue_summary(self.data,filename,foldername=foldername)
+
+    def save_parquet(self):
+        filename,extension  = QtWidgets.QFileDialog.getSaveFileName(self,"Choose file for summary","","Parquet File (*.parquet);;All Files (*)")
+        if 'parquet' in extension and ('.parquet' not in filename):
+            filename += '.parquet'
+
+        if(len(filename) == 0):
+            return
+
+        if(self.FLAG_REL_PATH):
+            foldername = self.foldername
+        else:
+            foldername = None
+
+        try:
+            pyctd_summary.create_parquet_summary(self.data,filename,foldername=foldername)
+        except ImportError as e:
+            msg = QtWidgets.QMessageBox()
+            msg.setIcon(QtWidgets.QMessageBox.Warning)
+            msg.setInformativeText(str(e))
+            retval = msg.exec_()
+
+    def save_session(self):
+        """ Saves casts, stations, transects and campaigns into a binary session file
+        """
+        filename,extension  = QtWidgets.QFileDialog.getSaveFileName(self,"Choose file for session","","pyctd session (*.npz);;All Files (*)")
+        if(len(filename) == 0):
+            return
+
+        meta = {}
+        meta.update(self.create_station_summary())
+        meta.update(self.create_transect_summary())
+        meta.update(self.create_campaign_summary())
+        meta['cruise'] = self._cruise_fields
+        meta['foldername'] = os.path.abspath(self.foldername) # The folder of relative filenames
+        pyctd_session.save_session(filename, self.data, meta = meta)
+
+    def load_session(self):
+        """ Loads a binary session file and merges it into the existing data
+        """
+        filename,extension  = QtWidgets.QFileDialog.getOpenFileName(self,"Choose session file","","pyctd session (*.npz);;All Files (*)")
+        if(len(filename) == 0):
+            return
+
+        try:
+            [data,meta] = pyctd_session.load_session(filename)
+        except Exception as e:
+            msg = QtWidgets.QMessageBox()
+            msg.setIcon(QtWidgets.QMessageBox.Warning)
+            msg.setInformativeText('No valid or not existing session file')
+            retval = msg.exec_()
+            return
+
+        if(self.data.ncasts == 0): # Nothing to merge
+            self.data = data
+            self._sha1_index = None
+        else:
+            self.data = self.compare_and_merge_data(self.data,data)
+
+        if(len(meta.get('campaigns',[])) > 0):
+            self.campaign_add_from_dict(meta)
+
+        if(len(meta.get('stations',[])) > 0):
+            self.station_add_from_dict(stations_yaml = meta)
+
+        if(len(meta.get('transects',{})) > 0):
+            self.transect_add_from_dict(meta)
+
+        for k,v in meta.get('cruise',{}).items():
+            if(len(v) > 0):
+                self._cruise_fields[k] = v
+
+        self.create_table()
+        self.update_table()
 
     def create_station_summary(self):
         """ Creates a summary of all stations read in
@@ -1493,42 +1910,15 @@ class mainWidget(QtWidgets.QWidget):
         
         return yaml_dict
 
-    def create_cast_summary(self):
-        """ Creates a summary from the given sum_dict for all casts read in
+    def create_cast_summary(self, lazy=False):
+        """ Creates a summary from the given sum_dict for all casts read in, see pyctd.summary.create_cast_summary
         """
-        yaml_dict = {}
-        try:
-            self.data['info_dict']
-        except:
-            return {}
-
-        yaml_dict['created'] = str(datetime.datetime.now(pytz.utc))
-        yaml_dict['version'] = version
-        yaml_dict['casts']   = copy.deepcopy(self.data['info_dict'])
-        # Convert datetime objects into something readable
-        for i,d in enumerate(yaml_dict['casts']):
-            yaml_dict['casts'][i]['date'] = str(d['date'])
-            if(self.data['pyctd_station'][i] is not None):
-                yaml_dict['casts'][i]['station pyctd'] = self.data['pyctd_station'][i]
-            else:
-                yaml_dict['casts'][i]['station pyctd'] = ''
-
-            if(self.data['pyctd_comment'][i] is not None):
-                yaml_dict['casts'][i]['comment'] = self.data['pyctd_comment'][i]
-            else:
-                yaml_dict['casts'][i]['comment'] = ''
+        if(self.FLAG_REL_PATH):
+            foldername = self.foldername
+        else:
+            foldername = None
 
-            if(self.data['pyctd_campaign'][i] is not None):
-                yaml_dict['casts'][i]['campaign'] = self.data['pyctd_campaign'][i]
-            else:
-                yaml_dict['casts'][i]['campaign'] = ''                                
-                
-            if(self.FLAG_REL_PATH):
-                fname = yaml_dict['casts'][i]['file']
-                fname = fname.replace(self.foldername,'.') # TODO, check if filesep is needed for windows
-                yaml_dict['casts'][i]['file'] = fname
-                
-        return yaml_dict
+        return pyctd_summary.create_cast_summary(self.data, foldername = foldername, lazy = lazy)
 
     def create_campaign_summary(self):
         """ Reads in the campaign table in self.camp['table'] and creates a dictionary out of it
@@ -1599,7 +1989,7 @@ class mainWidget(QtWidgets.QWidget):
         # Opening the yaml file
         try:
             stream = open(filename_all, 'r')
-            data_yaml = yaml.safe_load(stream)
+            data_yaml = pyctd_summary.load_yaml(stream)
         except Exception as e:
             # TODO warning message, bad data
             msg = QtWidgets.QMessageBox()
@@ -1630,7 +2020,7 @@ class mainWidget(QtWidgets.QWidget):
         # Opening the yaml file
         try:
             stream = open(filename_all, 'r')
-            data_yaml = yaml.safe_load(stream)
+            data_yaml = pyctd_summary.load_yaml(stream)
         except Exception as e:
             # TODO warning message, bad data
             msg = QtWidgets.QMessageBox()
@@ -1642,6 +2032,7 @@ class mainWidget(QtWidgets.QWidget):
         data = {}
         data['pyctd_station']   = []
         data['pyctd_comment']   = []
+        data['pyctd_campaign']  = []
         # Fill the data structure again
         data['info_dict'] = data_yaml['casts']        
         for i,c in enumerate(data['info_dict']):
@@ -1661,7 +2052,11 @@ class mainWidget(QtWidgets.QWidget):
             except Exception as e:
                 data['pyctd_campaign'].append(None)                                
                 
-            date = datetime.datetime.strptime(c['date'],'%Y-%m-%d %H:%M:%S%z')
+            # fromisoformat is much faster than strptime and accepts dates with microseconds
+            try:
+                date = datetime.datetime.fromisoformat(c['date'])
+            except ValueError: # E.g. 'None'
+                date = None
             data['info_dict'][i]['date'] = date
 
             
@@ -1739,7 +2134,8 @@ class mainWidget(QtWidgets.QWidget):
                 fchoosen = QtWidgets.QFileDialog.getOpenFileName(self, "Select Station File",'',files_types)
                 stations_file = fchoosen[0]
             elif('IOW Monitoring' in combo_text):
-                stations_file = pkg_resources.resource_filename('pycnv', 'stations/iow_stations.yaml')
+                import pycnv
+                stations_file = os.path.join(os.path.dirname(pycnv.__file__),'stations','iow_stations.yaml')
 
             try:
                 f_stations = open(stations_file)
@@ -1749,7 +2145,7 @@ class mainWidget(QtWidgets.QWidget):
             
             # use safe_load instead load
             print('Loading stations yaml')
-            stations_yaml = yaml.safe_load(f_stations)
+            stations_yaml = pyctd_summary.load_yaml(f_stations)
             f_stations.close()
             
         self.station_add_from_dict(stations_yaml)
@@ -1816,11 +2212,17 @@ class pyctdMainWindow(QtWidgets.QMainWindow):
         sumcastAction.setShortcut("Ctrl+S")
         sumcruiseAction = QtWidgets.QAction("&Create cruise summary", self)
         sumcruiseAction.triggered.connect(self.mainwidget.create_cruise_summary)                        
+        sesslAction = QtWidgets.QAction("Load &session", self)
+        sesslAction.triggered.connect(self.mainwidget.load_session)
+        sesssAction = QtWidgets.QAction("Save s&ession", self)
+        sesssAction.triggered.connect(self.mainwidget.save_session)
 
         fileMenu = mainMenu.addMenu('&File')
         fileMenu.addAction(sumlAction)
         fileMenu.addAction(sumcastAction)
         fileMenu.addAction(sumcruiseAction)        
+        fileMenu.addAction(sesslAction)
+        fileMenu.addAction(sesssAction)
         fileMenu.addAction(quitAction)
         #fileMenu.addAction(chooseStreamAction)
 
@@ -0,0 +1,222 @@
+#
+# Cache of parsed casts. Parsing a cnv file with pycnv (or a mrd file
+# with pysst) takes much longer than plotting it, the parsed objects are
+# therefore kept in a least recently used cache, keyed by the sha1 of
+# the file. The cache is bounded by the (estimated) memory of the parsed
+# objects and is shared by all users of the module, i.e. plotting and
+# exports needing the profile data. Casts likely needed next can be
+# parsed in advance in a pool of background threads (prefetch()). pycnv
+# and pysst are imported when needed first.
+#
+import os
+import sys
+import logging
+import threading
+import collections
+import concurrent.futures
+import numpy as np
+
+logger = logging.getLogger('pyctd.profiles')
+
+# Default maximum memory of the cached casts [bytes]
+cache_maxbytes = 256 * 1024 * 1024
+# Number of threads parsing prefetched casts
+prefetch_workers = 2
+
+
+def _nbytes(obj, depth = 0):
+    """ Estimates the memory of a parsed cast, i.e. of the numpy arrays and strings in its attributes
+    """
+    if(isinstance(obj, np.ndarray)):
+        nbytes = obj.nbytes
+        mask = getattr(obj, 'mask', None)
+        if(isinstance(mask, np.ndarray)):
+            nbytes += mask.nbytes
+        return nbytes
+    elif(isinstance(obj, (str, bytes))):
+        return sys.getsizeof(obj)
+    elif(depth > 3):
+        return 0
+    elif(isinstance(obj, dict)):
+        return sum(_nbytes(v, depth + 1) for v in obj.values())
+    elif(isinstance(obj, (list, tuple))):
+        return sum(_nbytes(v, depth + 1) for v in obj)
+    elif(hasattr(obj, '__dict__') and (depth == 0)):
+        return sum(_nbytes(v, depth + 1) for v in vars(obj).values())
+
+    return 0
+
+
+def parse_profile(filename, ftype = None, loglevel = logging.CRITICAL):
+    """ Parses a cast with pycnv or pysst
+    Args:
+        filename: The filename
+        ftype: 'CNV' or 'MRD', if None the type is guessed from the file extension
+        loglevel: The loglevel of pycnv/pysst
+    Returns:
+        The pycnv or pymrd object, None if the file is not valid. Errors of pycnv (e.g. a missing file) are raised
+    """
+    if(ftype is None):
+        ftype = 'MRD' if filename.upper().endswith('.MRD') else 'CNV'
+
+    if(ftype == 'CNV'):
+        from pycnv import pycnv
+        cnv = pycnv(filename, verbosity = loglevel, calc_sha1 = False)
+        if(cnv.valid_cnv):
+            return cnv
+    elif(ftype == 'MRD'):
+        from pysst import pymrd
+        mrd = pymrd(filename, verbosity = loglevel, calc_sha1 = False)
+        # pymrd keeps the file open
+        f = getattr(mrd, 'f', None)
+        if(f is not None):
+            f.close()
+        if(mrd.valid_mrd):
+            return mrd
+
+    return None
+
+
+class profileCache(object):
+    """ Least recently used cache of parsed casts, the cache is thread safe
+    Args:
+        maxbytes: The maximum estimated memory of the cached casts [bytes], the least recently used casts are removed first
+        max_workers: The number of threads parsing prefetched casts
+    """
+    def __init__(self, maxbytes = cache_maxbytes, max_workers = prefetch_workers):
+        self.maxbytes = maxbytes
+        self.max_workers = max_workers
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._profiles = collections.OrderedDict() # key: [profile,nbytes]
+        self._parsing = {} # key: threading.Event of the casts being parsed
+        self._lock = threading.Lock()
+        self._executor = None # Created with the first prefetch()
+        self._prefetch_futures = []
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def __contains__(self, key):
+        return key in self._profiles
+
+    def get(self, filename, ftype = None, sha1 = None):
+        """ Returns the parsed cast, the file is only parsed if it is not in the cache
+        Args:
+            filename: The filename
+            ftype: 'CNV' or 'MRD', None to guess it from the file extension
+            sha1: The sha1 of the file, used as key, if None the absolute filename is used
+        Returns:
+            The pycnv or pymrd object, None if the file is not valid
+        """
+        key = self._key(filename, sha1)
+        while True:
+            with self._lock:
+                if(key in self._profiles):
+                    self._profiles.move_to_end(key)
+                    self.hits += 1
+                    return self._profiles[key][0]
+
+                parsing = self._parsing.get(key)
+                if(parsing is None):
+                    parsing = threading.Event()
+                    self._parsing[key] = parsing
+                    self.misses += 1
+                    break
+
+            # Another thread (e.g. a prefetch) parses the cast already, wait for it
+            parsing.wait()
+            with self._lock:
+                if((key not in self._profiles) and (key not in self._parsing)):
+                    return None # Not a valid file
+
+        # Parse without holding the lock, other threads can use the cache meanwhile
+        try:
+            profile = parse_profile(filename, ftype)
+            if(profile is not None):
+                self.put(key, profile)
+        finally:
+            with self._lock:
+                self._parsing.pop(key)
+            parsing.set()
+
+        return profile
+
+    def _key(self, filename, sha1):
+        return sha1 if sha1 is not None else os.path.abspath(filename)
+
+    def prefetch(self, casts):
+        """ Parses casts in background threads and puts them into the cache, casts of an earlier prefetch() that are still waiting are cancelled
+        Args:
+            casts: List of [filename,ftype,sha1], ordered by priority
+        Returns:
+            List of the futures of the casts not yet in the cache
+        """
+        with self._lock:
+            if(self._executor is None):
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers = self.max_workers, thread_name_prefix = 'pyctd_prefetch')
+            for future in self._prefetch_futures:
+                future.cancel()
+
+            futures = []
+            for filename,ftype,sha1 in casts:
+                key = self._key(filename, sha1)
+                if((key in self._profiles) or (key in self._parsing)):
+                    continue
+                futures.append(self._executor.submit(self._prefetch_cast, filename, ftype, sha1))
+
+            self._prefetch_futures = futures
+
+        return futures
+
+    def _prefetch_cast(self, filename, ftype, sha1):
+        try:
+            self.get(filename, ftype = ftype, sha1 = sha1)
+        except Exception as e:
+            logger.debug('Could not prefetch file:' + filename + ' (' + str(e) + ')')
+
+    def cancel_prefetch(self):
+        """ Cancels all prefetched casts that are not parsed yet
+        """
+        with self._lock:
+            for future in self._prefetch_futures:
+                future.cancel()
+            self._prefetch_futures = []
+
+    def put(self, key, profile):
+        """ Adds a parsed cast with the key to the cache
+        """
+        nbytes = _nbytes(profile)
+        with self._lock:
+            if(key in self._profiles):
+                self.nbytes -= self._profiles.pop(key)[1]
+
+            self._profiles[key] = [profile,nbytes]
+            self.nbytes += nbytes
+            # Remove the least recently used, the newest cast is always kept
+            while((self.nbytes > self.maxbytes) and (len(self._profiles) > 1)):
+                key_old,(profile_old,nbytes_old) = self._profiles.popitem(last = False)
+                self.nbytes -= nbytes_old
+                logger.debug('Removed from cache:' + str(key_old))
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+            self.nbytes = 0
+
+
+# The cache shared within pyctd
+cache = profileCache()
+
+
+def get_profile(filename, ftype = None, sha1 = None):
+    """ Returns the parsed cast from the shared cache, see profileCache.get()
+    """
+    return cache.get(filename, ftype = ftype, sha1 = sha1)
+
+
+def prefetch(casts):
+    """ Parses casts in the background into the shared cache, see profileCache.prefetch()
+    """
+    return cache.prefetch(casts)
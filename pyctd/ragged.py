@@ -0,0 +1,286 @@
+#
+# Store of the profiles of many casts in one netCDF (HDF5) file, using
+# the CF "contiguous ragged array" representation of profiles: the
+# observations of all casts are concatenated along the obs dimension
+# and the variable rowSize holds the number of observations of every
+# cast. The casts are identified by their sha1, reading a cast is a
+# slice of the compressed and chunked observation variables instead of
+# parsing its cnv/mrd file. The store is created with the command line
+# tool pyctd-batch (--format profiles) or create_profile_store() and is
+# read with profileStore. netCDF4 is imported when needed first.
+#
+import os
+import logging
+import datetime
+import concurrent.futures
+import multiprocessing
+import numpy as np
+from pyctd import castdata
+from pyctd import gridded as pyctd_gridded
+from pyctd.summary import version
+
+logger = logging.getLogger('pyctd.ragged')
+
+# The variables stored by default (pycnv standard and computed names)
+variables_default = ['T0','T1','C0','C1','oxy0','oxy1','SP00','SA00','CT00','SP11','SA11','CT11']
+# Number of observations per chunk of the observation variables
+obs_chunksize = 65536
+
+
+def _create_store(netCDF4, filename, variables, dtype, complevel, attributes):
+    nc = netCDF4.Dataset(filename,'w')
+    nc.Conventions = 'CF-1.8'
+    nc.featureType = 'profile'
+    nc.history = 'Created with pyctd (' + version + ') on ' + str(datetime.datetime.now(datetime.timezone.utc))
+    for key,value in attributes.items():
+        setattr(nc, key, value)
+
+    nc.createDimension('profile',None)
+    nc.createDimension('obs',None)
+    ncvar = nc.createVariable('sha1',str,('profile',))
+    ncvar.cf_role = 'profile_id'
+    ncvar = nc.createVariable('time','f8',('profile',), fill_value = np.nan)
+    ncvar.units = pyctd_gridded.time_unit
+    ncvar.standard_name = 'time'
+    ncvar = nc.createVariable('lon','f8',('profile',), fill_value = np.nan)
+    ncvar.units = 'degrees_east'
+    ncvar.standard_name = 'longitude'
+    ncvar = nc.createVariable('lat','f8',('profile',), fill_value = np.nan)
+    ncvar.units = 'degrees_north'
+    ncvar.standard_name = 'latitude'
+    nc.createVariable('file',str,('profile',))
+    nc.createVariable('type',str,('profile',))
+    ncvar = nc.createVariable('rowSize','i4',('profile',))
+    ncvar.long_name = 'number of observations for this profile'
+    ncvar.sample_dimension = 'obs'
+    for name in ['p'] + list(variables):
+        ncvar = nc.createVariable(name,dtype,('obs',), zlib = True, complevel = complevel, chunksizes = (obs_chunksize,), fill_value = np.nan)
+        ncvar.coordinates = 'time lon lat'
+
+    nc.variables['p'].positive = 'down'
+    return nc
+
+
+def _append_store(nc, variables, block):
+    """ Appends a block of parsed casts to the store
+    """
+    n0 = len(nc.dimensions['profile'])
+    n1 = n0 + len(block['sha1'])
+    nc.variables['sha1'][n0:n1] = np.asarray(block['sha1'], dtype = object)
+    nc.variables['time'][n0:n1] = block['time']
+    nc.variables['lon'][n0:n1]  = block['lon']
+    nc.variables['lat'][n0:n1]  = block['lat']
+    nc.variables['file'][n0:n1] = np.asarray(block['file'], dtype = object)
+    nc.variables['type'][n0:n1] = np.asarray(block['type'], dtype = object)
+    rowsizes = [len(profile[0]) for profile in block['profiles']]
+    nc.variables['rowSize'][n0:n1] = rowsizes
+
+    o0 = len(nc.dimensions['obs'])
+    o1 = o0 + sum(rowsizes)
+    if(o1 == o0):
+        return
+
+    nc.variables['p'][o0:o1] = np.concatenate([profile[0] for profile in block['profiles']])
+    values = np.concatenate([profile[1] for profile in block['profiles']], axis = 1)
+    for i,name in enumerate(variables):
+        ncvar = nc.variables[name]
+        ncvar[o0:o1] = values[i]
+        for profile in block['profiles']:
+            unit = profile[2][i]
+            if((unit is not None) and not('units' in ncvar.ncattrs())):
+                ncvar.units = unit
+
+
+def create_profile_store(data, filename, rows = None, variables = variables_default, nproc = None, chunksize = 100, foldername = None, dtype = 'f4', complevel = 4, attributes = None, loglevel = logging.CRITICAL):
+    """ Parses casts and writes their profiles into one netCDF file as a CF contiguous ragged array
+    Args:
+        data: The data dictionary or a castCatalogue
+        filename: The filename of the netCDF file
+        rows: The indices of the casts, None for all casts
+        variables: The names of the variables (as in pycnv) stored besides the pressure, missing variables are NaN
+        nproc: Number of worker processes, None uses all cores, 1 parses in the calling process
+        chunksize: Number of casts appended to the store at once
+        foldername: Folder of relative filenames, e.g. of summaries or sessions written with relative paths
+        dtype: The datatype of the observations, 'f4' keeps the precision of cnv files
+        complevel: The zlib compression level of the observations
+        attributes: Dictionary with global attributes of the netCDF file
+    Returns:
+        The number of casts written
+    """
+    netCDF4 = pyctd_gridded._import_netcdf4()
+    if not(isinstance(data, castdata.castCatalogue)):
+        data = castdata.castCatalogue(data)
+    if(rows is None):
+        rows = np.arange(data.ncasts)
+    if(nproc is None):
+        nproc = os.cpu_count()
+    if(attributes is None):
+        attributes = {}
+
+    variables = list(variables)
+    nc = _create_store(netCDF4, filename, variables, dtype, complevel, attributes)
+    ncasts = 0
+    executor = None
+    if((nproc > 1) and (len(rows) > chunksize)):
+        # Spawn fresh interpreters, forking a process with a running GUI is not safe
+        mp_context = multiprocessing.get_context('spawn')
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers = nproc, mp_context = mp_context)
+
+    try:
+        for i0 in range(0,len(rows),chunksize):
+            rows_block = rows[i0:i0 + chunksize]
+            casts = []
+            for row in rows_block:
+                fname = data.get_info(row,'file')
+                if((foldername is not None) and not(os.path.isabs(fname))):
+                    fname = os.path.normpath(os.path.join(foldername,fname))
+                casts.append([fname,data.get_info(row,'type')])
+
+            if(executor is None):
+                profiles = pyctd_gridded.read_profiles(casts, variables, loglevel)
+            else:
+                nsub = max(1,len(casts) // (nproc * 2))
+                subchunks = [casts[i:i + nsub] for i in range(0,len(casts),nsub)]
+                profiles = []
+                for r in executor.map(pyctd_gridded.read_profiles, subchunks, [variables] * len(subchunks), [loglevel] * len(subchunks)):
+                    profiles.extend(r)
+
+            block = {'sha1':[],'time':[],'lon':[],'lat':[],'file':[],'type':[],'profiles':[]}
+            for row,profile in zip(rows_block,profiles):
+                if(profile is None):
+                    continue
+                block['sha1'].append(data.get_info(row,'sha1'))
+                block['time'].append(data.datenum[row] / 1e6 if data.datenum[row] != castdata.date_invalid else np.nan)
+                block['lon'].append(data.lon[row])
+                block['lat'].append(data.lat[row])
+                block['file'].append(data.get_info(row,'file'))
+                block['type'].append(data.get_info(row,'type'))
+                block['profiles'].append(profile)
+
+            if(len(block['sha1']) > 0):
+                _append_store(nc, variables, block)
+                ncasts += len(block['sha1'])
+
+            logger.info('Stored ' + str(min(i0 + chunksize,len(rows))) + ' of ' + str(len(rows)) + ' casts')
+    finally:
+        nc.close()
+        if(executor is not None):
+            executor.shutdown()
+
+    logger.info('Wrote ' + str(ncasts) + ' casts to file:' + filename)
+    return ncasts
+
+
+class profileStore(object):
+    """ Read access to a profile store written with create_profile_store(), the casts are looked up by their sha1
+    Args:
+        filename: The filename of the store
+    """
+    def __init__(self, filename):
+        netCDF4 = pyctd_gridded._import_netcdf4()
+        self.filename = filename
+        self.nc = netCDF4.Dataset(filename,'r')
+        self.nc.set_auto_mask(False)
+        rowsizes = np.asarray(self.nc.variables['rowSize'][:], dtype = np.int64)
+        self.offsets = np.concatenate(([0],np.cumsum(rowsizes)))
+        self.sha1 = list(self.nc.variables['sha1'][:])
+        self._index = {sha1:i for i,sha1 in enumerate(self.sha1)}
+        self.variables = [name for name,ncvar in self.nc.variables.items() if(ncvar.dimensions == ('obs',)) and (name != 'p')]
+
+    def __len__(self):
+        return len(self.sha1)
+
+    def __contains__(self, sha1):
+        return sha1 in self._index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.nc.close()
+
+    def units(self, name):
+        ncvar = self.nc.variables[name]
+        return ncvar.units if('units' in ncvar.ncattrs()) else None
+
+    def get(self, sha1, variables = None):
+        """ Returns the profile of the cast with the sha1
+        Args:
+            sha1: The sha1 of the cast
+            variables: List of the variable names, None for all stored variables
+        Returns:
+            Dictionary with the pressure 'p' and the variables, None if the cast is not in the store
+        """
+        i = self._index.get(sha1)
+        if(i is None):
+            return None
+        if(variables is None):
+            variables = self.variables
+
+        o0,o1 = self.offsets[i],self.offsets[i + 1]
+        profile = {}
+        for name in ['p'] + list(variables):
+            profile[name] = np.asarray(self.nc.variables[name][o0:o1], dtype = float)
+
+        return profile
+
+    def read_profile(self, sha1, variables):
+        """ Returns the profile of the cast with the sha1 in the format of gridded.read_profile(), variables not in the store are NaN
+        Returns:
+            List with the pressure, the values (array of shape (len(variables),len(p))) and a list of the units, None if the cast is not in the store
+        """
+        i = self._index.get(sha1)
+        if(i is None):
+            return None
+
+        o0,o1 = self.offsets[i],self.offsets[i + 1]
+        p = np.asarray(self.nc.variables['p'][o0:o1], dtype = float)
+        values = np.full((len(variables),len(p)),np.nan)
+        units = [None] * len(variables)
+        for j,name in enumerate(variables):
+            if(name in self.variables):
+                values[j] = self.nc.variables[name][o0:o1]
+                units[j] = self.units(name)
+
+        return [p,values,units]
+
+    def read_ragged(self, sha1s, variables):
+        """ Reads the profiles of many casts as ragged arrays, e.g. for gridded.interpolate_ragged(). The casts are read in the order of the store, contiguous casts with one read per variable
+        Args:
+            sha1s: List of the sha1 of the casts, casts not in the store are empty
+            variables: List of the variable names, variables not in the store are NaN
+        Returns:
+            List with the pressure, the values (array of shape (len(variables),len(p))) and the offsets of the profiles in p (len(sha1s) + 1)
+        """
+        ind = np.asarray([self._index.get(sha1,-1) for sha1 in sha1s], dtype = np.int64)
+        rowsizes = np.where(ind >= 0, self.offsets[ind + 1] - self.offsets[np.maximum(ind,0)], 0)
+        offsets = np.concatenate(([0],np.cumsum(rowsizes)))
+        p = np.full(offsets[-1],np.nan)
+        values = np.full((len(variables),offsets[-1]),np.nan)
+        # Runs of casts that are consecutive in the store are read at once
+        order = np.argsort(ind, kind = 'stable')
+        order = order[ind[order] >= 0]
+        if(len(order) == 0):
+            return [p,values,offsets]
+
+        breaks = np.where(np.diff(ind[order]) != 1)[0] + 1
+        for run in np.split(order, breaks):
+            o0 = self.offsets[ind[run[0]]]
+            o1 = self.offsets[ind[run[-1]] + 1]
+            src = {'p':np.asarray(self.nc.variables['p'][o0:o1], dtype = float)}
+            for name in variables:
+                if(name in self.variables):
+                    src[name] = np.asarray(self.nc.variables[name][o0:o1], dtype = float)
+
+            for k in run:
+                s0 = self.offsets[ind[k]] - o0
+                s1 = s0 + rowsizes[k]
+                p[offsets[k]:offsets[k + 1]] = src['p'][s0:s1]
+                for j,name in enumerate(variables):
+                    if(name in src):
+                        values[j,offsets[k]:offsets[k + 1]] = src[name][s0:s1]
+
+        return [p,values,offsets]
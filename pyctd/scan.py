@@ -0,0 +1,314 @@
+#
+# Searching folders for valid CTD files (Seabird cnv and Sea & Sun
+# Technology mrd). The header parsing is distributed over a pool of
+# processes, the results are collected in the calling process.
+#
+import os
+import fnmatch
+import functools
+import logging
+import datetime
+import concurrent.futures
+import multiprocessing
+import numpy as np
+from pytz import timezone
+from pyctd import scan_index
+
+logger = logging.getLogger('pyctd.scan')
+
+# File extensions for the different file types
+file_patterns = {'CNV':['*.cnv','*.CNV'],'MRD':['*.mrd','*.MRD']}
+
+
+def str_to_time(timestr):
+    """ Converts a timestr to a datetime object
+    Args:
+        timestr: The timestr
+    Returns:
+        List with first entry a boolean if the conversion was sucessfull and a second entry the datetime object
+    """
+    good_time = False
+    try:
+        d = datetime.datetime.strptime(timestr,'%Y-%m-%d %H:%M:%S')
+        d = d.replace(tzinfo=timezone('UTC'))
+        good_time = True
+    except Exception as e:
+        logger.warning('Could not parse time:' + str(timestr) + ' (' + str(e) + ')')
+        d = None
+
+    logger.debug('Parsed time:' + str(d))
+    return [good_time,d]
+
+
+@functools.lru_cache(maxsize = None)
+def get_geod():
+    """ Returns a pyproj WGS84 Geod object for distance calculations, None if pyproj is not installed. pyproj is imported when needed first
+    """
+    try:
+        from pyproj import Geod
+    except ImportError:
+        return None
+
+    return Geod(ellps='WGS84')
+
+
+def find_files(foldername, search_seabird = True, search_mrd = True):
+    """ Recursively searches a folder for cnv and/or mrd files
+    Args:
+        foldername: Either a string of one folder or a list of folders
+        search_seabird: Search for Seabird cnv files
+        search_mrd: Search for Sea & Sun mrd files
+    Returns:
+        List of [filename,filetype] entries, filetype is either 'CNV' or 'MRD'
+    """
+    if(isinstance(foldername, str)):
+        foldername = [foldername]
+
+    ftypes = []
+    if search_seabird:
+        ftypes.append('CNV')
+    if search_mrd:
+        ftypes.append('MRD')
+
+    matches = []
+    for folder in foldername:
+        for root, dirnames, fnames in os.walk(folder):
+            for ftype in ftypes:
+                for pattern in file_patterns[ftype]:
+                    for fname in fnmatch.filter(fnames, pattern):
+                        matches.append([os.path.join(root, fname),ftype])
+
+    logger.info('Found ' + str(len(matches)) + ' files in folder(s):' + str(foldername))
+    return matches
+
+
+def parse_file(filename, ftype, loglevel = logging.CRITICAL):
+    """ Parses the header of a cnv or mrd file
+    Args:
+        filename: The filename
+        ftype: 'CNV' or 'MRD'
+    Returns:
+        The info_dict of the file or None if the file is not valid
+    """
+    if(ftype == 'CNV'):
+        from pycnv import pycnv
+        cnv = pycnv(filename, only_metadata = True, verbosity = loglevel)
+        if(cnv.valid_cnv):
+            return cnv.get_info_dict()
+    elif(ftype == 'MRD'):
+        from pysst import pymrd
+        mrd = pymrd(filename, only_metadata = True, verbosity = loglevel)
+        if(mrd.valid_mrd):
+            return mrd.get_info_dict()
+
+    return None
+
+
+def parse_files(files, loglevel = logging.CRITICAL):
+    """ Parses a list of files, this is the function called in the worker processes
+    Args:
+        files: List of [filename,filetype]
+    Returns:
+        List of [filename,info_dict], info_dict is None for invalid files
+    """
+    results = []
+    for filename,ftype in files:
+        try:
+            info_dict = parse_file(filename, ftype, loglevel = loglevel)
+        except Exception as e:
+            logger.warning('Could not parse file:' + filename + ' (' + str(e) + ')')
+            info_dict = None
+
+        results.append([filename,info_dict])
+
+    return results
+
+
+def check_info_dict(info_dict, station = None, start_time = None, stop_time = None):
+    """ Checks if a cast fulfills the position and time criteria
+    Args:
+       info_dict: The info_dict of the cast
+       station: Cast has to lie within radius around position, given as a list with longitude [decdeg], latitude [decdeg], radius [m], e.g. [20.0,54.0,5000], if station has 4 arguments it is treated as a rectangle with [lon0,lat0,lon1,lat1]
+       start_time: Casts date need to be after start time [datetime]
+       stop_time: Casts date need to be before stop time [datetime]
+    Returns:
+        True if the cast fulfills the criteria, otherwise False
+    """
+    if (type(start_time) == datetime.datetime) or (type(stop_time) == datetime.datetime):
+        if(type(start_time) is not datetime.datetime):
+            start_time = datetime.datetime(1,1,1, tzinfo=timezone('UTC'))
+        if(type(stop_time) is not datetime.datetime):
+            stop_time = datetime.datetime(3000,1,1, tzinfo=timezone('UTC'))
+
+        date = info_dict['date']
+        if(date is None):
+            return False
+        if((date <= start_time) or (date >= stop_time)):
+            return False
+
+    if(station is not None):
+        lon = info_dict['lon']
+        lat = info_dict['lat']
+        if(np.isnan(lon) or np.isnan(lat)):
+            return False
+        if(len(station) == 3): # Sphere with radius
+            g = get_geod()
+            if(g is None):
+                logger.warning('pyproj is not installed, cannot compute distance')
+                return False
+            az12,az21,dist = g.inv(lon,lat,station[0],station[1])
+            if(dist >= station[2]):
+                return False
+        elif(len(station) == 4): # Rectangle
+            if not((lon >= station[0]) and (lon <= station[2]) and (lat >= station[1]) and (lat <= station[3])):
+                return False
+
+    return True
+
+
+def get_all_valid_files(foldername, search_seabird = True, search_mrd = True, start_time = None, stop_time = None, station = None, nproc = None, chunksize = None, status_function = None, loglevel = logging.WARNING, use_index = False, index_file = None, stop_event = None, skip_files = None):
+    """ Searches a folder for valid cnv and mrd files and parses their
+    headers in a pool of processes
+    Args:
+       foldername: Either list of folders or string of one folder
+       search_seabird: Search for Seabird cnv files
+       search_mrd: Search for Sea & Sun mrd files
+       start_time: Casts date need to be after start time [datetime]
+       stop_time: Casts date need to be before stop time [datetime]
+       station: Position criterium, see check_info_dict()
+       nproc: Number of worker processes, None uses all cores, 1 parses in the calling process
+       chunksize: Number of files sent to a worker at once, None chooses one based on nproc
+       status_function: A function that is called for every parsed file with the number of parsed files i, the total number of files nf and the filename f, e.g. function(i,nf,f)
+       use_index: Use the persistent scan index, only new or changed files are parsed
+       index_file: The filename of the scan index, if None the default in the user cache directory is used
+       stop_event: A threading.Event, if set the search is stopped after the current file and the data found so far is returned
+       skip_files: Filenames that are not parsed, e.g. the 'scanned_files' of a stopped search to resume it
+    Returns:
+        Dictionary with the lists 'files', 'dates', 'lon', 'lat' and 'info_dict', sorted by date, the list 'scanned_files' with all files that have been looked at and 'stopped', True if the search was stopped by stop_event
+    """
+    files = find_files(foldername, search_seabird = search_seabird, search_mrd = search_mrd)
+    if(skip_files is not None):
+        skip_files = set(skip_files)
+        files = [f for f in files if f[0] not in skip_files]
+
+    return scan_files(files, start_time = start_time, stop_time = stop_time, station = station, nproc = nproc, chunksize = chunksize, status_function = status_function, loglevel = loglevel, use_index = use_index, index_file = index_file, stop_event = stop_event)
+
+
+def scan_files(files, start_time = None, stop_time = None, station = None, nproc = None, chunksize = None, status_function = None, loglevel = logging.WARNING, use_index = False, index_file = None, stop_event = None):
+    """ Parses the headers of the given files in a pool of processes and returns the valid casts, see get_all_valid_files() for the arguments
+    Args:
+       files: List of [filename,filetype], e.g. from find_files() or watch.folderWatcher.poll()
+    Returns:
+        See get_all_valid_files()
+    """
+    if(nproc is None):
+        nproc = os.cpu_count()
+
+    nproc = max(1,nproc)
+    nf = len(files)
+    if(nf == 0):
+        if(status_function is not None):
+            status_function(0,0,'Nothing found')
+        return {'files':[],'dates':[],'lon':[],'lat':[],'info_dict':[],'scanned_files':[],'stopped':False}
+
+    info_dicts = []
+    scanned_files = []
+    i = 0
+    if use_index:
+        index = scan_index.scanIndex(index_file)
+        stats = {}
+        files_parse = []
+        for filename,ftype in files:
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+
+            stats[filename] = stat
+            [found,info_dict] = index.get(filename, stat = stat)
+            if found:
+                scanned_files.append(filename)
+                if(info_dict is not None):
+                    info_dicts.append(info_dict)
+            else:
+                files_parse.append([filename,ftype])
+
+        i = nf - len(files_parse)
+        logger.info('Found ' + str(i) + ' unchanged files in index, parsing ' + str(len(files_parse)) + ' files')
+        if(status_function is not None):
+            status_function(0,nf,'Found ' + str(i) + ' unchanged files in index')
+    else:
+        files_parse = files
+
+    results = []
+    for filename,info_dict in _parse_all(files_parse, nproc = nproc, chunksize = chunksize, loglevel = loglevel, stop_event = stop_event):
+        if(status_function is not None):
+            status_function(i,nf,filename)
+        i += 1
+        scanned_files.append(filename)
+        results.append([filename,info_dict])
+        if(info_dict is not None):
+            info_dicts.append(info_dict)
+
+    if use_index:
+        index.update([[filename,stats[filename],info_dict] for filename,info_dict in results])
+        index.close()
+
+    info_dicts = [d for d in info_dicts if check_info_dict(d, station = station, start_time = start_time, stop_time = stop_time)]
+    data = info_dicts_to_data(info_dicts)
+    data['scanned_files'] = scanned_files
+    data['stopped'] = (stop_event is not None) and stop_event.is_set()
+    if(data['stopped']):
+        logger.info('Search stopped after ' + str(len(scanned_files)) + ' of ' + str(nf) + ' files')
+
+    return data
+
+
+def _parse_all(files, nproc, chunksize = None, loglevel = logging.WARNING, stop_event = None):
+    """ Generator parsing all files, either in the calling process or in a
+    pool of nproc processes, yields [filename,info_dict] in the order the
+    results arrive. If stop_event is set, no further files are parsed
+    """
+    nf = len(files)
+    if(nf == 0):
+        return
+
+    if(chunksize is None):
+        # Small chunks to keep the status updates flowing
+        chunksize = max(1,min(100,nf // (nproc * 4)))
+
+    chunks = [files[i:i+chunksize] for i in range(0,nf,chunksize)]
+    if((nproc == 1) or (len(chunks) == 1)):
+        for f in files:
+            if((stop_event is not None) and stop_event.is_set()):
+                return
+            for result in parse_files([f], loglevel = loglevel):
+                yield result
+    else:
+        # Spawn fresh interpreters, forking a process with a running GUI is not safe
+        mp_context = multiprocessing.get_context('spawn')
+        with concurrent.futures.ProcessPoolExecutor(max_workers = nproc, mp_context = mp_context) as executor:
+            futures = [executor.submit(parse_files, chunk, loglevel) for chunk in chunks]
+            for future in concurrent.futures.as_completed(futures):
+                for result in future.result():
+                    yield result
+                    if((stop_event is not None) and stop_event.is_set()):
+                        # Chunks already running are finished, but their results are not used
+                        executor.shutdown(wait = True, cancel_futures = True)
+                        return
+
+
+def info_dicts_to_data(info_dicts):
+    """ Sorts a list of info_dicts with respect to date and creates the
+    data dictionary as returned by pycnv_sum_folder.get_all_valid_files
+    """
+    # Replace invalid dates with an obviously wrong date to be able to sort them
+    date_invalid = datetime.datetime(1,1,1).replace(tzinfo=timezone('UTC'))
+    info_dicts = sorted(info_dicts, key = lambda d: d['date'] if d['date'] is not None else date_invalid)
+    data = {}
+    data['files']     = [d['file'] for d in info_dicts]
+    data['dates']     = [d['date'] for d in info_dicts]
+    data['lon']       = [d['lon'] for d in info_dicts]
+    data['lat']       = [d['lat'] for d in info_dicts]
+    data['info_dict'] = info_dicts
+    return data
@@ -0,0 +1,110 @@
+#
+# A persistent index of already parsed cnv/mrd files. Files are
+# identified by their path, size and modification time, if these did
+# not change the header information is taken from the index instead of
+# parsing the file again.
+#
+import os
+import sqlite3
+import logging
+import datetime
+import numpy as np
+
+logger = logging.getLogger('pyctd.scan_index')
+
+
+def default_index_file():
+    """ Returns the default filename of the index, located in the user cache directory
+    """
+    cache_dir = os.environ.get('XDG_CACHE_HOME',os.path.join(os.path.expanduser('~'),'.cache'))
+    return os.path.join(cache_dir,'pyctd','scan_index.sqlite')
+
+
+class scanIndex(object):
+    """ A SQLite index of parsed files keyed by path, size and mtime
+    Args:
+        filename: The filename of the index, if None default_index_file() is used
+    """
+    def __init__(self, filename = None):
+        if(filename is None):
+            filename = default_index_file()
+
+        dirname = os.path.dirname(filename)
+        if(len(dirname) > 0):
+            os.makedirs(dirname, exist_ok = True)
+
+        self.filename = filename
+        self.conn = sqlite3.connect(filename, timeout = 30)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, valid INTEGER, lon REAL, lat REAL, date TEXT, station TEXT, sha1 TEXT, type TEXT)')
+        self.conn.commit()
+        # Read the whole index at once, a lookup per file is much slower
+        self.entries = {}
+        for row in self.conn.execute('SELECT path, size, mtime, valid, lon, lat, date, station, sha1, type FROM files'):
+            self.entries[row[0]] = row[1:]
+
+        logger.info('Read ' + str(len(self.entries)) + ' entries from index ' + filename)
+
+    def get(self, filename, stat = None):
+        """ Looks up a file in the index
+        Args:
+            filename: The filename
+            stat: The os.stat result of the file, if None it is computed
+        Returns:
+            List with first entry a boolean if the file was found unchanged in the index and a second entry the info_dict (None for invalid files)
+        """
+        path = os.path.abspath(filename)
+        try:
+            entry = self.entries[path]
+        except KeyError:
+            return [False,None]
+
+        if(stat is None):
+            stat = os.stat(filename)
+
+        size,mtime,valid = entry[0:3]
+        if((size != stat.st_size) or (mtime != stat.st_mtime_ns)):
+            return [False,None]
+
+        if(valid == 0):
+            return [True,None]
+
+        lon,lat,date,station,sha1,ftype = entry[3:]
+        info_dict = {}
+        info_dict['lon']  = np.nan if lon is None else lon
+        info_dict['lat']  = np.nan if lat is None else lat
+        info_dict['date'] = None if date is None else datetime.datetime.fromisoformat(date)
+        if(station is not None):
+            info_dict['station'] = station
+        info_dict['file'] = filename
+        info_dict['sha1'] = sha1
+        info_dict['type'] = ftype
+        return [True,info_dict]
+
+    def update(self, entries):
+        """ Adds or replaces files in the index
+        Args:
+            entries: List of [filename,stat,info_dict], info_dict is None for invalid files
+        """
+        rows = []
+        for filename,stat,info_dict in entries:
+            path = os.path.abspath(filename)
+            if(info_dict is None):
+                row = (path,stat.st_size,stat.st_mtime_ns,0,None,None,None,None,None,None)
+            else:
+                lon = info_dict['lon']
+                lat = info_dict['lat']
+                date = info_dict['date']
+                row = (path,stat.st_size,stat.st_mtime_ns,1,
+                       None if np.isnan(lon) else float(lon),
+                       None if np.isnan(lat) else float(lat),
+                       None if date is None else date.isoformat(),
+                       info_dict.get('station'),info_dict['sha1'],info_dict['type'])
+
+            self.entries[path] = row[1:]
+            rows.append(row)
+
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO files VALUES (?,?,?,?,?,?,?,?,?,?)',rows)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,73 @@
+#
+# Binary session files. A session holds the casts (as castCatalogue
+# columns) together with the stations, transects and campaigns in one
+# numpy .npz file, which loads much faster than a yaml summary. The yaml
+# summaries remain the format to exchange data. The module does not
+# depend on Qt and can be used without the GUI.
+#
+import os
+import json
+import logging
+import datetime
+import numpy as np
+import pytz
+from pyctd import castdata
+from pyctd.summary import version
+
+logger = logging.getLogger('pyctd.session')
+
+session_format = 1
+
+
+def save_session(filename, data, meta = None):
+    """ Saves casts and metadata into a binary session file
+    Args:
+        filename: The filename, '.npz' is added if missing
+        data: The data dictionary or a castCatalogue
+        meta: Dictionary with the summaries of stations, transects, campaigns etc., needs to be JSON compatible
+    Returns:
+        The filename of the session file
+    """
+    if not(filename.endswith('.npz')):
+        filename += '.npz'
+
+    if(data is None):
+        data = castdata.castCatalogue()
+    elif not(isinstance(data, castdata.castCatalogue)):
+        data = castdata.castCatalogue(data)
+
+    if(meta is None):
+        meta = {}
+
+    session = {}
+    session['format']  = session_format
+    session['version'] = version
+    session['created'] = str(datetime.datetime.now(pytz.utc))
+    session['meta']    = meta
+
+    arrays = data.to_arrays()
+    arrays['session_json'] = np.array(json.dumps(session))
+    logger.info('Saving session with ' + str(data.ncasts) + ' casts to file:' + filename)
+    # Write to a temporary file first, a crash does not destroy an existing session
+    filename_tmp = filename + '.tmp.npz'
+    np.savez(filename_tmp, **arrays)
+    os.replace(filename_tmp, filename)
+    return filename
+
+
+def load_session(filename):
+    """ Loads a binary session file
+    Args:
+        filename: The filename
+    Returns:
+        List with first entry the castCatalogue with the casts and a second entry the meta dictionary
+    """
+    with np.load(filename, allow_pickle = False) as arrays:
+        session = json.loads(str(arrays['session_json']))
+        if(session['format'] > session_format):
+            raise ValueError('Session format ' + str(session['format']) + ' is newer than the supported format ' + str(session_format))
+
+        data = castdata.castCatalogue.from_arrays(arrays)
+
+    logger.info('Loaded session with ' + str(data.ncasts) + ' casts from file:' + filename)
+    return [data,session['meta']]
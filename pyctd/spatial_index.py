@@ -0,0 +1,180 @@
+#
+# A grid index of cast positions for fast radius and rectangle queries
+# on already loaded casts. The positions are sorted by grid cell, a
+# query only looks at the casts in the cells overlapping the bounding
+# box of the search area. The results are the same as with
+# scan.check_info_dict().
+#
+import logging
+import numpy as np
+from pyctd import scan as pyctd_scan
+
+logger = logging.getLogger('pyctd.spatial_index')
+
+# Mean earth radius [m], used for distances if pyproj is not installed
+earth_radius = 6371008.8
+
+
+def distance(lon, lat, lon0, lat0):
+    """ Computes the distances [m] between the positions lon, lat (arrays) and the position lon0, lat0 on the WGS84 ellipsoid. If pyproj is not installed the haversine distance on a sphere is used
+    """
+    lon = np.asarray(lon, dtype = float)
+    lat = np.asarray(lat, dtype = float)
+    g = pyctd_scan.get_geod()
+    if(g is not None):
+        az12,az21,dist = g.inv(lon, lat, np.full(lon.shape,lon0), np.full(lat.shape,lat0))
+        return np.asarray(dist)
+
+    lon, lat, lon0, lat0 = np.deg2rad(lon), np.deg2rad(lat), np.deg2rad(lon0), np.deg2rad(lat0)
+    a = np.sin((lat - lat0)/2)**2 + np.cos(lat) * np.cos(lat0) * np.sin((lon - lon0)/2)**2
+    return 2 * earth_radius * np.arcsin(np.sqrt(a))
+
+
+class spatialIndex(object):
+    """ Grid index of positions for radius and rectangle queries
+    Args:
+        lon: Array of the longitudes [decdeg]
+        lat: Array of the latitudes [decdeg]
+        cellsize: The size of the grid cells [decdeg]
+    """
+    def __init__(self, lon, lat, cellsize = 0.1):
+        self.lon = np.asarray(lon, dtype = float)
+        self.lat = np.asarray(lat, dtype = float)
+        self.cellsize = cellsize
+        valid = np.where(np.isfinite(self.lon) & np.isfinite(self.lat))[0]
+        if(len(valid) > 0):
+            self.lon_min = self.lon[valid].min()
+            self.lat_min = self.lat[valid].min()
+            ilon = self._ilon(self.lon[valid])
+            ilat = self._ilat(self.lat[valid])
+            self.nlon = int(ilon.max()) + 1
+            self.nlat = int(ilat.max()) + 1
+        else:
+            self.lon_min = 0.0
+            self.lat_min = 0.0
+            ilon = ilat = np.zeros(0,dtype=int)
+            self.nlon = self.nlat = 0
+
+        # Positions sorted by cell, cells are numbered row by row (latitude)
+        cells = ilat * self.nlon + ilon
+        isort = np.argsort(cells, kind = 'stable')
+        self._order = valid[isort]
+        self._cells = cells[isort]
+
+    def __len__(self):
+        return len(self.lon)
+
+    def _ilon(self, lon):
+        return np.floor((lon - self.lon_min) / self.cellsize).astype(int)
+
+    def _ilat(self, lat):
+        return np.floor((lat - self.lat_min) / self.cellsize).astype(int)
+
+    def _empty(self):
+        return np.zeros(0,dtype=int)
+
+    def _candidates(self, lon0, lat0, lon1, lat1):
+        """ Returns the indices of all positions in the cells overlapping the box
+        """
+        if(self.nlon == 0):
+            return self._empty()
+
+        # Clip before converting to int, the box can be infinite
+        ilon0 = int(max(0,np.floor((lon0 - self.lon_min) / self.cellsize)))
+        ilon1 = int(min(self.nlon - 1,np.floor((lon1 - self.lon_min) / self.cellsize)))
+        ilat0 = int(max(0,np.floor((lat0 - self.lat_min) / self.cellsize)))
+        ilat1 = int(min(self.nlat - 1,np.floor((lat1 - self.lat_min) / self.cellsize)))
+        if((ilon0 > ilon1) or (ilat0 > ilat1)):
+            return self._empty()
+
+        # One contiguous block of cells per latitude row
+        rows = np.arange(ilat0,ilat1 + 1) * self.nlon
+        starts = np.searchsorted(self._cells, rows + ilon0, side = 'left')
+        ends = np.searchsorted(self._cells, rows + ilon1, side = 'right')
+        return np.concatenate([self._order[s:e] for s,e in zip(starts,ends)])
+
+    def query_rectangle(self, lon0, lat0, lon1, lat1):
+        """ Returns the sorted indices of the positions within the rectangle (borders included)
+        """
+        ind = self._candidates(lon0, lat0, lon1, lat1)
+        lon = self.lon[ind]
+        lat = self.lat[ind]
+        ind = ind[(lon >= lon0) & (lon <= lon1) & (lat >= lat0) & (lat <= lat1)]
+        return np.sort(ind)
+
+    def query_radius(self, lon, lat, radius):
+        """ Returns the sorted indices of the positions closer than radius [m] to lon, lat
+        """
+        return self.query_radius_distance(lon, lat, radius)[0]
+
+    def query_radius_distance(self, lon, lat, radius):
+        """ Returns the sorted indices of the positions closer than radius [m] to lon, lat and their distances [m]
+        """
+        # Bounding box, with a margin for the ellipsoid
+        dlat = np.rad2deg(radius / earth_radius) * 1.01 + 1e-9
+        lat0 = lat - dlat
+        lat1 = lat + dlat
+        latmax = max(abs(lat0),abs(lat1))
+        lon0 = -np.inf # All longitudes close to the poles and across the dateline
+        lon1 = np.inf
+        if(latmax < 89.0):
+            dlon = dlat / np.cos(np.deg2rad(latmax))
+            if((lon - dlon >= -180) and (lon + dlon <= 180)):
+                lon0 = lon - dlon
+                lon1 = lon + dlon
+
+        ind = self._candidates(lon0, lat0, lon1, lat1)
+        if(len(ind) == 0):
+            return [ind,np.zeros(0)]
+
+        dist = distance(self.lon[ind], self.lat[ind], lon, lat)
+        inside = dist < radius
+        ind = ind[inside]
+        dist = dist[inside]
+        isort = np.argsort(ind)
+        return [ind[isort],dist[isort]]
+
+    def query_radius_many(self, lons, lats, radius):
+        """ Queries many positions at once
+        Args:
+            lons, lats: The positions, e.g. of stations
+            radius: The radius [m], either one for all positions or one per position
+        Returns:
+            List with the sorted indices for every position
+        """
+        radius = np.broadcast_to(np.asarray(radius, dtype = float), np.shape(lons))
+        return [self.query_radius(lon, lat, r) for lon,lat,r in zip(lons,lats,radius)]
+
+    def nearest(self, lons, lats, radius):
+        """ Finds for every indexed position the nearest of the given positions (e.g. stations) within radius
+        Args:
+            lons, lats: The positions, e.g. of stations
+            radius: The radius [m], either one for all positions or one per position
+        Returns:
+            List with first entry the index of the nearest position (-1 if none is within radius) and second entry the distance [m] (NaN if none is within radius) for every indexed position
+        """
+        radius = np.broadcast_to(np.asarray(radius, dtype = float), np.shape(lons))
+        inearest = np.full(len(self.lon),-1,dtype=int)
+        dnearest = np.full(len(self.lon),np.inf)
+        for i,(lon,lat,r) in enumerate(zip(lons,lats,radius)):
+            if not(np.isfinite(lon) and np.isfinite(lat)):
+                continue
+
+            ind,dist = self.query_radius_distance(lon, lat, r)
+            # The first position wins if distances are equal
+            closer = dist < dnearest[ind]
+            inearest[ind[closer]] = i
+            dnearest[ind[closer]] = dist[closer]
+
+        dnearest[inearest < 0] = np.nan
+        return [inearest,dnearest]
+
+    def query(self, station):
+        """ Query with the position criterion of scan.check_info_dict(), i.e. station is [lon,lat,radius] or a rectangle [lon0,lat0,lon1,lat1]
+        """
+        if(len(station) == 3):
+            return self.query_radius(station[0], station[1], station[2])
+        elif(len(station) == 4):
+            return self.query_rectangle(station[0], station[1], station[2], station[3])
+
+        raise ValueError('station needs 3 (radius) or 4 (rectangle) entries')
@@ -0,0 +1,431 @@
+#
+# Functions to create summaries of casts, stations and transects and to
+# write them as yaml, geojson or csv files. The module does not depend
+# on Qt and can be used without the GUI.
+#
+import os
+import re
+import csv
+import datetime
+import itertools
+import json
+import logging
+import numpy as np
+import pytz
+import yaml
+from pyctd import castdata
+
+# Get the version
+version_file = os.path.join(os.path.dirname(__file__),'VERSION')
+with open(version_file) as version_f:
+   version = version_f.read().strip()
+
+logger = logging.getLogger('pyctd.summary')
+
+# Reference coordinate system of the geojson files
+geojson_crs = { "type": "name", "properties": { "name": "urn:ogc:def:crs:OGC:1.3:CRS84" } }
+
+# Use the fast libyaml loader and dumper if available
+yaml_loader = getattr(yaml,'CSafeLoader',yaml.SafeLoader)
+yaml_dumper = getattr(yaml,'CSafeDumper',yaml.SafeDumper)
+
+class summaryDumper(yaml_dumper):
+    """ Safe yaml dumper that writes numpy scalars as plain numbers. No
+    anchors and aliases are written, the casts are dumped in chunks into
+    one document and anchors of different chunks would collide
+    """
+    def ignore_aliases(self, data):
+        return True
+
+summaryDumper.add_multi_representer(np.floating, lambda dumper, value: dumper.represent_float(float(value)))
+summaryDumper.add_multi_representer(np.integer, lambda dumper, value: dumper.represent_int(int(value)))
+
+# The csv columns and the catalogue columns they are read from
+csv_columns = {'date':'date','lon':'lon','lat':'lat','station':'station','station pyctd':'pyctd_station',
+               'campaign':'pyctd_campaign','comment':'pyctd_comment','file':'file','sha1':'sha1','type':'type'}
+csv_order = ['date','lon','lat','station','station pyctd','campaign','file','comment']
+csv_special = re.compile('[,"\n\r]') # Fields with these characters are quoted
+
+# Number of casts written at once into the yaml summary
+yaml_chunksize = 1000
+
+
+def load_yaml(stream):
+    """ Loads a yaml file (stream or string) with the safe loader, the libyaml loader is used if available
+    """
+    return yaml.load(stream, Loader = yaml_loader)
+
+
+def iter_cast_summary(data, foldername = None):
+    """ Generator of the summary of every cast. The summaries are created
+    one by one from the data, the data itself is not copied
+    Args:
+        data: The data dictionary with 'info_dict' and the pyctd specific fields or a castCatalogue
+        foldername: If not None, the filenames are made relative to the folder(s), see castdata.relative_filenames()
+    Returns:
+        Generator of dictionaries, the info_dict of the cast with a string date and 'station pyctd', 'comment' and 'campaign'
+    """
+    if(isinstance(data, castdata.castCatalogue)):
+        info_dicts = data.iter_info_dicts()
+        stations   = data.values('pyctd_station')
+        comments   = data.values('pyctd_comment')
+        campaigns  = data.values('pyctd_campaign')
+        if(foldername is not None): # Relative directories computed once
+            files = data.relative_files(foldername)
+    else:
+        info_dicts = (dict(c) for c in data['info_dict'])
+        stations   = data['pyctd_station']
+        comments   = data['pyctd_comment']
+        campaigns  = data['pyctd_campaign']
+
+    for i,cast in enumerate(info_dicts):
+        # Convert datetime objects into something readable
+        cast['date'] = str(cast['date'])
+        if(stations[i] is not None):
+            cast['station pyctd'] = stations[i]
+        else:
+            cast['station pyctd'] = ''
+
+        if(comments[i] is not None):
+            cast['comment'] = comments[i]
+        else:
+            cast['comment'] = ''
+
+        if(campaigns[i] is not None):
+            cast['campaign'] = campaigns[i]
+        else:
+            cast['campaign'] = ''
+
+        if((foldername is not None) and (cast['file'] is not None)):
+            if(isinstance(data, castdata.castCatalogue)):
+                cast['file'] = files[i]
+            else:
+                cast['file'] = castdata.relative_filename(cast['file'], foldername)
+
+        yield cast
+
+
+def create_cast_summary(data, foldername = None, lazy = False):
+    """ Creates a summary for all casts in the data dictionary
+    Args:
+        data: The data dictionary with 'info_dict' and the pyctd specific fields or a castCatalogue
+        foldername: If not None, the filenames are made relative to the folder(s), see castdata.relative_filenames()
+        lazy: If True 'casts' is the generator iter_cast_summary(), which can be consumed only once, otherwise a list
+    Returns:
+        Dictionary with the 'casts', the creation time and the pyctd version, empty if there are no casts
+    """
+    yaml_dict = {}
+    try:
+        data['info_dict']
+    except:
+        return {}
+
+    yaml_dict['created'] = str(datetime.datetime.now(pytz.utc))
+    yaml_dict['version'] = version
+    yaml_dict['casts']   = iter_cast_summary(data, foldername = foldername)
+    if not(lazy):
+        yaml_dict['casts'] = list(yaml_dict['casts'])
+
+    return yaml_dict
+
+
+def _geojson_point(lon, lat, precision = None):
+    """ Returns a geojson point geometry, None for invalid positions
+    """
+    if((lon is None) or (lat is None) or (lon != lon) or (lat != lat)): # NaN
+        return None
+    if(precision is not None):
+        lon = round(lon,precision)
+        lat = round(lat,precision)
+
+    return {'type':'Point','coordinates':[lon,lat]}
+
+
+def write_geojson_features(features, filename, name, ndjson = False):
+    """ Writes geojson features one by one into a file
+    Args:
+        features: Iterable of geojson feature dictionaries
+        filename: The filename
+        name: The name of the feature collection
+        ndjson: If True newline delimited geojson (GeoJSON sequence, one feature per line) is written instead of a FeatureCollection
+    Returns:
+        The number of written features
+    """
+    nfeatures = 0
+    # Values not known to json (e.g. datetimes) are written as str
+    encoder = json.JSONEncoder(default = str)
+    with open(filename, 'w', buffering = 1024 * 1024) as outfile:
+        if(ndjson):
+            for feature in features:
+                outfile.write(encoder.encode(feature))
+                outfile.write('\n')
+                nfeatures += 1
+        else:
+            outfile.write('{"type": "FeatureCollection", "name": ' + encoder.encode(name) + ', "crs": ' + encoder.encode(geojson_crs) + ', "features": [\n')
+            for feature in features:
+                if(nfeatures > 0):
+                    outfile.write(',\n')
+                outfile.write(encoder.encode(feature))
+                nfeatures += 1
+
+            outfile.write('\n]}\n')
+
+    return nfeatures
+
+
+def create_geojson_summary(summary,filename,name='CTD',properties='all',precision=6,ndjson=False):
+    """ Creates a geojson summary, the casts, stations and transects are written into separate files. The features are written one by one, the casts can be a generator (see create_cast_summary(lazy=True))
+    Args:
+        summary: The summary dictionary with 'casts', 'stations' and/or 'transects'
+        filename: The base filename
+        name: The name of the cast feature collection
+        properties: List of cast properties to be written, 'all' writes all properties of the casts
+        precision: Number of decimal places of the coordinates (6 is about 0.1 m), None for no rounding
+        ndjson: Write newline delimited geojson files (.geojsonl) instead of FeatureCollections, e.g. for large numbers of casts
+    """
+    if(ndjson):
+        extension = '.geojsonl'
+    else:
+        extension = '.geojson'
+
+    filename_base = filename
+    for ext in ['.geojsonl','.geojson']:
+        if(filename_base.endswith(ext)):
+            filename_base = filename_base[:-len(ext)]
+            break
+
+    filename_ctd       = filename_base + '_CTD_casts' + extension
+    filename_stations  = filename_base + '_stations' + extension
+    filename_transects = filename_base + '_transects' + extension
+    logger.info('Create geojson summary in file:' + filename_ctd)
+
+    #['date','lon','lat','station','campaign','file','comment']
+    casts = iter(summary.get('casts',[])) # The casts can be a list or a generator
+    try:
+        cast_first = next(casts)
+        casts = itertools.chain([cast_first],casts)
+    except StopIteration:
+        cast_first = None
+
+    if(cast_first is not None):
+        def cast_features():
+            for d in casts:
+                if(properties == 'all'):
+                    prop = dict(d)
+                else: # Property not there, e.g. station not existing in MRD files.
+                    prop = {o:d[o] for o in properties if o in d}
+
+                for o in ('lon','lat'): # NaN is not valid json
+                    if((o in prop) and (prop[o] != prop[o])):
+                        prop[o] = None
+
+                yield {'type':'Feature','geometry':_geojson_point(d['lon'],d['lat'],precision),'properties':prop}
+
+        write_geojson_features(cast_features(), filename_ctd, name, ndjson = ndjson)
+
+    if(len(summary.get('stations',[])) > 0):
+        def station_features():
+            for d in summary['stations']:
+                yield {'type':'Feature','geometry':_geojson_point(d['lon'],d['lat'],precision),'properties':dict(d)}
+
+        write_geojson_features(station_features(), filename_stations, 'stations', ndjson = ndjson)
+
+    if(len(summary.get('transects',{}).get('name',[])) > 0):
+        #self.tran['name']          
+        #self.tran['numbers']       
+        #self.tran['station_names'] 
+        #self.tran['station_lon']   
+        #self.tran['station_lat']   
+        def transect_features():
+            transects = summary['transects']
+            for i,tname in enumerate(transects['name']):
+                lon = transects['station_lon'][i]
+                lat = transects['station_lat'][i]
+                if(precision is not None):
+                    lon = [round(l,precision) for l in lon]
+                    lat = [round(l,precision) for l in lat]
+
+                coordinates = [[lon[k],lat[k]] for k in range(len(lon))]
+                geometry = {'type':'LineString','coordinates':coordinates}
+                yield {'type':'Feature','geometry':geometry,'properties':{'name':tname}}
+
+        write_geojson_features(transect_features(), filename_transects, 'transects', ndjson = ndjson)
+
+
+def create_yaml_summary(summary,filename):
+    """ Creates a yaml summary. The casts are written in chunks of
+    yaml_chunksize, they can be given as a list or any other iterable
+    """
+    if ('.yaml' not in filename):
+        filename += '.yaml'
+        
+    logger.info('Create yaml summary in file:' + filename)
+    with open(filename, 'w') as outfile:
+        for key in sorted(summary.keys()):
+            if(key != 'casts'):
+                yaml.dump({key:summary[key]}, outfile, Dumper = summaryDumper, default_flow_style=False)
+                continue
+
+            casts = iter(summary['casts'])
+            chunk = list(itertools.islice(casts,yaml_chunksize))
+            if(len(chunk) == 0):
+                outfile.write('casts: []\n')
+                continue
+
+            outfile.write('casts:\n')
+            while(len(chunk) > 0):
+                yaml.dump(chunk, outfile, Dumper = summaryDumper, default_flow_style=False)
+                chunk = list(itertools.islice(casts,yaml_chunksize))
+
+
+def create_csv_summary(summary,filename,order=csv_order):
+    """ Creates a csv summary from the casts of a summary dictionary (list or generator, see create_cast_summary()). For a castCatalogue create_csv_catalogue_summary() is much faster
+    Args:
+        summary: The summary dictionary with 'casts'
+        filename: The filename
+        order: The columns of the csv file, missing properties (e.g. station of MRD files) are written as empty fields
+    """
+    logger.info('Create csv summary in file:' + filename)
+    with open(filename, 'w', newline = '', buffering = 1024 * 1024) as outfile:
+        writer = csv.writer(outfile, lineterminator = '\n')
+        writer.writerow(order)
+        writer.writerows([d.get(o) for o in order] for d in summary.get('casts',[]))
+
+
+def _csv_fields(values):
+    """ Converts a column into csv fields, quoted the same as by the csv module (QUOTE_MINIMAL), None is an empty field
+    """
+    if(len(values) == 0):
+        return values
+    if(isinstance(values[0], float)):
+        return list(map(repr,values))
+
+    fields = ['' if v is None else str(v) for v in values]
+    # Most columns do not need quoting at all, search the special characters in all fields at once
+    text = '\x00'.join(fields)
+    positions = [m.start() for m in csv_special.finditer(text)]
+    if(len(positions) == 0):
+        return fields
+
+    ends = np.cumsum([len(f) + 1 for f in fields])
+    for i in set(np.searchsorted(ends, positions, side = 'right').tolist()):
+        fields[i] = '"' + fields[i].replace('"','""') + '"'
+
+    return fields
+
+
+def _csv_dates(datenum):
+    """ Converts dates (microseconds since 1970 UTC) into the strings of str(datetime), invalid dates are empty strings
+    """
+    dates = np.datetime_as_string(datenum.view('datetime64[us]'), unit = 's')
+    dates = np.char.add(np.char.replace(dates,'T',' '),'+00:00').tolist()
+    invalid = (datenum == castdata.date_invalid)
+    for i in np.where(invalid)[0]:
+        dates[i] = ''
+    # Dates with fractional seconds
+    for i in np.where(((datenum % 1000000) != 0) & ~invalid)[0]:
+        dates[i] = str(castdata.from_datenum(datenum[i]))
+
+    return dates
+
+
+def create_csv_catalogue_summary(data,filename,order=csv_order,foldername=None,chunksize=100000):
+    """ Creates a csv summary directly from the columns of a castCatalogue
+    Args:
+        data: The castCatalogue or a data dictionary (converted into a castCatalogue)
+        filename: The filename
+        order: The columns of the csv file, possible are 'date', 'lon', 'lat', 'station', 'station pyctd', 'campaign', 'comment', 'file', 'sha1' and 'type'
+        foldername: If not None, the filenames are made relative to the folder(s), see castdata.relative_filenames()
+        chunksize: Number of casts converted at once
+    """
+    if not(isinstance(data, castdata.castCatalogue)):
+        data = castdata.castCatalogue(data)
+
+    for o in order:
+        if(o not in csv_columns):
+            raise ValueError('Unknown csv column: ' + str(o))
+
+    logger.info('Create csv summary in file:' + filename)
+    with open(filename, 'w', newline = '', buffering = 1024 * 1024) as outfile:
+        writer = csv.writer(outfile, lineterminator = '\n')
+        writer.writerow(order)
+        # The columns are converted to csv fields in bulk, which is much faster than csv.writer.writerows
+        for i0 in range(0,data.ncasts,chunksize):
+            i1 = min(i0 + chunksize,data.ncasts)
+            columns = []
+            for o in order:
+                if(o == 'date'):
+                    column = _csv_dates(data.datenum[i0:i1])
+                elif((o == 'file') and (foldername is not None)):
+                    column = data.relative_files(foldername,i0,i1)
+                else:
+                    column = data.values(csv_columns[o],i0,i1)
+
+                columns.append(_csv_fields(column))
+
+            outfile.writelines(','.join(row) + '\n' for row in zip(*columns))
+
+
+def _import_pyarrow():
+    """ Imports pyarrow, which is an optional dependency needed for the parquet export
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('pyarrow is needed for the parquet export, install it with: pip install pyarrow')
+
+    return pyarrow
+
+
+def create_arrow_table(data,foldername=None):
+    """ Creates a pyarrow table of the casts from the columns of a castCatalogue. The strings stored categorical in the catalogue are dictionary encoded
+    Args:
+        data: The castCatalogue or a data dictionary (converted into a castCatalogue)
+        foldername: If not None, the filenames are made relative to the folder(s), see castdata.relative_filenames()
+    Returns:
+        pyarrow.Table with the columns date (UTC timestamp), lon, lat, station, station_pyctd, campaign, comment, file, sha1 and type
+    """
+    pa = _import_pyarrow()
+    if not(isinstance(data, castdata.castCatalogue)):
+        data = castdata.castCatalogue(data)
+
+    def categorical(column):
+        codes = data.codes(column)
+        categories = data.categories(column)
+        # Codes below 0 are None or not existing (station of MRD files)
+        indices = pa.array(codes, type = pa.int32(), mask = codes < 0)
+        return pa.DictionaryArray.from_arrays(indices, pa.array(categories, type = pa.string()))
+
+    if(foldername is not None):
+        files = data.relative_files(foldername)
+    else:
+        files = data.values('file')
+
+    columns = {}
+    columns['date'] = pa.array(data.datenum, type = pa.timestamp('us', tz = 'UTC'), mask = data.datenum == castdata.date_invalid)
+    columns['lon']  = pa.array(data.lon, type = pa.float64())
+    columns['lat']  = pa.array(data.lat, type = pa.float64())
+    columns['station']       = categorical('station')
+    columns['station_pyctd'] = categorical('pyctd_station')
+    columns['campaign']      = categorical('pyctd_campaign')
+    columns['comment']       = pa.array(data.values('pyctd_comment'), type = pa.string())
+    columns['file']          = pa.array(files, type = pa.string())
+    columns['sha1']          = pa.array(data.values('sha1'), type = pa.string())
+    columns['type']          = categorical('type')
+    return pa.table(columns, metadata = {'pyctd_version':version,'created':str(datetime.datetime.now(pytz.utc))})
+
+
+def create_parquet_summary(data,filename,foldername=None,compression='zstd',row_group_size=100000):
+    """ Creates a parquet file of the casts, see create_arrow_table(). pyarrow is needed
+    Args:
+        data: The castCatalogue or a data dictionary
+        filename: The filename
+        foldername: If not None, the filenames are made relative to the folder(s), see castdata.relative_filenames()
+        compression: The parquet compression
+        row_group_size: The number of casts per row group, readers skip row groups using their statistics (e.g. of date, lon, lat)
+    """
+    pa = _import_pyarrow()
+    logger.info('Create parquet summary in file:' + filename)
+    table = create_arrow_table(data, foldername = foldername)
+    pa.parquet.write_table(table, filename, compression = compression, row_group_size = row_group_size)
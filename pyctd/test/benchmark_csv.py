@@ -0,0 +1,76 @@
+#
+# Throughput benchmark of the csv export. The csv summary created from
+# the cast summary (create_csv_summary) is compared with the csv written
+# directly from the columns of the cast catalogue
+# (create_csv_catalogue_summary).
+#
+# python benchmark_csv.py [number of casts ...], default 100000 1000000
+#
+import sys
+import os
+import time
+import datetime
+import random
+import tempfile
+import pytz
+from pyctd import castdata
+from pyctd import summary as pyctd_summary
+
+
+def create_catalogue(ncasts, chunksize = 100000):
+    catalogue = castdata.castCatalogue()
+    date0 = datetime.datetime(2019,1,1,tzinfo=pytz.utc)
+    for i0 in range(0,ncasts,chunksize):
+        data = {'info_dict':[]}
+        for i in range(i0,min(i0 + chunksize,ncasts)):
+            cast = {}
+            cast['lon']  = 10.0 + 10 * random.random()
+            cast['lat']  = 54.0 + 5 * random.random()
+            cast['date'] = date0 + datetime.timedelta(minutes=i)
+            if(i % 10 > 0): # Every tenth cast is a MRD cast without station
+                cast['station'] = 'TF{:04d}'.format(i % 300)
+            cast['file'] = '/data/cruise{:03d}/cast{:06d}.cnv'.format(i // 500,i)
+            cast['sha1'] = '{:040x}'.format(random.getrandbits(160))
+            cast['type'] = 'CNV'
+            data['info_dict'].append(cast)
+
+        castdata.add_pyctd_fields(data)
+        data['pyctd_station']  = ['TF0271' if i % 3 == 0 else None for i in range(len(data['info_dict']))]
+        data['pyctd_campaign'] = ['EMB{:03d}'.format(i0 // chunksize)] * len(data['info_dict'])
+        data['pyctd_comment'][0] = 'Comment with "quotes", commas and\na newline'
+        catalogue.extend(data)
+
+    return catalogue
+
+
+if(len(sys.argv) > 1):
+    ncasts_all = [int(n) for n in sys.argv[1:]]
+else:
+    ncasts_all = [100000,1000000]
+
+tmpdir = tempfile.mkdtemp()
+filename = os.path.join(tmpdir,'casts.csv')
+for ncasts in ncasts_all:
+    catalogue = create_catalogue(ncasts)
+    print('{:d} casts'.format(ncasts))
+    t = time.perf_counter()
+    summary = pyctd_summary.create_cast_summary(catalogue, foldername = '/data', lazy = True)
+    pyctd_summary.create_csv_summary(summary, filename)
+    dt = time.perf_counter() - t
+    print('    {:30s} {:8.2f} s {:10.0f} rows/s {:8.1f} MB'.format('create_csv_summary',dt,ncasts/dt,os.path.getsize(filename)/1e6))
+    with open(filename) as f:
+        csv_summary = f.read()
+
+    t = time.perf_counter()
+    pyctd_summary.create_csv_catalogue_summary(catalogue, filename, foldername = '/data')
+    dt = time.perf_counter() - t
+    print('    {:30s} {:8.2f} s {:10.0f} rows/s {:8.1f} MB'.format('create_csv_catalogue_summary',dt,ncasts/dt,os.path.getsize(filename)/1e6))
+    with open(filename) as f:
+        csv_catalogue = f.read()
+
+    if(csv_summary != csv_catalogue):
+        print('    The csv files differ')
+        sys.exit(1)
+
+os.remove(filename)
+os.rmdir(tmpdir)
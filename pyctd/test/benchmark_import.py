@@ -0,0 +1,41 @@
+#
+# Benchmark of the import time of pyctd. The package root, the summary
+# writers, the data model and the batch tool have to be importable
+# without Qt, cartopy, matplotlib and pycnv. Every module is imported
+# in a fresh interpreter, the script exits with 1 if a heavy module was
+# imported.
+#
+# python benchmark_import.py
+#
+import subprocess
+import sys
+
+modules = ['pyctd','pyctd.summary','pyctd.castdata','pyctd.scan','pyctd.scan_index','pyctd.session',
+           'pyctd.spatial_index','pyctd.profiles','pyctd.gridded','pyctd.ragged','pyctd.watch','pyctd.castmap','pyctd.batch']
+heavy_modules = ['PyQt5','qtpy','cartopy','matplotlib','pycnv','pysst','pyproj','gsw']
+
+code = """
+import sys, time
+t = time.perf_counter()
+import {:s}
+dt = time.perf_counter() - t
+heavy = sorted(set(m.split('.')[0] for m in sys.modules) & set({:s}))
+print(dt, ','.join(heavy))
+"""
+
+FLAG_GOOD = True
+for m in modules:
+    # Best of three runs
+    times = []
+    for i in range(3):
+        out = subprocess.run([sys.executable,'-c',code.format(m,str(heavy_modules))],capture_output=True,text=True,check=True).stdout.split()
+        times.append(float(out[0]))
+
+    heavy = out[1] if len(out) > 1 else ''
+    print('{:20s} {:6.3f} s {:s}'.format(m,min(times),heavy))
+    if(len(heavy) > 0):
+        print('    imports heavy modules: ' + heavy)
+        FLAG_GOOD = False
+
+if(FLAG_GOOD == False):
+    sys.exit(1)
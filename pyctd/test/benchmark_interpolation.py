@@ -0,0 +1,60 @@
+#
+# Benchmark of the interpolation of many casts onto a common pressure
+# axis. The loop with np.interp for every cast and variable (as in
+# make_netcdf.py) is compared with the vectorized interpolation of the
+# ragged profiles (pyctd.gridded.interpolate_ragged), both results have
+# to be the same.
+#
+# python benchmark_interpolation.py [number of casts ...], default 5000 50000
+#
+import sys
+import time
+import numpy as np
+from pyctd import gridded
+
+
+def create_profiles(ncasts, nvariables = 2):
+    """ Synthetic downcasts with different lengths and depths and some missing values
+    """
+    rng = np.random.default_rng(1)
+    rowsizes = rng.integers(100,1000,ncasts)
+    offsets = np.concatenate(([0],np.cumsum(rowsizes)))
+    p = np.concatenate([np.sort(rng.uniform(0,rng.uniform(20,250),n)) for n in rowsizes])
+    values = rng.normal(10,2,(nvariables,len(p)))
+    values[:,rng.integers(0,len(p),len(p) // 100)] = np.nan
+    return [p,values,offsets]
+
+
+def interpolate_loop(p, values, offsets, p_int):
+    data_int = np.full((len(values),len(offsets) - 1,len(p_int)),np.nan)
+    for i in range(len(offsets) - 1):
+        pi = p[offsets[i]:offsets[i+1]]
+        for j,v in enumerate(values):
+            vi = v[offsets[i]:offsets[i+1]]
+            good = np.isfinite(vi)
+            if(good.sum() >= 2):
+                data_int[j,i] = np.interp(p_int, pi[good], vi[good], left = np.nan, right = np.nan)
+
+    return np.ma.masked_invalid(data_int)
+
+
+if(len(sys.argv) > 1):
+    ncasts_all = [int(n) for n in sys.argv[1:]]
+else:
+    ncasts_all = [5000,50000]
+
+p_int = np.arange(0,245,0.25)
+for ncasts in ncasts_all:
+    p,values,offsets = create_profiles(ncasts)
+    print('{:d} casts, {:d} samples, {:d} variables'.format(ncasts,len(p),len(values)))
+    t = time.perf_counter()
+    data_loop = interpolate_loop(p, values, offsets, p_int)
+    dt = time.perf_counter() - t
+    print('    {:20s} {:8.2f} s'.format('np.interp loop',dt))
+    t = time.perf_counter()
+    data_ragged = gridded.interpolate_ragged(p, values, offsets, p_int)
+    dt = time.perf_counter() - t
+    print('    {:20s} {:8.2f} s'.format('interpolate_ragged',dt))
+    if not(np.array_equal(data_loop.mask,data_ragged.mask) and np.ma.allclose(data_loop,data_ragged)):
+        print('    The interpolated data differs')
+        sys.exit(1)
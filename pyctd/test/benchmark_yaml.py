@@ -0,0 +1,98 @@
+#
+# Benchmark of writing and reading yaml cast summaries. The pure python
+# yaml dump/safe_load of the whole summary is compared with the chunked
+# writing and the libyaml loader of pyctd.summary, for each the time
+# and the peak memory (tracemalloc) is printed. The 100000 casts
+# with the pure python yaml take a while.
+#
+# python benchmark_yaml.py [number of casts ...], default 10000 100000
+#
+import sys
+import os
+import time
+import datetime
+import random
+import tempfile
+import tracemalloc
+import pytz
+import yaml
+from pyctd import summary as pyctd_summary
+
+
+def create_summary(ncasts):
+    casts = []
+    date0 = datetime.datetime(2019,1,1,tzinfo=pytz.utc)
+    for i in range(ncasts):
+        cast = {}
+        cast['lon']  = 10.0 + 10 * random.random()
+        cast['lat']  = 54.0 + 5 * random.random()
+        cast['date'] = str(date0 + datetime.timedelta(minutes=i))
+        cast['station'] = 'TF{:04d}'.format(i % 300)
+        cast['file'] = './cruise{:03d}/cast{:06d}.cnv'.format(i // 500,i)
+        cast['sha1'] = '{:040x}'.format(random.getrandbits(160))
+        cast['type'] = 'CNV'
+        cast['station pyctd'] = ''
+        cast['comment']  = ''
+        cast['campaign'] = ''
+        casts.append(cast)
+
+    return {'created':str(datetime.datetime.now(pytz.utc)),'version':pyctd_summary.version,'casts':casts}
+
+
+def measure(function):
+    """ Runs function twice, once for the time and once with tracemalloc (which slows down a lot) for the peak memory
+    """
+    t = time.perf_counter()
+    result = function()
+    dt = time.perf_counter() - t
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return [dt,peak,result]
+
+
+def save_pure(summary,filename):
+    with open(filename,'w') as outfile:
+        yaml.dump(summary, outfile, default_flow_style=False)
+
+
+def load_pure(filename):
+    with open(filename) as stream:
+        return yaml.safe_load(stream)
+
+
+def load_pyctd(filename):
+    with open(filename) as stream:
+        return pyctd_summary.load_yaml(stream)
+
+
+if(len(sys.argv) > 1):
+    ncasts_all = [int(n) for n in sys.argv[1:]]
+else:
+    ncasts_all = [10000,100000]
+
+print('libyaml available:',yaml.__with_libyaml__)
+tmpdir = tempfile.mkdtemp()
+for ncasts in ncasts_all:
+    summary = create_summary(ncasts)
+    filename_pure  = os.path.join(tmpdir,'pure_{:d}.yaml'.format(ncasts))
+    filename_pyctd = os.path.join(tmpdir,'pyctd_{:d}.yaml'.format(ncasts))
+    results = []
+    results.append(['save pure python'] + measure(lambda: save_pure(summary,filename_pure)))
+    results.append(['save pyctd']       + measure(lambda: pyctd_summary.create_yaml_summary(summary,filename_pyctd)))
+    results.append(['load pure python'] + measure(lambda: load_pure(filename_pure)))
+    results.append(['load pyctd']       + measure(lambda: load_pyctd(filename_pyctd)))
+    print('{:d} casts'.format(ncasts))
+    for name,dt,peak,result in results:
+        print('    {:20s} {:8.2f} s {:8.1f} MB peak'.format(name,dt,peak/1e6))
+
+    # Both files have the same content
+    if(results[2][3] != results[3][3]):
+        print('    The content of the files differs')
+        sys.exit(1)
+
+    os.remove(filename_pure)
+    os.remove(filename_pyctd)
+
+os.rmdir(tmpdir)
@@ -2,6 +2,8 @@
 # Example script of the pycnv package to read in a bunch of CTD files,
 # interpolate them to a common pressure axis and to create a netCDF
 # containing conservative temperature and absolute salinity
+# The same for one or many stations, in parallel and with configurable
+# variables, is done by pyctd-gridded (pyctd.gridded)
 #
 
 import pycnv
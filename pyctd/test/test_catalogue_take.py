@@ -0,0 +1,51 @@
+#
+# Checks of castCatalogue.take: selecting casts by a list of indices or
+# a boolean mask gives a new catalogue with the casts and their pyctd
+# fields, an empty selection gives an empty catalogue.
+#
+# python test_catalogue_take.py (or pytest)
+#
+import datetime
+import numpy as np
+import pytz
+from pyctd import castdata
+
+
+def create_catalogue(n = 4):
+    info_dicts = []
+    for i in range(n):
+        info_dicts.append({'lon':12.0 + i,'lat':54.0,'date':datetime.datetime(2019,1,1 + i,tzinfo=pytz.utc),'file':'/data/' + str(i) + '.cnv','sha1':str(i),'type':'CNV'})
+
+    data = {'info_dict':info_dicts}
+    castdata.add_pyctd_fields(data)
+    data['pyctd_station'][2] = 'TF1'
+    data['pyctd_comment'][3] = 'test'
+    return castdata.castCatalogue(data)
+
+
+def test_take_indices():
+    cat = create_catalogue().take([3,2,-4])
+    assert cat.ncasts == 3
+    assert cat.get_sha1() == ['3','2','0']
+    assert list(cat['pyctd_station']) == [None,'TF1',None]
+    assert list(cat['pyctd_comment']) == ['test',None,None]
+    assert list(cat.lon) == [15.0,14.0,12.0]
+
+
+def test_take_mask():
+    cat = create_catalogue().take(np.array([False,True,True,False]))
+    assert cat.get_sha1() == ['1','2']
+    assert list(cat['pyctd_station']) == [None,'TF1']
+
+
+def test_take_empty():
+    assert castdata.castCatalogue().take([]).ncasts == 0
+    assert create_catalogue().take([]).ncasts == 0
+    assert create_catalogue().take(np.zeros(4,dtype=bool)).ncasts == 0
+
+
+if __name__ == '__main__':
+    test_take_indices()
+    test_take_mask()
+    test_take_empty()
+    print('ok')
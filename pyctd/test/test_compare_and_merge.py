@@ -0,0 +1,95 @@
+#
+# Checks of castdata.compare_and_merge_data: merging into the cast
+# catalogue has to give the same casts and pyctd fields as merging into
+# a plain data dictionary, also if the new casts contain the same file
+# (sha1) twice, e.g. a file copied into two folders. The sha1 index
+# keeps the first cast of a sha1 and is reused between merges.
+#
+# python test_compare_and_merge.py (or pytest)
+#
+import datetime
+import pytz
+from pyctd import castdata
+
+
+def create_data(sha1s, stations):
+    info_dicts = []
+    for i,sha1 in enumerate(sha1s):
+        info_dicts.append({'lon':12.0 + i,'lat':54.0,'date':datetime.datetime(2019,1,1 + i,tzinfo=pytz.utc),'file':'/data/' + str(i) + '.cnv','sha1':sha1,'type':'CNV'})
+
+    data = {'info_dict':info_dicts,'pyctd_station':list(stations)}
+    castdata.add_pyctd_fields(data)
+    return data
+
+
+def merge(data):
+    data_new = create_data(['b','c','b'], [None,None,'TF1'])
+    [data,sha1_index] = castdata.compare_and_merge_data(data, data_new)
+    return data
+
+
+def test_duplicate_sha1():
+    data_list = merge(create_data(['a'], [None]))
+    data_cat = merge(castdata.castCatalogue(create_data(['a'], [None])))
+    assert data_cat.ncasts == len(data_list['info_dict']) == 3
+    assert [c['sha1'] for c in data_cat['info_dict']] == [c['sha1'] for c in data_list['info_dict']]
+    assert list(data_cat['pyctd_station']) == list(data_list['pyctd_station']) == [None,'TF1',None]
+
+
+def test_duplicate_sha1_existing():
+    data_cat = merge(castdata.castCatalogue(create_data(['b'], ['TF0'])))
+    assert data_cat.ncasts == 2
+    assert list(data_cat['pyctd_station']) == ['TF1',None]
+
+
+def test_first_duplicate_updated():
+    for data in [create_data(['a','a'], [None,None]),castdata.castCatalogue(create_data(['a','a'], [None,None]))]:
+        [data,sha1_index] = castdata.compare_and_merge_data(data, create_data(['a'], ['TF1']))
+        assert list(data['pyctd_station']) == ['TF1',None]
+        assert sha1_index['a'] == 0
+
+
+def test_missing_sha1():
+    data = create_data(['a','b','c'], [None,None,None])
+    del data['info_dict'][1]['sha1']
+    data['info_dict'][2]['sha1'] = None
+    sha1_index = castdata.create_sha1_index(data)
+    assert dict(sha1_index) == {'a':0}
+    # Casts without a sha1 are added, casts with a known sha1 are merged
+    data_new = create_data(['d','a'], ['TF2','TF1'])
+    data_new['info_dict'][0]['sha1'] = None
+    [data,sha1_index] = castdata.compare_and_merge_data(data, data_new, sha1_index = sha1_index)
+    assert len(data['info_dict']) == 4
+    assert list(data['pyctd_station']) == ['TF1',None,None,'TF2']
+
+
+def test_index_reused():
+    for data in [create_data(['a','a',None], [None,None,None]),castdata.castCatalogue(create_data(['a','a',None], [None,None,None]))]:
+        [data,sha1_index] = castdata.compare_and_merge_data(data, create_data(['b'], [None]))
+        [data,sha1_index_2] = castdata.compare_and_merge_data(data, create_data(['b','c'], ['TF1',None]), sha1_index = sha1_index)
+        assert sha1_index_2 is sha1_index
+        assert sha1_index.nrows == 5
+        assert dict(sha1_index) == {'a':0,'b':3,'c':4}
+        assert list(data['pyctd_station']) == [None,None,None,'TF1',None]
+
+
+def test_index_added_rows():
+    data = create_data(['a'], [None])
+    sha1_index = castdata.create_sha1_index(data)
+    data['info_dict'].append({'sha1':'b'})
+    for field in ['pyctd_plot_map','pyctd_station','pyctd_campaign','pyctd_comment']:
+        data[field].append([] if field == 'pyctd_plot_map' else None)
+    [data,sha1_index_2] = castdata.compare_and_merge_data(data, create_data(['b'], ['TF1']), sha1_index = sha1_index)
+    assert sha1_index_2 is sha1_index
+    assert len(data['info_dict']) == 2
+    assert list(data['pyctd_station']) == [None,'TF1']
+
+
+if __name__ == '__main__':
+    test_duplicate_sha1()
+    test_duplicate_sha1_existing()
+    test_first_duplicate_updated()
+    test_missing_sha1()
+    test_index_reused()
+    test_index_added_rows()
+    print('ok')
@@ -0,0 +1,90 @@
+#
+# Checks that the units of the variables end up in the gridded netCDF
+# files and in the profile store. pycnv keys the units of the raw data by the original column
+# names (units, e.g. 't090C') and by the standard names (units_std,
+# e.g. 'T0'), the products use the standard names.
+#
+# python test_profile_units.py (or pytest)
+#
+import os
+import datetime
+import tempfile
+import pytz
+import numpy as np
+from pyctd import castdata
+from pyctd import gridded as pyctd_gridded
+from pyctd import ragged as pyctd_ragged
+
+cnv_header = """* Sea-Bird SBE 9 Data File:
+* NMEA Latitude = 54 46.95 N
+* NMEA Longitude = 012 12.91 E
+* NMEA UTC (Time) = Jun 01 2019 12:00:00
+# nquan = 3
+# nvalues = 20
+# units = specified
+# name 0 = prDM: Pressure, Digiquartz [db]
+# name 1 = t090C: Temperature [ITS-90, deg C]
+# name 2 = c0mS/cm: Conductivity [mS/cm]
+# start_time = Jun 01 2019 12:00:00
+# file_type = ascii
+*END*
+"""
+
+
+def write_cnv(foldername):
+    filename = os.path.join(foldername, 'cast.cnv')
+    with open(filename, 'w') as f:
+        f.write(cnv_header)
+        for k in range(20):
+            f.write('%11.3f %11.4f %11.5f\n' % (k,10 - k * 0.1,30 + k * 0.01))
+
+    return filename
+
+
+def test_read_profile_units():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = write_cnv(tmpdir)
+        [p,values,units] = pyctd_gridded.read_profile(filename, 'CNV', ['T0','C0','t090C','SA00','nothere'])
+
+    assert len(p) == 20
+    assert units == ['ITS-90, deg C','mS/cm','ITS-90, deg C','g/kg',None]
+    assert np.all(np.isnan(values[4]))
+
+
+def test_gridded_netcdf_units():
+    netCDF4 = pyctd_gridded._import_netcdf4()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = write_cnv(tmpdir)
+        data = {'info_dict':[{'lon':12.2,'lat':54.8,'date':datetime.datetime(2019,6,1,12,tzinfo=pytz.utc),'file':filename,'sha1':'a','type':'CNV'}]}
+        castdata.add_pyctd_fields(data)
+        ncfile = os.path.join(tmpdir, 'cast.nc')
+        ncasts = pyctd_gridded.create_gridded_netcdf(data, ncfile, rows = [0], p_int = np.arange(0,20,1.0), variables = ['T0','SA00'], nproc = 1)
+        with netCDF4.Dataset(ncfile) as nc:
+            assert nc.variables['T0'].units == 'ITS-90, deg C'
+            assert nc.variables['SA00'].units == 'g/kg'
+
+    assert ncasts == 1
+
+
+def test_profile_store_units():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = write_cnv(tmpdir)
+        data = {'info_dict':[{'lon':12.2,'lat':54.8,'date':datetime.datetime(2019,6,1,12,tzinfo=pytz.utc),'file':filename,'sha1':'a','type':'CNV'}]}
+        castdata.add_pyctd_fields(data)
+        storefile = os.path.join(tmpdir, 'profiles.nc')
+        ncasts = pyctd_ragged.create_profile_store(data, storefile, variables = ['T0','C0','SA00'], nproc = 1)
+        with pyctd_ragged.profileStore(storefile) as store:
+            assert store.units('T0') == 'ITS-90, deg C'
+            assert store.units('C0') == 'mS/cm'
+            assert store.units('SA00') == 'g/kg'
+            [p,values,units] = store.read_profile('a', ['T0','nothere'])
+
+    assert ncasts == 1
+    assert units == ['ITS-90, deg C',None]
+
+
+if __name__ == '__main__':
+    test_read_profile_units()
+    test_gridded_netcdf_units()
+    test_profile_store_units()
+    print('ok')
@@ -0,0 +1,38 @@
+#
+# Checks of castdata.relative_filenames: the filenames are relative to
+# the common parent of the data folders, i.e. files of different data
+# folders with the same name can be told apart.
+#
+# python test_relative_filenames.py (or pytest)
+#
+import os
+from pyctd import castdata
+
+
+def test_one_folder():
+    files = ['/data/d1/a.cnv','/data/d1/sub/b.cnv','/other/c.cnv',None,'./d.cnv']
+    rel = castdata.relative_filenames(files, '/data/d1/')
+    assert rel == [os.path.join('.','a.cnv'),os.path.join('.','sub','b.cnv'),'/other/c.cnv',None,'./d.cnv']
+
+
+def test_several_folders():
+    files = ['/data/d1/a.cnv','/data/d2/a.cnv','/data/d1/sub/b.cnv']
+    rel = castdata.relative_filenames(files, ['/data/d1','/data/d2'])
+    assert rel == [os.path.join('.','d1','a.cnv'),os.path.join('.','d2','a.cnv'),os.path.join('.','d1','sub','b.cnv')]
+    assert castdata.common_folder(['/data/d1','/data/d2/']) == os.path.normpath('/data')
+
+
+def test_catalogue():
+    data = {'info_dict':[{'lon':12.0,'lat':54.0,'date':None,'file':f,'sha1':str(i),'type':'CNV'} for i,f in enumerate(['/data/d1/a.cnv','/data/d2/a.cnv'])]}
+    castdata.add_pyctd_fields(data)
+    data = castdata.castCatalogue(data)
+    assert data.relative_files(['/data/d1','/data/d2']) == [os.path.join('.','d1','a.cnv'),os.path.join('.','d2','a.cnv')]
+    data.replace_in_files(['/data/d1','/data/d2'])
+    assert list(data.values('file')) == [os.path.join('.','d1','a.cnv'),os.path.join('.','d2','a.cnv')]
+
+
+if __name__ == '__main__':
+    test_one_folder()
+    test_several_folders()
+    test_catalogue()
+    print('ok')
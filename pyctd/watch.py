@@ -0,0 +1,121 @@
+#
+# Watching data folders for new cnv and mrd files, e.g. during a cruise
+# when new casts are copied into the data folder every few hours. The
+# folders are polled: a directory is only listed again if its
+# modification time changed, i.e. a poll costs one stat per directory
+# instead of listing and parsing all files. New files are reported
+# once their size and modification time did not change between two
+# polls, files still being copied are picked up by a later poll. The
+# module does not import Qt.
+#
+import os
+import fnmatch
+import logging
+from pyctd import scan as pyctd_scan
+
+logger = logging.getLogger('pyctd.watch')
+
+
+class folderWatcher(object):
+    """ Polls folders recursively for new cnv and/or mrd files
+    Args:
+        foldername: Either a string of one folder or a list of folders
+        search_seabird: Watch for Seabird cnv files
+        search_mrd: Watch for Sea & Sun mrd files
+        known_files: Filenames that are not reported, e.g. the files of the already loaded casts
+        settle: Report new files only if their size and modification time did not change since the previous poll
+    """
+    def __init__(self, foldername, search_seabird = True, search_mrd = True, known_files = None, settle = True):
+        if(isinstance(foldername, str)):
+            foldername = [foldername]
+
+        self.folders = list(foldername)
+        self.settle = settle
+        self.patterns = []
+        if search_seabird:
+            self.patterns.extend([[pattern,'CNV'] for pattern in pyctd_scan.file_patterns['CNV']])
+        if search_mrd:
+            self.patterns.extend([[pattern,'MRD'] for pattern in pyctd_scan.file_patterns['MRD']])
+
+        self._dirs = {} # directory: [st_mtime_ns,subdirectories]
+        self._known = set()
+        self._pending = {} # filename: [ftype,(st_size,st_mtime_ns)] of new files not yet settled
+        if(known_files is not None):
+            self.add_known(known_files)
+
+    def add_known(self, files):
+        """ Adds filenames that are not reported
+        """
+        for f in files:
+            self._known.add(os.path.normpath(os.path.abspath(f)))
+
+    def _ftype(self, fname):
+        for pattern,ftype in self.patterns:
+            if(fnmatch.fnmatch(fname, pattern)):
+                return ftype
+
+        return None
+
+    def _scan_dir(self, dirname, candidates):
+        """ Lists dirname if its modification time changed and recurses into the subdirectories
+        """
+        try:
+            mtime = os.stat(dirname).st_mtime_ns
+        except OSError: # Removed
+            self._dirs.pop(dirname,None)
+            return
+
+        entry = self._dirs.get(dirname)
+        if((entry is None) or (entry[0] != mtime)):
+            subdirs = []
+            try:
+                with os.scandir(dirname) as it:
+                    for e in it:
+                        if e.is_dir():
+                            subdirs.append(e.path)
+                        else:
+                            ftype = self._ftype(e.name)
+                            if(ftype is not None):
+                                candidates.append([os.path.normpath(os.path.abspath(e.path)),ftype])
+            except OSError as e:
+                logger.warning('Could not list folder:' + dirname + ' (' + str(e) + ')')
+                return
+
+            entry = [mtime,subdirs]
+            self._dirs[dirname] = entry
+
+        for subdir in entry[1]:
+            self._scan_dir(subdir, candidates)
+
+    def poll(self):
+        """ Looks for new files
+        Returns:
+            List of [filename,filetype] of the new files, as returned by scan.find_files()
+        """
+        candidates = []
+        for folder in self.folders:
+            self._scan_dir(folder, candidates)
+
+        for filename,ftype in candidates:
+            if((filename not in self._known) and (filename not in self._pending)):
+                self._pending[filename] = [ftype,None]
+
+        new_files = []
+        for filename,(ftype,stat_old) in list(self._pending.items()):
+            try:
+                st = os.stat(filename)
+            except OSError: # Removed again
+                self._pending.pop(filename)
+                continue
+
+            stat = (st.st_size,st.st_mtime_ns)
+            if((self.settle == False) or (stat == stat_old)):
+                self._pending.pop(filename)
+                self._known.add(filename)
+                new_files.append([filename,ftype])
+            else:
+                self._pending[filename][1] = stat
+
+        if(len(new_files) > 0):
+            logger.info('Found ' + str(len(new_files)) + ' new files')
+        return new_files
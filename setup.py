@@ -22,9 +22,10 @@ setup(name='pyctd',
       license='GPLv03',
       packages=['pyctd'],
       scripts = [],
-      entry_points={ 'console_scripts': ['pycnv_cmd=pyctd.pycnv:main','pyctd=pyctd.gui.pyctd_gui:main', 'pymrd=pyctd.sst.pymrd:main']},
+      entry_points={ 'console_scripts': ['pycnv_cmd=pyctd.pycnv:main','pyctd=pyctd.gui.pyctd_gui:main', 'pyctd-batch=pyctd.batch:main', 'pyctd-gridded=pyctd.gridded:main', 'pymrd=pyctd.sst.pymrd:main']},
       package_data = {'':['VERSION','stations/iow_stations.yaml','ships/ships.yaml']},
       install_requires=[ 'gsw', 'pyproj','pytz','pyaml','pycnv','geojson','pysst'],
+      extras_require={'parquet':['pyarrow'],'netcdf':['netCDF4']},
       zip_safe=False)
 
 